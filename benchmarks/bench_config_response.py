@@ -0,0 +1,125 @@
+"""
+GET /{tenant}/config: the previous per-request path vs. the pre-serialized
+response cache.
+
+Previous path, per request: ETag lookup, config lookup + copy, logo rewrite,
+TenantConfig response_model validation, jsonable_encoder and json.dumps
+(what FastAPI does for a returned dict with a response_model).
+Fast path: one lookup, then cached orjson bytes keyed by (tenant, base URL).
+
+Both are measured as plain function calls (µs per call) and end to end
+through the ASGI app (requests/s, sequential).
+
+Usage:
+    python -m benchmarks.bench_config_response --tenants 1000 --calls 20000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks import fake_firebase  # noqa: E402
+from benchmarks.load_test import generate_tenants  # noqa: E402
+
+BASE_URL = "http://bench/"
+
+
+def legacy_render(tenant: str) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from models.tenant import TenantConfig
+    from services.asset_service import asset_url
+    from services.tenant_service import get_tenant_etag, get_tenant_config_and_etag
+
+    get_tenant_etag(tenant, "config")
+    config, _ = get_tenant_config_and_etag(tenant)
+    if config.get("logo") and not config["logo"].startswith("http"):
+        config["logo"] = BASE_URL.rstrip("/") + asset_url(config["logo"])
+    validated = TenantConfig.model_validate(config).model_dump(mode="json")
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+def fast_render(tenant: str) -> bytes:
+    from services.config_response import get_rendered_config
+    return get_rendered_config(tenant, BASE_URL)[1]
+
+
+def time_calls(func, tenants, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        func(tenants[i % len(tenants)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def legacy_app():
+    """The config endpoint as it was before pre-serialization, on its own app."""
+    from fastapi import FastAPI, Path, Request, Response
+    from controllers.tenant_controller import get_etag_controller
+    from models.tenant import TenantConfig
+    from services.asset_service import asset_url
+    from services.tenant_service import get_tenant_config_and_etag
+    from utils.executor import run_blocking
+
+    app = FastAPI()
+
+    @app.get("/api/{tenant}/config", response_model=TenantConfig)
+    async def get_config_endpoint(request: Request, response: Response, tenant: str = Path(...)):
+        etag = await get_etag_controller(tenant, "config")
+        config, etag = await run_blocking(get_tenant_config_and_etag, tenant)
+        if config.get("logo") and not config["logo"].startswith("http"):
+            config["logo"] = str(request.base_url).rstrip("/") + asset_url(config["logo"])
+        response.headers["ETag"] = etag
+        return config
+
+    return app
+
+
+async def requests_per_second(app, tenants, requests: int) -> float:
+    import httpx
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=BASE_URL) as client:
+        start = time.perf_counter()
+        for i in range(requests):
+            response = await client.get(f"/api/{tenants[i % len(tenants)]}/config")
+            assert response.status_code == 200
+        return requests / (time.perf_counter() - start)
+
+
+def main(args: argparse.Namespace) -> None:
+    fake_firebase.install()
+    from main import app
+    from services import tenant_service
+    from services.tenant_store import JsonFileTenantStore, atomic_write_json
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "tenants.json")
+        atomic_write_json(path, generate_tenants(args.tenants), indent=None)
+        previous = tenant_service.use_tenant_store(JsonFileTenantStore(path))
+        try:
+            tenants = list(tenant_service.load_tenants())
+            assert legacy_render(tenants[0]) == fast_render(tenants[0])
+            # Warm both paths (cache fill, first validation)
+            time_calls(legacy_render, tenants, len(tenants))
+            time_calls(fast_render, tenants, len(tenants))
+
+            legacy_us = time_calls(legacy_render, tenants, args.calls)
+            fast_us = time_calls(fast_render, tenants, args.calls)
+            print(f"{args.tenants} tenants, {args.calls} calls")
+            print(f"{'path':>10} {'µs/call':>10} {'req/s (ASGI)':>14}")
+            legacy_rps = asyncio.run(requests_per_second(legacy_app(), tenants, args.requests))
+            fast_rps = asyncio.run(requests_per_second(app, tenants, args.requests))
+            print(f"{'previous':>10} {legacy_us:>10.2f} {legacy_rps:>14.1f}")
+            print(f"{'cached':>10} {fast_us:>10.2f} {fast_rps:>14.1f}")
+            print(f"speedup: {legacy_us / fast_us:.1f}x per call, {fast_rps / legacy_rps:.2f}x end to end")
+        finally:
+            tenant_service.use_tenant_store(previous)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--calls", type=int, default=20000, help="Function-level calls per path")
+    parser.add_argument("--requests", type=int, default=2000, help="ASGI requests per path")
+    main(parser.parse_args())
@@ -0,0 +1,250 @@
+"""
+Offline stand-in for `firebase_client` (Firebase Auth + Firestore) used by the
+benchmarks. It mints and verifies its own HMAC-signed test tokens, keeps the
+Firestore `users` collection in memory and sleeps a configurable amount per
+call to simulate network round trips.
+
+Call `install()` BEFORE importing `main` (or anything that imports
+`firebase_client`):
+
+    from benchmarks import fake_firebase
+    fake = fake_firebase.install(auth_latency_ms=2, firestore_latency_ms=15)
+    token = fake.auth.create_test_token("uid-1")
+    fake.db.collection("users").document("uid-1").set({"role": "HR", "tenant": "tenant1"})
+
+    from main import app
+"""
+import base64
+import copy
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import time
+import types
+from typing import Any, Dict, Optional
+
+from firebase_admin import auth as firebase_auth_errors
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class Latency:
+    """Per-call artificial delay, in seconds (blocking, like the real SDKs)."""
+
+    def __init__(self, seconds: float = 0.0):
+        self.seconds = seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if self.seconds > 0:
+            time.sleep(self.seconds)
+
+
+class FakeAuth:
+    """Subset of `firebase_admin.auth` used by the app."""
+
+    # Same exception types the real module exposes
+    InvalidIdTokenError = firebase_auth_errors.InvalidIdTokenError
+    ExpiredIdTokenError = firebase_auth_errors.ExpiredIdTokenError
+    RevokedIdTokenError = firebase_auth_errors.RevokedIdTokenError
+
+    def __init__(self, latency: Latency, secret: bytes = b"mint-tenant-core-bench"):
+        self.latency = latency
+        self._secret = secret
+        self._revoked_before: Dict[str, float] = {}
+        self.custom_claims: Dict[str, Dict[str, Any]] = {}
+
+    def create_test_token(
+            self,
+            uid: str,
+            email: Optional[str] = None,
+            ttl: float = 3600,
+            claims: Optional[Dict[str, Any]] = None
+    ) -> str:
+        now = time.time()
+        # Like Firebase, new tokens carry the user's custom claims
+        payload = {"uid": uid, "user_id": uid, "sub": uid, "iat": now, "auth_time": now, "exp": now + ttl,
+                   "email": email or f"{uid}@example.com", **self.custom_claims.get(uid, {}), **(claims or {})}
+        body = _b64(json.dumps(payload, separators=(",", ":")).encode())
+        signature = _b64(hmac.new(self._secret, body.encode(), hashlib.sha256).digest())
+        return f"fake.{body}.{signature}"
+
+    def verify_id_token(self, id_token: str, app=None, check_revoked: bool = False, clock_skew_seconds: int = 0) -> dict:
+        self.latency()
+        try:
+            prefix, body, signature = id_token.split(".")
+            expected = _b64(hmac.new(self._secret, body.encode(), hashlib.sha256).digest())
+            if prefix != "fake" or not hmac.compare_digest(signature, expected):
+                raise ValueError("bad signature")
+            decoded = json.loads(_unb64(body))
+        except (ValueError, TypeError) as e:
+            raise self.InvalidIdTokenError(f"Invalid test token: {e}")
+        if decoded["exp"] < time.time():
+            raise self.ExpiredIdTokenError("Test token has expired.", None)
+        if check_revoked and decoded["auth_time"] < self._revoked_before.get(decoded["uid"], 0):
+            raise self.RevokedIdTokenError("Test token has been revoked.")
+        return decoded
+
+    def refresh_signing_keys(self) -> float:
+        self.latency()
+        return 3600.0
+
+    def set_custom_user_claims(self, uid: str, custom_claims: Optional[Dict[str, Any]], app=None) -> None:
+        self.latency()
+        self.custom_claims[uid] = dict(custom_claims or {})
+
+    def get_user(self, uid: str, app=None):
+        self.latency()
+        # Like UserRecord: custom claims (or None) and revocation time in milliseconds
+        revoked_before = self._revoked_before.get(uid)
+        return types.SimpleNamespace(
+            uid=uid,
+            custom_claims=dict(self.custom_claims[uid]) if uid in self.custom_claims else None,
+            tokens_valid_after_timestamp=int(revoked_before * 1000) if revoked_before else None,
+        )
+
+    def revoke_refresh_tokens(self, uid: str, app=None) -> None:
+        self.latency()
+        self._revoked_before[uid] = time.time()
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id: str, data: Optional[dict]):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, store: "FakeFirestore", collection: str, doc_id: str):
+        self._store = store
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self) -> FakeSnapshot:
+        self._store.latency()
+        with self._store.lock:
+            data = self._store.data.get(self._collection, {}).get(self.id)
+            return FakeSnapshot(self.id, copy.deepcopy(data))
+
+    def set(self, data: dict, merge: bool = False) -> None:
+        self._store.latency()
+        self._store.apply_set(self._collection, self.id, data, merge)
+
+
+class FakeCollection:
+    def __init__(self, store: "FakeFirestore", name: str):
+        self._store = store
+        self._name = name
+
+    def document(self, doc_id: str) -> FakeDocument:
+        return FakeDocument(self._store, self._name, doc_id)
+
+
+class FakeWriteBatch:
+    """Firestore WriteBatch: up to 500 writes committed atomically in one round trip."""
+
+    MAX_WRITES = 500
+
+    def __init__(self, store: "FakeFirestore"):
+        self._store = store
+        self._writes = []
+
+    def set(self, document: FakeDocument, data: dict, merge: bool = False) -> "FakeWriteBatch":
+        if len(self._writes) >= self.MAX_WRITES:
+            raise ValueError(f"Maximum {self.MAX_WRITES} writes allowed per batch.")
+        self._writes.append((document, data, merge))
+        return self
+
+    def commit(self) -> list:
+        self._store.latency()
+        with self._store.lock:
+            failing = [document.id for document, _, _ in self._writes if document.id in self._store.failing_docs]
+            if failing:
+                raise RuntimeError(f"Write rejected for {failing[0]}")
+        for document, data, merge in self._writes:
+            self._store.apply_set(document._collection, document.id, data, merge)
+        self._store.batch_commits += 1
+        return [None] * len(self._writes)
+
+
+class FakeFirestore:
+    """In-memory Firestore with just the calls the app makes."""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.data: Dict[str, Dict[str, dict]] = {}
+        # Document ids whose batched writes fail (to exercise partial failures)
+        self.failing_docs: set = set()
+        self.batch_commits = 0
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def apply_set(self, collection: str, doc_id: str, data: dict, merge: bool) -> None:
+        with self.lock:
+            docs = self.data.setdefault(collection, {})
+            if merge and doc_id in docs:
+                docs[doc_id] = {**docs[doc_id], **copy.deepcopy(data)}
+            else:
+                docs[doc_id] = copy.deepcopy(data)
+
+
+class FakeFirebase:
+    def __init__(self, auth_latency: float = 0.0, firestore_latency: float = 0.0):
+        self.auth_latency = Latency(auth_latency)
+        self.firestore_latency = Latency(firestore_latency)
+        self.auth = FakeAuth(self.auth_latency)
+        self.db = FakeFirestore(self.firestore_latency)
+
+    def add_user(self, uid: str, role: str, tenant: str, **claims: Any) -> str:
+        """Create a `users/{uid}` document and return a fresh ID token for the user."""
+        self.db.apply_set("users", uid, {"role": role, "tenant": tenant}, merge=False)
+        return self.auth.create_test_token(uid, claims=claims or None)
+
+
+def install(auth_latency_ms: float = 0.0, firestore_latency_ms: float = 0.0) -> FakeFirebase:
+    """
+    Register a fake `firebase_client` module. Must run before `firebase_client`
+    is imported anywhere; raises if the real one is already loaded.
+    """
+    existing = sys.modules.get("firebase_client")
+    if existing is not None:
+        if not getattr(existing, "IS_FAKE", False):
+            raise RuntimeError("firebase_client is already imported; install the fake before importing main.")
+        # Already-imported modules hold references to the installed fake; just retune it
+        existing.fake.auth_latency.seconds = auth_latency_ms / 1000
+        existing.fake.firestore_latency.seconds = firestore_latency_ms / 1000
+        return existing.fake
+    fake = FakeFirebase(auth_latency_ms / 1000, firestore_latency_ms / 1000)
+    module = types.ModuleType("firebase_client")
+    module.IS_FAKE = True
+    module.fake = fake
+    module.db = fake.db
+    module.firebase_auth = fake.auth
+    # Same lazy-initialization API as the real module
+    module.startup_timings = {}
+    module.initialize = lambda: fake
+    module.get_db = lambda: fake.db
+    module.get_auth = lambda: fake.auth
+    module.refresh_signing_keys = fake.auth.refresh_signing_keys
+    sys.modules["firebase_client"] = module
+    return fake
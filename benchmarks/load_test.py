@@ -0,0 +1,217 @@
+"""
+Offline load test of the real `main:app` against a latency-injecting fake of
+Firebase Auth and Firestore (see benchmarks/fake_firebase.py).
+
+For every tenant count it generates a tenant store, then drives `/ping`,
+`/api/auth/me`, `/api/{tenant}/config` and `/api/{tenant}/features` at each
+concurrency level and reports req/s and p50/p95/p99 latency.
+
+Usage:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --tenants 10 1000 100000 --concurrency 1 16 64 \\
+        --requests 2000 --auth-latency-ms 3 --firestore-latency-ms 20 --storage sqlite
+
+By default requests go through httpx's in-process ASGI transport, which
+measures the application itself. Use --serve to run uvicorn on a local port
+and measure over real HTTP instead.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Measure raw throughput, not the per-tenant rate limits
+os.environ.setdefault("ADMISSION_CONTROL", "false")
+
+from benchmarks import fake_firebase  # noqa: E402
+
+ENDPOINTS = ("ping", "me", "config", "features")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def generate_tenants(count: int) -> Dict[str, dict]:
+    return {
+        f"tenant{i}": {
+            "features": {
+                "Accounting": i % 2 == 0,
+                "TimeSheet": i % 3 == 0,
+                "Profile Update": True,
+                "Team Announcement": i % 5 != 0,
+                "Client Management": True,
+            },
+            "primaryColor": "#41aaa8",
+            "secondaryColor": "#dfdfdf",
+            "logo": "/static/logos/logo2.png",
+            "layout": "top" if i % 2 else "side",
+            "brandName": f"Tenant {i}",
+        }
+        for i in range(count)
+    }
+
+
+def build_store(mode: str, tenants: Dict[str, dict], workdir: str):
+    from services.tenant_store import create_tenant_store, atomic_write_json
+
+    path = os.path.join(workdir, "tenants.json")
+    if mode == "sqlite":
+        from services.sqlite_store import SqliteTenantStore
+        store = SqliteTenantStore(os.path.join(workdir, "tenants.db"))
+        store.import_tenants(tenants, overwrite=True)
+        return store
+    atomic_write_json(path, tenants, indent=None)
+    return create_tenant_store(mode, path=path, journal_path=os.path.join(workdir, "tenants.journal"))
+
+
+def request_for(endpoint: str, tenant: str, user: Tuple[str, str]):
+    """Path and headers for one request; `user` is (token, the user's own tenant)."""
+    token, own_tenant = user
+    headers = {"Authorization": f"Bearer {token}"}
+    if endpoint == "ping":
+        return "/ping", {}
+    if endpoint == "me":
+        return "/api/auth/me", headers
+    if endpoint == "config":
+        return f"/api/{tenant}/config", {}
+    # Tenant-scoped: other tenants' features are 403 for non-Admin users
+    return f"/api/{own_tenant}/features", headers
+
+
+async def run_level(client, endpoint: str, tenant_names: List[str], users: List[Tuple[str, str]],
+                    concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+    rng = random.Random(42)
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            path, headers = request_for(endpoint, rng.choice(tenant_names), rng.choice(users))
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def start_server(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def main(args: argparse.Namespace) -> List[dict]:
+    import httpx
+
+    fake = fake_firebase.install(args.auth_latency_ms, args.firestore_latency_ms)
+
+    from main import app
+    from services import tenant_service
+
+    server = None
+    if args.serve:
+        server, _ = start_server(app, args.port)
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}",
+                                   limits=httpx.Limits(max_connections=max(args.concurrency)))
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    print(f"Fake Firebase latency: auth {args.auth_latency_ms} ms, Firestore {args.firestore_latency_ms} ms; "
+          f"storage: {args.storage}; users: {args.users}; {args.requests} requests per level")
+    print(f"{'tenants':>8} {'endpoint':>9} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    results = []
+    try:
+        for tenant_count in args.tenants:
+            with tempfile.TemporaryDirectory() as workdir:
+                tenants = generate_tenants(tenant_count)
+                previous = tenant_service.use_tenant_store(build_store(args.storage, tenants, workdir))
+                tenant_names = list(tenants)
+                # Fresh uids per level: the token and user metadata caches still know the
+                # previous level's users, with that level's tenants
+                users = []
+                for i in range(args.users):
+                    tenant = tenant_names[i % len(tenant_names)]
+                    users.append((fake.add_user(f"bench-user-{tenant_count}-{i}", "HR", tenant), tenant))
+                try:
+                    for concurrency in args.concurrency:
+                        for endpoint in args.endpoints:
+                            # Warm-up pass so one-off costs (first parse, first verify) are not counted
+                            await run_level(client, endpoint, tenant_names, users, concurrency, min(50, args.requests))
+                            row = await run_level(client, endpoint, tenant_names, users, concurrency, args.requests)
+                            row["tenants"] = tenant_count
+                            results.append(row)
+                            print(f"{tenant_count:>8} {endpoint:>9} {concurrency:>5} {row['rps']:>9.1f} "
+                                  f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['errors']:>7}")
+                            if row["errors"]:
+                                print(f"WARNING: {row['errors']} non-200 responses; latencies of this level "
+                                      f"are not comparable", file=sys.stderr)
+                finally:
+                    tenant_service.use_tenant_store(previous).close()
+    finally:
+        await client.aclose()
+        if server is not None:
+            server.should_exit = True
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests per endpoint/concurrency level")
+    parser.add_argument("--users", type=int, default=50, help="Distinct users (tokens) to spread requests over")
+    parser.add_argument("--auth-latency-ms", type=float, default=2.0, help="Added to every verify_id_token call")
+    parser.add_argument("--firestore-latency-ms", type=float, default=15.0, help="Added to every Firestore call")
+    parser.add_argument("--storage", choices=("file", "journal", "sqlite"), default="file")
+    parser.add_argument("--serve", action="store_true", help="Measure over real HTTP via uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    if "firebase_client" in sys.modules:
+        raise SystemExit("Run this module directly so the fake Firebase can be installed first.")
+    rows = asyncio.run(main(parse_args()))
+    if any(row["errors"] for row in rows):
+        raise SystemExit("Some requests failed; see the errors column.")
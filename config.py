@@ -1,3 +1,5 @@
+import os
+
 # ===================
 # DEFAULT TENANT SETTINGS
 # ===================
@@ -17,3 +19,193 @@ DEFAULT_SECONDARY_COLOR = "#a21caf" # Purple (secondary theme)
 DEFAULT_LOGO = "https://placehold.co/100x50?text=Tenant"
 DEFAULT_LAYOUT = "side"  # or 'top'
 DEFAULT_BRAND_NAME = "Mint Tenants"
+
+# ===================
+# TENANT STORAGE & CACHING
+# ===================
+
+# Maximum number of tenant configs held in the in-process cache (LRU beyond this)
+TENANT_CACHE_MAX_ENTRIES = int(os.getenv("TENANT_CACHE_MAX_ENTRIES", 10000))
+
+# Tenant storage mode: "file" rewrites tenants.json on every change,
+# "journal" appends deltas to tenants.journal and compacts in the background,
+# "sqlite" keeps one row per tenant in a WAL-mode SQLite database
+TENANT_STORAGE_MODE = os.getenv("TENANT_STORAGE_MODE", "file")
+# SQLite database used when TENANT_STORAGE_MODE is "sqlite"
+# (import an existing tenants.json with `python -m services.sqlite_store tenants.json tenants.db`)
+TENANT_SQLITE_PATH = os.getenv("TENANT_SQLITE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tenants.db"))
+TENANT_JOURNAL_FSYNC = os.getenv("TENANT_JOURNAL_FSYNC", "always")  # always | interval | never
+TENANT_JOURNAL_FSYNC_INTERVAL = float(os.getenv("TENANT_JOURNAL_FSYNC_INTERVAL", 1.0))
+TENANT_JOURNAL_COMPACT_EVERY = int(os.getenv("TENANT_JOURNAL_COMPACT_EVERY", 1000))
+# Serve reads from one mmap'd snapshot shared by all worker processes ("file" and "sqlite" modes).
+# Writes publish a new snapshot generation that every worker picks up on its next read.
+TENANT_SHARED_SNAPSHOT = os.getenv("TENANT_SHARED_SNAPSHOT", "false").lower() == "true"
+TENANT_SNAPSHOT_PATH = os.getenv("TENANT_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tenants.snapshot"))
+# How often (seconds) a worker checks the backing store for edits made outside the app
+TENANT_SNAPSHOT_CHECK_INTERVAL = float(os.getenv("TENANT_SNAPSHOT_CHECK_INTERVAL", 1.0))
+
+# ===================
+# AUTHENTICATION
+# ===================
+
+# Verified ID tokens are cached until their `exp` claim, capped at TOKEN_CACHE_MAX_TTL seconds
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))  # 0 disables the cache
+TOKEN_CACHE_MAX_TTL = float(os.getenv("TOKEN_CACHE_MAX_TTL", 300))
+# Also ask Firebase whether the token was revoked when verifying a token that isn't cached.
+# A revoked token then stops working within TOKEN_CACHE_MAX_TTL seconds, or at once for users
+# whose metadata this worker writes (their cached tokens are dropped).
+TOKEN_CHECK_REVOKED = os.getenv("TOKEN_CHECK_REVOKED", "false").lower() == "true"
+
+# Firestore `users/{uid}` documents are cached for USER_CACHE_TTL seconds,
+# users without a document for USER_CACHE_NEGATIVE_TTL seconds
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+USER_CACHE_NEGATIVE_TTL = float(os.getenv("USER_CACHE_NEGATIVE_TTL", 10))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+
+# Bulk role/tenant assignment: users per Firestore batched write (Firestore allows at most 500),
+# batches committed in parallel, and users accepted per request
+USER_BATCH_SIZE = min(500, int(os.getenv("USER_BATCH_SIZE", 500)))
+USER_BATCH_CONCURRENCY = int(os.getenv("USER_BATCH_CONCURRENCY", 4))
+USER_BULK_MAX_ITEMS = int(os.getenv("USER_BULK_MAX_ITEMS", 10000))
+
+# Role and tenant are also written to the user's Firebase custom claims (other custom claims are
+# kept), and requests whose ID token carries both are authorized without reading Firestore.
+# Changing a user's role or tenant revokes their refresh tokens: the worker that made the change
+# stops trusting their older tokens' claims at once, other workers when the token is next
+# verified for a cross-tenant role (Admin) and otherwise when it expires (within an hour).
+AUTH_TOKEN_CLAIMS = os.getenv("AUTH_TOKEN_CLAIMS", "true").lower() == "true"
+# Roles, permissions and per-route requirements (see utils/rbac.py), compiled at startup
+RBAC_POLICY_PATH = os.getenv("RBAC_POLICY_PATH", os.path.join(os.path.dirname(__file__), "rbac_policy.json"))
+
+# ===================
+# CONCURRENCY
+# ===================
+
+# Threads available for blocking calls (Firestore, token verification, tenant storage)
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", 32))
+
+# ===================
+# HTTP CACHING
+# ===================
+
+# Clients may keep tenant config/features but must revalidate (ETag / If-None-Match) before reuse
+TENANT_CONFIG_CACHE_CONTROL = os.getenv("TENANT_CONFIG_CACHE_CONTROL", "public, no-cache")
+TENANT_FEATURES_CACHE_CONTROL = os.getenv("TENANT_FEATURES_CACHE_CONTROL", "private, no-cache")
+
+# Ready-to-send GET /{tenant}/config bodies kept per (tenant, base URL), rebuilt when the tenant or a logo changes
+CONFIG_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("CONFIG_RESPONSE_CACHE_MAX_ENTRIES", 10000))
+
+# Maximum number of checks / tenants / features in one bulk feature evaluation request
+FEATURE_EVAL_MAX_ITEMS = int(os.getenv("FEATURE_EVAL_MAX_ITEMS", 10000))
+# Tenants whose compiled rollout rules (percentage / role / uid flags) are kept in memory
+FEATURE_RULES_CACHE_MAX_ENTRIES = int(os.getenv("FEATURE_RULES_CACHE_MAX_ENTRIES", 10000))
+
+# ===================
+# CHANGE STREAMING
+# ===================
+
+# Recent change events kept per worker so reconnecting SSE clients can resume
+# and GET /api/tenants/changes can answer with deltas instead of a full snapshot
+TENANT_EVENT_HISTORY = int(os.getenv("TENANT_EVENT_HISTORY", 1000))
+# Events buffered per SSE connection before a slow client is told to resync
+TENANT_EVENT_BUFFER = int(os.getenv("TENANT_EVENT_BUFFER", 100))
+TENANT_EVENT_HEARTBEAT_SECONDS = float(os.getenv("TENANT_EVENT_HEARTBEAT_SECONDS", 15))
+# Change records returned per GET /api/tenants/changes page when `limit` is not given, and the most allowed
+TENANT_CHANGES_DEFAULT_LIMIT = int(os.getenv("TENANT_CHANGES_DEFAULT_LIMIT", 500))
+TENANT_CHANGES_MAX_LIMIT = int(os.getenv("TENANT_CHANGES_MAX_LIMIT", 5000))
+
+# ===================
+# METRICS
+# ===================
+
+# Expose request/dependency latency histograms at GET /metrics (Prometheus text format)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Tenants that get their own `tenant` label; requests for further tenants are labelled "other"
+METRICS_MAX_TENANTS = int(os.getenv("METRICS_MAX_TENANTS", 50))
+
+# ===================
+# LOGGING
+# ===================
+
+# Log records are written by a background thread; at most LOG_QUEUE_SIZE wait, further ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Per-logger sampling (fraction of records kept) and rate limits (records per second),
+# as `logger=value,...`. Successful authentications log to MintTenantCore.Auth,
+# health checks to MintTenantCore.Health.
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_RATE_LIMITS = os.getenv("LOG_RATE_LIMITS", "MintTenantCore.Auth=10,MintTenantCore.Health=1")
+
+# ===================
+# ADMISSION CONTROL
+# ===================
+
+# Shed load before authentication: 429 when a tenant or user exceeds its request rate,
+# 503 when a tenant has too many requests in flight (both with Retry-After). 0 disables a limit.
+# Off by default: size the budgets for your traffic (a page load can be several requests) first
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "false").lower() == "true"
+# Requests per second and burst size per tenant (`/{tenant}` path segment or Host header)
+ADMISSION_TENANT_RATE = float(os.getenv("ADMISSION_TENANT_RATE", 50))
+ADMISSION_TENANT_BURST = float(os.getenv("ADMISSION_TENANT_BURST", 100))
+# Requests per second and burst size per user (tokens already verified by this worker)
+ADMISSION_UID_RATE = float(os.getenv("ADMISSION_UID_RATE", 10))
+ADMISSION_UID_BURST = float(os.getenv("ADMISSION_UID_BURST", 20))
+# Concurrent in-flight requests per tenant (SSE streams excluded)
+ADMISSION_TENANT_CONCURRENCY = int(os.getenv("ADMISSION_TENANT_CONCURRENCY", 32))
+# Tenants / users with a tracked rate limit bucket (least recently seen are forgotten beyond this)
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", 10000))
+
+# ===================
+# STARTUP
+# ===================
+
+# Create the Firestore client and fetch Google's ID token signing certificates at startup,
+# then refresh the certificates SIGNING_KEYS_REFRESH_MARGIN seconds before they expire
+FIREBASE_PREWARM = os.getenv("FIREBASE_PREWARM", "true").lower() == "true"
+SIGNING_KEYS_REFRESH_MARGIN = float(os.getenv("SIGNING_KEYS_REFRESH_MARGIN", 300))
+# Delay before retrying a failed certificate fetch
+SIGNING_KEYS_RETRY_SECONDS = float(os.getenv("SIGNING_KEYS_RETRY_SECONDS", 30))
+
+# ===================
+# STATIC ASSETS
+# ===================
+
+# Tenant logos, served at ASSET_URL_PREFIX<file name> and, for long-term caching,
+# at ASSET_URL_PREFIX<name>.<content hash>.<ext>
+ASSETS_DIR = os.getenv("ASSETS_DIR", os.path.join(os.getcwd(), "assets"))
+ASSET_URL_PREFIX = "/static/logos/"
+# Files up to this size are kept in memory; larger ones are streamed from disk
+ASSET_INLINE_MAX_BYTES = int(os.getenv("ASSET_INLINE_MAX_BYTES", 256 * 1024))
+# How often (seconds) an indexed file is re-checked for changes on disk
+ASSET_CHECK_INTERVAL = float(os.getenv("ASSET_CHECK_INTERVAL", 5))
+ASSET_CACHE_CONTROL = os.getenv("ASSET_CACHE_CONTROL", "public, max-age=300")
+ASSET_IMMUTABLE_CACHE_CONTROL = os.getenv("ASSET_IMMUTABLE_CACHE_CONTROL", "public, max-age=31536000, immutable")
+
+# ===================
+# TENANT RESOLUTION
+# ===================
+
+# Resolve the tenant from the Host header (custom domain or `<tenant>.` subdomain) on every request.
+# Off by default: routes take the tenant from the `/{tenant}` path; enable for log context,
+# admission control by Host, or handlers that read request.state.tenant
+TENANT_HOST_RESOLUTION = os.getenv("TENANT_HOST_RESOLUTION", "false").lower() == "true"
+# Seconds the in-memory domain index is trusted before it is re-checked against the tenant store
+TENANT_HOST_INDEX_MAX_AGE = float(os.getenv("TENANT_HOST_INDEX_MAX_AGE", 5))
+
+# ===================
+# TENANT LISTING
+# ===================
+
+# Page size of GET /api/tenants when `limit` is not given, and the largest page allowed
+TENANT_LIST_DEFAULT_LIMIT = int(os.getenv("TENANT_LIST_DEFAULT_LIMIT", 50))
+TENANT_LIST_MAX_LIMIT = int(os.getenv("TENANT_LIST_MAX_LIMIT", 500))
+
+# ===================
+# BULK PROVISIONING
+# ===================
+
+# Rows applied per storage commit by POST /api/tenants/bulk; imports up to this size commit once
+TENANT_BULK_COMMIT_ROWS = int(os.getenv("TENANT_BULK_COMMIT_ROWS", 5000))
+# Largest accepted single record (NDJSON line or array element)
+TENANT_BULK_MAX_RECORD_BYTES = int(os.getenv("TENANT_BULK_MAX_RECORD_BYTES", 64 * 1024))
+# Per-row results are kept in memory up to this size, then spooled to a temp file
+TENANT_BULK_RESULT_SPOOL_BYTES = int(os.getenv("TENANT_BULK_RESULT_SPOOL_BYTES", 1024 * 1024))
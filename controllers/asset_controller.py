@@ -0,0 +1,22 @@
+from typing import Tuple
+from fastapi import HTTPException, status
+from services.asset_service import resolve_asset, resolve_asset_cached
+from services.asset_store import Asset
+from utils.executor import run_blocking
+
+async def get_asset_controller(filename: str) -> Tuple[Asset, bool]:
+    """
+    Look up a logo by plain or content-hashed file name.
+    Answered from the in-memory index when possible, otherwise checked on disk.
+    Returns:
+        (asset, immutable): immutable is True for a current content-hashed name.
+    Raises:
+        HTTPException: 404 if there is no such file.
+    """
+    cached = resolve_asset_cached(filename)
+    if cached is not None:
+        return cached
+    asset, immutable = await run_blocking(resolve_asset, filename)
+    if asset is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Logo not found")
+    return asset, immutable
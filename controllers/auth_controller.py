@@ -1,15 +1,17 @@
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from utils.security import get_current_user
-from services.auth_service import fetch_user_metadata, update_user_metadata
+from services.auth_service import fetch_user_metadata_async, update_user_metadata, update_users_metadata
+from utils.executor import run_blocking
 
-async def get_current_user_profile(current_user: dict = Depends(get_current_user)) -> dict:
+async def get_current_user_profile(request: Request, current_user: dict = Depends(get_current_user)) -> dict:
     """
     Controller to fetch the current user's profile info (role, tenant, email, uid).
+    Reuses the metadata get_current_user already loaded for this request.
 
     Returns:
         dict: User's profile from Firestore (or raises 404 if not found).
     """
-    user_metadata = fetch_user_metadata(current_user["uid"])
+    user_metadata = getattr(request.state, "user_metadata", None) or await fetch_user_metadata_async(current_user["uid"])
     if not user_metadata:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -37,10 +39,24 @@ async def update_user_profile(uid: str, role: str, tenant: str) -> dict:
         dict: Confirmation message on successful update.
     """
     try:
-        update_user_metadata(uid, role, tenant)
+        await run_blocking(update_user_metadata, uid, role, tenant)
         return {"success": True, "message": f"User profile updated for UID {uid}."}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update user profile: {e}"
         )
+
+async def bulk_update_user_profiles(updates: list) -> dict:
+    """
+    Controller to assign roles/tenants to many users with Firestore batched writes.
+
+    Args:
+        updates (list): (uid, role, tenant) tuples.
+
+    Returns:
+        dict: Number of users updated and uid -> error for the ones that failed.
+    """
+    results = await update_users_metadata(updates)
+    failed = {uid: error for uid, error in results.items() if error is not None}
+    return {"updated": len(results) - len(failed), "failed": failed}
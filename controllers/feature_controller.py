@@ -0,0 +1,25 @@
+from services.tenant_service import evaluate_features, list_tenants_by_feature
+from utils.executor import run_blocking
+
+async def evaluate_features_controller(checks: list, tenants: list, features: list) -> dict:
+    """
+    Evaluate many feature flags across tenants in one call, served from the feature index.
+    Returns:
+        dict: Per-check results and a tenant x feature matrix (null for unknown tenants).
+    """
+    pairs = [(check.tenant, check.feature) for check in checks]
+    results, matrix = await run_blocking(evaluate_features, pairs, tenants, features)
+    return {
+        "results": [
+            {"tenant": tenant, "feature": feature, "enabled": enabled}
+            for (tenant, feature), enabled in zip(pairs, results)
+        ],
+        "matrix": matrix
+    }
+
+async def tenants_with_feature_controller(feature: str, enabled: bool = True) -> dict:
+    """
+    List the tenants that have a feature enabled (or disabled).
+    """
+    tenants = await run_blocking(list_tenants_by_feature, feature, enabled)
+    return {"feature": feature, "enabled": enabled, "tenants": tenants}
@@ -1,10 +1,31 @@
+import base64
+import binascii
+import tempfile
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import orjson
 from fastapi import HTTPException, status
+from pydantic import ValidationError
+from models.tenant import TenantBulkRecord
 from services.tenant_service import (
+    apply_tenant_batch,
     create_tenant,
-    get_tenant_config,
+    get_tenant_changes,
+    list_tenants,
     update_tenant_config,
-    get_tenant_features,
-    update_tenant_features
+    update_tenant_features,
+    get_tenant_etag,
+    get_tenant_features_and_etag,
+    tenant_events
+)
+from services.config_response import get_rendered_config
+from services.feature_rollout import evaluate_user_features
+from utils.executor import run_blocking
+from utils.json_stream import RecordError, iter_json_records
+from config import (
+    TENANT_EVENT_HEARTBEAT_SECONDS,
+    TENANT_BULK_COMMIT_ROWS,
+    TENANT_BULK_MAX_RECORD_BYTES,
+    TENANT_BULK_RESULT_SPOOL_BYTES
 )
 
 async def create_tenant_controller(
@@ -14,7 +35,8 @@ async def create_tenant_controller(
         logo: str,
         layout: str,
         brandName: str,
-        features: dict = None
+        features: dict = None,
+        domains: list = None
 ) -> dict:
     """
     Create a new tenant with provided configuration and features.
@@ -24,62 +46,92 @@ async def create_tenant_controller(
         HTTPException: 409 if tenant already exists, 400 for other errors.
     """
     try:
-        config = create_tenant(tenant, primaryColor, secondaryColor, logo, brandName, layout, features)
+        config = await run_blocking(create_tenant, tenant, primaryColor, secondaryColor, logo, brandName, layout, features, domains)
         return {
             "message": f"Tenant '{tenant}' created successfully.",
             "tenant": config
         }
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT if "exists" in str(e).lower() else status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_409_CONFLICT if "exists" in str(e).lower() or "already belongs" in str(e) else status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to create tenant '{tenant}': {e}"
         )
 
-async def get_config_controller(tenant: str) -> dict:
+async def get_etag_controller(tenant: str, part: str = "config") -> str:
     """
-    Retrieve the configuration for the specified tenant.
+    Retrieve the current ETag of the tenant's config or features,
+    without copying or serializing the data itself.
     Raises:
         HTTPException: 404 if tenant does not exist.
     """
-    config = get_tenant_config(tenant)
-    if not config:
+    etag = await run_blocking(get_tenant_etag, tenant, part)
+    if etag is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Tenant '{tenant}' not found."
         )
-    return config
+    return etag
+
+async def get_rendered_config_controller(tenant: str, base_url: str) -> tuple:
+    """
+    Retrieve the tenant's ready-to-send config body (JSON bytes) and its ETag.
+    Raises:
+        HTTPException: 404 if tenant does not exist.
+    """
+    rendered = await run_blocking(get_rendered_config, tenant, base_url)
+    if rendered is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tenant '{tenant}' not found."
+        )
+    return rendered
 
 async def update_config_controller(tenant: str, updates: dict) -> dict:
     """
     Update configuration for the specified tenant.
     Returns updated tenant config.
     Raises:
-        HTTPException: 404 if tenant does not exist.
+        HTTPException: 404 if tenant does not exist, 409 if a custom domain belongs to another tenant.
     """
     try:
-        updated = update_tenant_config(tenant, updates)
+        updated = await run_blocking(update_tenant_config, tenant, updates)
         return updated
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
+            status_code=status.HTTP_409_CONFLICT if "already belongs" in str(e) else status.HTTP_404_NOT_FOUND,
             detail=f"Failed to update config for tenant '{tenant}': {e}"
         )
 
-async def get_features_controller(tenant: str) -> dict:
+async def get_versioned_features_controller(tenant: str) -> tuple:
     """
-    Retrieve enabled/disabled features for the specified tenant.
+    Retrieve the tenant's feature flags together with their ETag.
     Raises:
         HTTPException: 404 if tenant does not exist.
     """
     try:
-        features = get_tenant_features(tenant)
-        return features
+        return await run_blocking(get_tenant_features_and_etag, tenant)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Could not fetch features for tenant '{tenant}': {e}"
         )
 
+async def get_user_features_controller(tenant: str, uid: str, role: str) -> Dict[str, bool]:
+    """
+    Evaluate every feature flag of the tenant (booleans and rollout rules) for one user.
+    Returns:
+        dict: feature name -> enabled for this user.
+    Raises:
+        HTTPException: 404 if tenant does not exist.
+    """
+    features = await run_blocking(evaluate_user_features, tenant, uid, role)
+    if features is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tenant '{tenant}' not found."
+        )
+    return features
+
 async def update_features_controller(tenant: str, features_update: dict) -> dict:
     """
     Update the feature flags for the specified tenant.
@@ -89,7 +141,7 @@ async def update_features_controller(tenant: str, features_update: dict) -> dict
         HTTPException: 404 if tenant does not exist.
     """
     try:
-        updated = update_tenant_features(tenant, features_update)
+        updated = await run_blocking(update_tenant_features, tenant, features_update)
         return {
             "message": f"Features updated successfully for tenant '{tenant}'.",
             "features": updated
@@ -99,3 +151,150 @@ async def update_features_controller(tenant: str, features_update: dict) -> dict
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Failed to update features for tenant '{tenant}': {e}"
         )
+
+async def open_event_stream_controller(tenant: str, last_event_id: str = None):
+    """
+    Open a Server-Sent Events stream of config/feature changes for the specified tenant.
+    Returns:
+        AsyncIterator[str]: SSE text chunks (replayed missed events first, then live ones).
+    Raises:
+        HTTPException: 404 if tenant does not exist.
+    """
+    await get_etag_controller(tenant)
+    return tenant_events.stream(tenant, last_event_id, TENANT_EVENT_HEARTBEAT_SECONDS)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc']) or 'record'}: {e['msg']}" for e in error.errors())
+
+async def bulk_tenants_controller(chunks: AsyncIterator[bytes]) -> Tuple[Dict[str, Any], AsyncIterator[bytes]]:
+    """
+    Validate and apply a streamed bulk import (NDJSON or a JSON array of TenantBulkRecord),
+    TENANT_BULK_COMMIT_ROWS rows per storage commit. Invalid rows are reported, not applied.
+    Returns:
+        tuple: (summary counts, NDJSON body: one TenantBulkResult per row, then {"summary": ...}).
+        Results are spooled to a temp file beyond TENANT_BULK_RESULT_SPOOL_BYTES.
+    """
+    results = tempfile.SpooledTemporaryFile(max_size=TENANT_BULK_RESULT_SPOOL_BYTES)
+    summary = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "commits": 0, "complete": True}
+    # (row, tenant, error) for rejected rows, (row, tenant, None) for rows in `rows`, in input order
+    pending: List[Tuple[int, Any, Any]] = []
+    rows: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    def write(row: int, tenant: Any, outcome: str, error: str = None) -> None:
+        summary["rows"] += 1
+        summary["failed" if outcome == "error" else outcome] += 1
+        line = {"row": row, "tenant": tenant, "status": outcome}
+        if error is not None:
+            line["error"] = error
+        results.write(orjson.dumps(line) + b"\n")
+
+    async def flush() -> None:
+        outcomes = iter(await run_blocking(apply_tenant_batch, rows) if rows else ())
+        if rows:
+            summary["commits"] += 1
+        for row, tenant, error in pending:
+            if error is not None:
+                write(row, tenant, "error", error)
+            else:
+                outcome, value = next(outcomes)
+                write(row, tenant, outcome, value if outcome == "error" else None)
+        pending.clear()
+        rows.clear()
+
+    try:
+        async for row, record in iter_json_records(chunks, TENANT_BULK_MAX_RECORD_BYTES):
+            tenant = record.get("tenant") if isinstance(record, dict) else None
+            if isinstance(record, RecordError):
+                pending.append((row, None, str(record)))
+                if record.fatal:
+                    summary["complete"] = False
+                    break
+                continue
+            try:
+                parsed = TenantBulkRecord.model_validate(record)
+            except ValidationError as e:
+                pending.append((row, tenant if isinstance(tenant, str) else None, _validation_message(e)))
+                continue
+            rows.append((parsed.op, parsed.tenant, parsed.model_dump(exclude_unset=True, exclude={"op", "tenant"})))
+            pending.append((row, parsed.tenant, None))
+            if len(pending) >= TENANT_BULK_COMMIT_ROWS:
+                await flush()
+    except UnicodeDecodeError:
+        pending.append((summary["rows"] + len(pending) + 1, None, "Request body is not valid UTF-8."))
+        summary["complete"] = False
+    await flush()
+
+    results.write(orjson.dumps({"summary": summary}) + b"\n")
+    results.seek(0)
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            while True:
+                block = results.read(64 * 1024)
+                if not block:
+                    break
+                yield block
+        finally:
+            results.close()
+
+    return summary, body()
+
+def _parse_filters(specs: list, kind: str) -> Dict[str, str]:
+    """`name:value` query values -> {name: value}. Raises HTTPException 400 on a malformed one."""
+    parsed = {}
+    for spec in specs or []:
+        name, sep, value = spec.partition(":")
+        if not name or (kind == "where" and not sep):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid {kind} filter '{spec}', expected 'name:value'."
+            )
+        parsed[name] = value if sep else "true"
+    return parsed
+
+async def list_tenants_controller(
+        features: list = None,
+        where: list = None,
+        fields: str = None,
+        cursor: str = None,
+        limit: int = 50
+) -> dict:
+    """
+    List tenants page by page, filtered by feature flags (`Name` / `Name:false`)
+    and config fields (`field:value`), served from the in-memory indexes.
+    Returns:
+        dict: Page items, the cursor of the next page (or None) and the total number of matches.
+    Raises:
+        HTTPException: 400 for a malformed filter or cursor.
+    """
+    feature_filters = {}
+    for name, value in _parse_filters(features, "feature").items():
+        if value.lower() not in ("true", "false"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid feature filter '{name}:{value}', expected 'true' or 'false'."
+            )
+        feature_filters[name] = value.lower() == "true"
+    after = None
+    if cursor:
+        try:
+            after = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    projection = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+    items, next_after, total = await run_blocking(
+        list_tenants, feature_filters, _parse_filters(where, "where"), after, limit, projection
+    )
+    next_cursor = base64.urlsafe_b64encode(next_after.encode()).decode().rstrip("=") if next_after else None
+    return {"items": items, "next_cursor": next_cursor, "total": total}
+
+async def tenant_changes_controller(since: Optional[int], epoch: Optional[str], limit: int) -> bytes:
+    """
+    Change feed page for mirrors: deltas since version `since`, or a full snapshot.
+    Returns:
+        bytes: JSON-encoded TenantChangesResponse (snapshots can be large, so it is
+        encoded with orjson rather than validated field by field).
+    """
+    changes = await run_blocking(get_tenant_changes, since, epoch, limit)
+    return await run_blocking(orjson.dumps, changes)
@@ -1,26 +1,163 @@
 import os
+import re
 import json
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, auth, firestore
 
 # Load env variables
 load_dotenv()
 
-# Load JSON from FIREBASE_CREDENTIALS env variable
-firebase_creds_raw = os.environ.get("FIREBASE_CREDENTIALS")
-if not firebase_creds_raw:
-    raise RuntimeError("FIREBASE_CREDENTIALS not found in environment variables")
+# ===================
+# LAZY FIREBASE INITIALIZATION
+# ===================
+# Importing this module only reads and sanity-checks FIREBASE_CREDENTIALS.
+# The Firebase SDK, the app (RSA key parsing) and the Firestore client are
+# created on first use, or ahead of the first request by the startup hook in
+# main.py, which also pre-fetches Google's ID token signing certificates.
 
-# Convert to dict and replace escaped newlines in private_key
-cred_dict = json.loads(firebase_creds_raw)
-cred_dict["private_key"] = cred_dict["private_key"].replace("\\n", "\n")
+REQUIRED_CREDENTIAL_FIELDS = ("type", "project_id", "private_key", "client_email")
 
-# Initialize Firebase
-if not firebase_admin._apps:
-    cred = credentials.Certificate(cred_dict)
-    firebase_admin.initialize_app(cred)
+logger = logging.getLogger("MintTenantCore.Firebase")
 
-# Firestore & Auth
-db = firestore.client()
-firebase_auth = auth
+# Seconds spent in each startup phase (exported at /metrics as mint_startup_seconds)
+startup_timings: Dict[str, float] = {}
+
+_init_lock = threading.Lock()
+_app = None
+_db = None
+
+
+def _timed_phase(phase: str, func: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    try:
+        return func()
+    finally:
+        startup_timings[phase] = time.perf_counter() - start
+
+
+def _load_credentials() -> Dict[str, Any]:
+    # Load JSON from FIREBASE_CREDENTIALS env variable
+    firebase_creds_raw = os.environ.get("FIREBASE_CREDENTIALS")
+    if not firebase_creds_raw:
+        raise RuntimeError("FIREBASE_CREDENTIALS not found in environment variables")
+
+    try:
+        cred_dict = json.loads(firebase_creds_raw)
+    except json.JSONDecodeError as e:
+        raise RuntimeError(f"FIREBASE_CREDENTIALS is not valid JSON: {e}")
+
+    missing = [field for field in REQUIRED_CREDENTIAL_FIELDS if not cred_dict.get(field)]
+    if missing:
+        raise RuntimeError(f"FIREBASE_CREDENTIALS is missing field(s): {', '.join(missing)}")
+
+    # Replace escaped newlines in private_key
+    cred_dict["private_key"] = cred_dict["private_key"].replace("\\n", "\n")
+    if "PRIVATE KEY" not in cred_dict["private_key"]:
+        raise RuntimeError("FIREBASE_CREDENTIALS private_key is not a PEM private key")
+    return cred_dict
+
+
+cred_dict = _timed_phase("credentials_parse", _load_credentials)
+
+
+def initialize():
+    """
+    Initialize the Firebase app (idempotent, thread-safe) and return it.
+    Raises if the service account key cannot be loaded.
+    """
+    global _app
+    if _app is not None:
+        return _app
+    with _init_lock:
+        if _app is None:
+            import_start = time.perf_counter()
+            import firebase_admin
+            from firebase_admin import credentials
+            startup_timings["firebase_admin_import"] = time.perf_counter() - import_start
+
+            def init_app():
+                if firebase_admin._apps:
+                    return firebase_admin.get_app()
+                return firebase_admin.initialize_app(credentials.Certificate(cred_dict))
+
+            _app = _timed_phase("initialize_app", init_app)
+    return _app
+
+
+def get_db():
+    """Firestore client, created on first use."""
+    global _db
+    if _db is not None:
+        return _db
+    initialize()
+    with _init_lock:
+        if _db is None:
+            def create_client():
+                from firebase_admin import firestore
+                return firestore.client()
+
+            _db = _timed_phase("firestore_client", create_client)
+    return _db
+
+
+def get_auth():
+    """The `firebase_admin.auth` module, with the app initialized."""
+    initialize()
+    from firebase_admin import auth
+    return auth
+
+
+def refresh_signing_keys(default_max_age: float = 3600.0) -> float:
+    """
+    Fetch the public certificates used to verify ID tokens into the SDK's
+    HTTP cache, bypassing any cached copy, so `verify_id_token` does not have
+    to fetch them inside a request. Returns the certificates' max-age in seconds.
+
+    This reaches into SDK internals (the auth client's token verifier). If an
+    SDK version no longer has them, nothing is prefetched: a warning is logged,
+    `default_max_age` is returned and the SDK fetches the keys on first use.
+    """
+    from firebase_admin import _token_gen
+    auth = get_auth()
+    get_client = getattr(auth, "_get_client", None)
+    verifier = getattr(get_client(initialize()), "_token_verifier", None) if get_client else None
+    request = getattr(verifier, "request", None)
+    cert_uri = getattr(_token_gen, "ID_TOKEN_CERT_URI", None)
+    if request is None or cert_uri is None:
+        logger.warning("Firebase SDK does not expose its token verifier; signing keys are not prefetched")
+        return default_max_age
+
+    def fetch():
+        return request(url=cert_uri, headers={"Cache-Control": "no-cache"})
+
+    # Only the first fetch is a startup phase; periodic refreshes keep its timing
+    if "signing_keys_fetch" in startup_timings:
+        response = fetch()
+    else:
+        response = _timed_phase("signing_keys_fetch", fetch)
+    if response.status != 200:
+        raise RuntimeError(f"Fetching signing keys failed with HTTP {response.status}")
+    match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+    return float(match.group(1)) if match else default_max_age
+
+
+class _LazyProxy:
+    """Module attribute that resolves its target on first attribute access."""
+
+    def __init__(self, resolve: Callable[[], Any]):
+        self._resolve = resolve
+        self._target: Optional[Any] = None
+
+    def __getattr__(self, name: str) -> Any:
+        target = self._target
+        if target is None:
+            target = self._target = self._resolve()
+        return getattr(target, name)
+
+
+# Firestore & Auth (initialized on first use)
+db = _LazyProxy(get_db)
+firebase_auth = _LazyProxy(get_auth)
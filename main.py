@@ -1,20 +1,50 @@
+import asyncio
 import logging
 import os
+import time
+from contextlib import asynccontextmanager
+
+_import_started = time.perf_counter()
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.exceptions import RequestValidationError, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.exceptions import RequestValidationError
 from dotenv import load_dotenv
-from starlette.responses import FileResponse
+from config import (
+    METRICS_ENABLED,
+    ASSET_URL_PREFIX,
+    TENANT_HOST_RESOLUTION,
+    TENANT_HOST_INDEX_MAX_AGE,
+    FIREBASE_PREWARM,
+    SIGNING_KEYS_REFRESH_MARGIN,
+    SIGNING_KEYS_RETRY_SECONDS,
+    LOG_QUEUE_SIZE,
+    LOG_SAMPLE_RATES,
+    LOG_RATE_LIMITS,
+    ADMISSION_CONTROL,
+    ADMISSION_TENANT_RATE,
+    ADMISSION_TENANT_BURST,
+    ADMISSION_UID_RATE,
+    ADMISSION_UID_BURST,
+    ADMISSION_TENANT_CONCURRENCY,
+    ADMISSION_MAX_KEYS,
+)
+from utils.logging_pipeline import RequestContextMiddleware, logging_pipeline, parse_logger_settings
 
 # Load environment variables
 load_dotenv()
 
-# Logging setup
+# Logging setup: records are queued and written by a background thread
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logging_pipeline.configure(
+    LOG_LEVEL,
+    queue_size=LOG_QUEUE_SIZE,
+    sample_rates=parse_logger_settings(LOG_SAMPLE_RATES),
+    rate_limits=parse_logger_settings(LOG_RATE_LIMITS),
+)
 logger = logging.getLogger("MintTenantCoreApp")
+health_logger = logging.getLogger("MintTenantCore.Health")
 
 # App configuration
 API_PREFIX = os.getenv("API_PREFIX", "/api")
@@ -28,26 +58,83 @@ ALLOWED_ORIGINS = [
     ).split(",")
 ]
 
+# Startup / shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    import firebase_client
+    from utils.executor import run_blocking, shutdown_executor
+    from utils.security import keep_signing_keys_fresh
+    from services.asset_service import index_assets
+
+    async def prewarm_firestore():
+        try:
+            await run_blocking(firebase_client.get_db)
+        except Exception as exc:
+            logger.warning("Firestore client prewarm failed: %s", exc)
+
+    started = time.perf_counter()
+    # Parses the service account key: a bad key fails the deploy rather than the first login
+    await run_blocking(firebase_client.initialize)
+    # Hash and load logos now so config responses carry content-hashed logo URLs from the first request
+    asset_started = time.perf_counter()
+    await run_blocking(index_assets)
+    firebase_client.startup_timings["asset_index"] = time.perf_counter() - asset_started
+    background = []
+    if FIREBASE_PREWARM:
+        background.append(asyncio.create_task(prewarm_firestore()))
+        background.append(asyncio.create_task(
+            keep_signing_keys_fresh(SIGNING_KEYS_REFRESH_MARGIN, SIGNING_KEYS_RETRY_SECONDS)
+        ))
+    firebase_client.startup_timings["lifespan_startup"] = time.perf_counter() - started
+    logger.info("Startup timings (s): %s", ", ".join(
+        f"{phase}={seconds:.3f}" for phase, seconds in firebase_client.startup_timings.items()
+    ))
+    yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    # Don't block shutdown on in-flight blocking calls; idle worker threads exit now
+    shutdown_executor(wait=False)
+
 # Create FastAPI app
 app = FastAPI(
     title="MintTenantCore Backend",
     description="Multi-Tenant Role-Based Access Control system using FastAPI",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
-# Serve static logos
-LOGO_DIR = os.path.join(os.getcwd(), "assets")
-
-@app.get("/static/logos/{filename}", tags=["static"])
-async def get_logo(filename: str):
-    file_path = os.path.join(LOGO_DIR, filename)
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Logo not found")
-    response = FileResponse(file_path, media_type="image/png")
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    return response
+# Tenant from the Host header, resolved once per request into request.state
+# (added first so it runs inside admission control: rejected requests never reach storage)
+from utils.domain import TenantResolutionMiddleware, cached_host_tenant
+
+if TENANT_HOST_RESOLUTION:
+    app.add_middleware(TenantResolutionMiddleware, max_age=TENANT_HOST_INDEX_MAX_AGE)
+
+# Per-tenant/per-user admission control: sheds load before authentication and storage work,
+# inside CORS so browsers can read the 429/503 responses
+from utils.admission import AdmissionController, AdmissionMiddleware
+from utils.security import token_cache
+
+admission = AdmissionController(
+    tenant_rate=ADMISSION_TENANT_RATE,
+    tenant_burst=ADMISSION_TENANT_BURST,
+    uid_rate=ADMISSION_UID_RATE,
+    uid_burst=ADMISSION_UID_BURST,
+    tenant_concurrency=ADMISSION_TENANT_CONCURRENCY,
+    max_keys=ADMISSION_MAX_KEYS,
+)
+if ADMISSION_CONTROL:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        api_prefix=API_PREFIX,
+        reserved=("auth", "flags", "tenants"),
+        lookup_uid=lambda id_token: (token_cache.peek(id_token) or {}).get("uid"),
+        lookup_host=cached_host_tenant if TENANT_HOST_RESOLUTION else None,
+    )
 
 # Add CORS middleware
 app.add_middleware(
@@ -58,40 +145,92 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# tenant/uid/route context for log records
+app.add_middleware(RequestContextMiddleware)
+
+# Request latency histograms (outermost, so CORS and error handling are included)
+from utils.metrics import metrics, MetricsMiddleware
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
 # Register API routers
 from routers.auth_router import router as auth_router
 from routers.tenant_router import router as tenant_router
+from routers.tenants_router import router as tenants_router
+from routers.feature_router import router as feature_router
+from routers.asset_router import router as asset_router
 
 def register_routers(app: FastAPI):
+    # Tenant logos (plain and content-hashed URLs)
+    app.include_router(asset_router, prefix=ASSET_URL_PREFIX.rstrip("/"), tags=["static"])
+
     # Auth is global
     app.include_router(auth_router, prefix=f"{API_PREFIX}/auth", tags=["auth"])
 
+    # Cross-tenant feature flag evaluation
+    app.include_router(feature_router, prefix=f"{API_PREFIX}/flags", tags=["flags"])
+
+    # Cross-tenant administration (bulk provisioning)
+    app.include_router(tenants_router, prefix=f"{API_PREFIX}/tenants", tags=["tenants"])
+
     # All tenant-aware endpoints must go under `/api/{tenant}`
     app.include_router(tenant_router, prefix=f"{API_PREFIX}" + "/{tenant}", tags=["tenant"])
 
 register_routers(app)
 
+# Cache and stream counters, read at scrape time
+from utils.security import get_token_cache_stats
+from services.auth_service import user_cache
+from services.tenant_service import get_cache_stats, tenant_events
+from services.asset_service import get_asset_stats
+from services.config_response import get_rendered_config_stats
+from utils.single_flight import get_single_flight_stats
+from services.feature_rollout import get_feature_rules_stats
+
+metrics.register_gauges("token_cache", "Verified ID token cache counters.", "stat", get_token_cache_stats)
+metrics.register_gauges("user_cache", "Firestore user metadata cache counters.", "stat", user_cache.stats)
+metrics.register_gauges("tenant_store", "Tenant storage/cache counters.", "stat", get_cache_stats)
+metrics.register_gauges("tenant_events", "Tenant change stream counters.", "stat", tenant_events.stats)
+metrics.register_gauges("assets", "Indexed static assets.", "stat", get_asset_stats)
+metrics.register_gauges("config_responses", "Pre-serialized tenant config response cache.", "stat", get_rendered_config_stats)
+metrics.register_gauges("feature_rules", "Compiled feature rollout rule cache.", "stat", get_feature_rules_stats)
+metrics.register_gauges("admission", "Requests admitted and shed by admission control.", "stat", admission.stats)
+metrics.register_gauges("single_flight", "Backend calls made and calls coalesced into one already in flight.", "call", get_single_flight_stats)
+metrics.register_gauges("logging", "Log records queued, dropped (queue full), sampled out and rate limited.", "stat", logging_pipeline.stats)
+
+from firebase_client import startup_timings
+
+startup_timings["app_import"] = time.perf_counter() - _import_started
+metrics.register_gauges("startup_seconds", "Duration of each startup phase.", "phase", lambda: startup_timings)
+
 # Custom exception handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception: {exc} | Path: {request.url}")
+    logger.error("Unhandled exception: %s | Path: %s", exc, request.url)
     return JSONResponse(status_code=500, content={"detail": "Internal server error. Please contact support."})
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.warning(f"Validation error: {exc} | Path: {request.url}")
+    logger.warning("Validation error: %s | Path: %s", exc, request.url)
     return JSONResponse(status_code=422, content={"detail": exc.errors(), "body": exc.body})
 
 # Health check
 @app.get("/ping", tags=["health"])
 async def ping():
-    logger.info("Health check called")
+    health_logger.info("Health check called")
     return {"message": "pong"}
 
+# Prometheus scrape endpoint
+if METRICS_ENABLED:
+    @app.get("/metrics", tags=["health"], include_in_schema=False)
+    async def get_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Uvicorn entry point
 if __name__ == "__main__":
     try:
-        logger.info(f"Starting MintTenantCore on {HOST}:{PORT} with log level {LOG_LEVEL}")
+        logger.info("Starting MintTenantCore on %s:%s with log level %s", HOST, PORT, LOG_LEVEL)
         import uvicorn
         uvicorn.run("main:app", host=HOST, port=PORT, reload=True)
     except Exception as exc:
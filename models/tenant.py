@@ -1,10 +1,23 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
+from config import FEATURE_EVAL_MAX_ITEMS
 
 # ===================
 # TENANT DATA MODELS
 # ===================
 
+class FeatureRule(BaseModel):
+    """
+    Gradual rollout of a feature flag: on for the listed uids, for the listed roles,
+    and for `percentage` % of other users (stable per user).
+    """
+    percentage: float = Field(0, ge=0, le=100, example=25, description="Share of users (0-100) the flag is on for")
+    roles: List[str] = Field(default_factory=list, example=["Admin"], description="Roles the flag is always on for")
+    uids: List[str] = Field(default_factory=list, example=["uid123"], description="Users the flag is always on for")
+
+# A feature flag: on/off for the whole tenant, or a rollout rule
+FeatureFlag = Union[bool, FeatureRule]
+
 class TenantConfig(BaseModel):
     """
     Schema for a tenant's full configuration.
@@ -15,7 +28,8 @@ class TenantConfig(BaseModel):
     secondaryColor: str = Field(..., example="#a21caf", description="Secondary theme color for tenant UI")
     brandName: str = Field(..., example="Mint core", description="Brand Name for the tenant")
     layout: str = Field(..., example="side", description="Layout type: 'side' or 'top'")
-    features: Dict[str, bool] = Field(default_factory=dict, description="Feature flags for this tenant (feature_name: enabled)")
+    features: Dict[str, FeatureFlag] = Field(default_factory=dict, description="Feature flags for this tenant (feature_name: enabled or rollout rule)")
+    domains: List[str] = Field(default_factory=list, description="Custom domains that resolve to this tenant")
 
 class TenantCreateRequest(BaseModel):
     """
@@ -28,24 +42,105 @@ class TenantCreateRequest(BaseModel):
     brandName: Optional[str] = Field(None, example="Mint core", description="Brand Name for the tenant (optional)")
     logo: Optional[str] = Field(None, example="https://placehold.co/100x50?text=Tenant", description="Logo URL (optional)")
     layout: Optional[str] = Field(None, example="side", description="Navigation layout type (optional)")
-    features: Optional[Dict[str, bool]] = Field(None, example={
+    features: Optional[Dict[str, FeatureFlag]] = Field(None, example={
         "feature1": True,
         "feature2": False
     }, description="Initial feature flags (optional)")
+    domains: Optional[List[str]] = Field(None, example=["portal.acme.com"], description="Custom domains served as this tenant (optional)")
+
+class TenantListResponse(BaseModel):
+    """
+    One page of a tenant listing.
+    """
+    items: List[Dict[str, Any]] = Field(..., example=[{"tenant": "tenant1", "brandName": "Mint core", "layout": "top"}],
+                                        description="Matching tenants: `tenant` key plus the requested config fields")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
+    total: int = Field(..., example=120, description="Number of tenants matching the filters")
+
+class TenantChangeRecord(BaseModel):
+    """
+    One committed change. `created` carries the full config; `config` and `features`
+    carry only the fields / flags that were set (merge them into the mirrored config).
+    """
+    version: int = Field(..., example=42)
+    tenant: str = Field(..., example="tenant1")
+    type: Literal["created", "config", "features"] = Field(..., example="features")
+    changes: Dict[str, Any] = Field(..., example={"TimeSheet": False})
+
+class TenantChangesResponse(BaseModel):
+    """
+    Changes since the requested version, or a full snapshot when that version is unknown.
+    """
+    epoch: str = Field(..., description="Identifies the serving process; pass back as `epoch` with `since`")
+    version: int = Field(..., example=42, description="Pass as `since` to get the next changes")
+    snapshot: bool = Field(..., description="True if `tenants` holds every tenant and `changes` is empty")
+    changes: List[TenantChangeRecord] = Field(..., description="Changes after `since`, oldest first")
+    more: bool = Field(..., description="More changes are waiting: ask again with the new `version`")
+    tenants: Optional[Dict[str, Dict[str, Any]]] = Field(None, description="Every tenant's config (snapshots only)")
+
+class TenantBulkRecord(TenantCreateRequest):
+    """
+    One record of a bulk import (NDJSON line or JSON array element).
+    `create` fills fields not provided with backend defaults; `update` changes only the fields provided.
+    """
+    op: Literal["create", "update"] = Field("create", example="create", description="Create a new tenant or update an existing one")
+
+class TenantBulkResult(BaseModel):
+    """
+    Outcome of one bulk import record.
+    """
+    row: int = Field(..., example=1, description="1-based record number in the request body")
+    tenant: Optional[str] = Field(None, example="tenant4", description="Tenant key, if the record had one")
+    status: Literal["created", "updated", "error"] = Field(..., example="created")
+    error: Optional[str] = Field(None, example="Tenant already exists.", description="Why the record was rejected")
 
 class FeatureUpdateRequest(BaseModel):
     """
     Request model for updating feature flags for a tenant.
     Allows flexible updates to any number of features by name.
     """
-    features: Dict[str, bool] = Field(..., example={
+    features: Dict[str, FeatureFlag] = Field(..., example={
         "feature1": False,
-        "featureX": True
-    }, description="Features to update (feature_name: enabled/disabled)")
+        "featureX": True,
+        "featureY": {"percentage": 10, "roles": ["Admin"]}
+    }, description="Features to update (feature_name: enabled/disabled or rollout rule)")
 
 class FeatureUpdateResponse(BaseModel):
     message: str
-    features: Dict[str, bool]
+    features: Dict[str, FeatureFlag]
+
+
+class FeatureCheck(BaseModel):
+    """
+    A single (tenant, feature) pair to evaluate.
+    """
+    tenant: str = Field(..., example="tenant1", description="Tenant key")
+    feature: str = Field(..., example="Accounting", description="Feature flag name")
+
+class FeatureCheckResult(FeatureCheck):
+    enabled: Optional[bool] = Field(..., description="Flag state, or null if the tenant does not exist")
+
+class FeatureEvaluationRequest(BaseModel):
+    """
+    Bulk feature flag evaluation across tenants.
+    Use `checks` for individual pairs and/or `tenants` x `features` for a matrix.
+    """
+    checks: List[FeatureCheck] = Field(default_factory=list, max_length=FEATURE_EVAL_MAX_ITEMS,
+                                       description="Individual (tenant, feature) pairs")
+    tenants: List[str] = Field(default_factory=list, max_length=FEATURE_EVAL_MAX_ITEMS, example=["tenant1", "tenant2"],
+                               description="Tenants to evaluate `features` for")
+    features: List[str] = Field(default_factory=list, max_length=FEATURE_EVAL_MAX_ITEMS, example=["Accounting"],
+                                description="Features to evaluate for every tenant in `tenants`")
+
+class FeatureEvaluationResponse(BaseModel):
+    results: List[FeatureCheckResult] = Field(default_factory=list, description="One result per requested check")
+    matrix: Dict[str, Optional[Dict[str, bool]]] = Field(default_factory=dict,
+                                                        description="tenant -> {feature: enabled}; null for unknown tenants")
+
+class FeatureTenantsResponse(BaseModel):
+    feature: str = Field(..., example="Accounting")
+    enabled: bool = Field(..., example=True)
+    tenants: List[str] = Field(..., example=["tenant1", "tenant2"])
 
 
 class TenantConfigResponse(BaseModel):
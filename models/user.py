@@ -1,5 +1,6 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
+from config import USER_BULK_MAX_ITEMS
 
 # ====================
 # USER PROFILE MODELS
@@ -23,6 +24,21 @@ class UserProfileUpdateRequest(BaseModel):
     role: str = Field(..., example="Employee")
     tenant: str = Field(..., example="tenant2")
 
+class UserBulkUpdateRequest(BaseModel):
+    """
+    Request schema for assigning roles/tenants to many users at once.
+    """
+    users: List[UserProfileUpdateRequest] = Field(..., max_length=USER_BULK_MAX_ITEMS,
+                                                  description="One assignment per user; a repeated uid gets its last assignment")
+
+class UserBulkUpdateResponse(BaseModel):
+    """
+    Outcome of a bulk assignment: counts plus the error for every uid that was not updated.
+    """
+    updated: int = Field(..., example=998)
+    failed: Dict[str, str] = Field(default_factory=dict, example={"uid-17": "Write rejected"},
+                                   description="uid -> error message")
+
 class SuccessResponse(BaseModel):
     """
     Generic success response model.
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Path, Request
+from fastapi.responses import FileResponse, Response
+from controllers.asset_controller import get_asset_controller
+from utils.http_cache import etag_matches, not_modified
+from config import ASSET_CACHE_CONTROL, ASSET_IMMUTABLE_CACHE_CONTROL
+
+router = APIRouter()
+
+@router.get(
+    "/{filename}",
+    summary="Serve a tenant logo",
+    response_class=Response,
+    responses={200: {"content": {"image/*": {}}}, 304: {"description": "Not modified"}, 404: {"description": "Logo not found"}},
+)
+async def get_logo(request: Request, filename: str = Path(..., description="Plain or content-hashed file name")):
+    """
+    Content-hashed names (as returned in tenant configs) are cacheable forever;
+    plain names are cached briefly and revalidated with ETag / If-None-Match.
+    """
+    asset, immutable = await get_asset_controller(filename)
+    cache_control = ASSET_IMMUTABLE_CACHE_CONTROL if immutable else ASSET_CACHE_CONTROL
+
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        response = not_modified(asset.etag, cache_control)
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        return response
+
+    headers = {
+        "ETag": asset.etag,
+        "Cache-Control": cache_control,
+        "Access-Control-Allow-Origin": "*",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if asset.data is not None:
+        return Response(asset.data, media_type=asset.content_type, headers=headers)
+    return FileResponse(asset.path, media_type=asset.content_type, headers=headers)
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, status
-from utils.security import get_current_user
+from utils.security import authorize, get_current_user
 from fastapi.responses import JSONResponse
+from models.user import UserBulkUpdateRequest, UserBulkUpdateResponse
+from controllers.auth_controller import bulk_update_user_profiles
 
 router = APIRouter()
 
@@ -27,3 +29,20 @@ async def get_profile(current_user: dict = Depends(get_current_user)) -> JSONRes
             "tenant": current_user.get("tenant"),
         }
     )
+
+@router.put(
+    "/users",
+    response_model=UserBulkUpdateResponse,
+    summary="Assign roles/tenants to many users (Admin only)",
+    tags=["auth"],
+    response_description="Number of users updated and the error for each uid that failed.",
+)
+async def bulk_update_users(
+        body: UserBulkUpdateRequest,
+        current_user: dict = Depends(authorize("users.assign"))
+):
+    """
+    Writes `users/{uid}` documents with Firestore batched writes (up to 500 per batch,
+    a few batches in parallel). Cached metadata of every listed user is refreshed.
+    """
+    return await bulk_update_user_profiles([(user.uid, user.role, user.tenant) for user in body.users])
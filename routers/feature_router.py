@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Path, Query
+from models.tenant import FeatureEvaluationRequest, FeatureEvaluationResponse, FeatureTenantsResponse
+from utils.security import authorize
+from controllers.feature_controller import evaluate_features_controller, tenants_with_feature_controller
+
+router = APIRouter()
+
+@router.post(
+    "/evaluate",
+    response_model=FeatureEvaluationResponse,
+    summary="Evaluate feature flags for many tenants at once (Admin only)",
+)
+async def evaluate_features_endpoint(
+        body: FeatureEvaluationRequest,
+        current_user: dict = Depends(authorize("flags.evaluate"))
+):
+    return await evaluate_features_controller(body.checks, body.tenants, body.features)
+
+@router.get(
+    "/{feature}/tenants",
+    response_model=FeatureTenantsResponse,
+    summary="List tenants that have a feature enabled (or disabled) (Admin only)",
+)
+async def tenants_with_feature_endpoint(
+        feature: str = Path(..., description="Feature flag name"),
+        enabled: bool = Query(True, description="List tenants with the flag enabled (true) or not enabled (false)"),
+        current_user: dict = Depends(authorize("flags.tenants"))
+):
+    return await tenants_with_feature_controller(feature, enabled)
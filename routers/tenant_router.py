@@ -1,16 +1,23 @@
-from typing import Dict
-from fastapi import APIRouter, Depends, Path, Request
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from models.tenant import (
     TenantCreateRequest, TenantConfig, FeatureUpdateRequest,
-    TenantConfigResponse, ErrorResponse
+    TenantConfigResponse, ErrorResponse, FeatureFlag
 )
-from utils.security import require_role, get_current_user
+from utils.security import authorize
+from utils.http_cache import etag_matches, not_modified
+from services.asset_service import with_asset_version
+from config import TENANT_CONFIG_CACHE_CONTROL, TENANT_FEATURES_CACHE_CONTROL
 from controllers.tenant_controller import (
     create_tenant_controller,
-    get_config_controller,
     update_config_controller,
-    get_features_controller,
-    update_features_controller
+    update_features_controller,
+    get_etag_controller,
+    get_rendered_config_controller,
+    get_versioned_features_controller,
+    get_user_features_controller,
+    open_event_stream_controller
 )
 
 router = APIRouter()
@@ -26,7 +33,7 @@ router = APIRouter()
 )
 async def create_tenant_endpoint(
         body: TenantCreateRequest,
-        current_user: dict = Depends(require_role(["Admin", "HR"]))
+        current_user: dict = Depends(authorize("tenant.create"))
 ):
     return await create_tenant_controller(
         body.tenant,
@@ -35,7 +42,8 @@ async def create_tenant_endpoint(
         body.logo,
         body.brandName,
         body.layout,
-        body.features
+        body.model_dump()["features"],
+        body.domains
     )
 
 @router.get(
@@ -48,12 +56,15 @@ async def get_config_endpoint(
         request: Request,
         tenant: str = Path(..., description="Tenant from URL path")
 ):
-    config = await get_config_controller(tenant)
-
-    if config.get("logo") and not config["logo"].startswith("http"):
-        config["logo"] = str(request.base_url).rstrip("/") + config["logo"]
-
-    return config
+    # Pre-serialized body (logo URL rewritten, validated against TenantConfig once per change)
+    etag, body = await get_rendered_config_controller(tenant, str(request.base_url))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, TENANT_CONFIG_CACHE_CONTROL)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": TENANT_CONFIG_CACHE_CONTROL},
+    )
 
 @router.put(
     "/config",
@@ -63,22 +74,52 @@ async def get_config_endpoint(
 )
 async def update_config_endpoint(
         updates: TenantCreateRequest,
+        response: Response,
         tenant: str = Path(..., description="Tenant from URL path"),
-        current_user: dict = Depends(require_role(["Admin", "HR"]))
+        current_user: dict = Depends(authorize("tenant.update_config"))
 ):
-    return await update_config_controller(tenant, updates.dict(exclude_unset=True))
+    updated = await update_config_controller(tenant, updates.dict(exclude_unset=True))
+    # New content means a new ETag, so clients holding the old one get a fresh copy
+    response.headers["ETag"] = with_asset_version(await get_etag_controller(tenant, "config"))
+    return updated
 
 @router.get(
     "/features",
-    response_model=Dict[str, bool],
+    response_model=Dict[str, FeatureFlag],
     responses={404: {"model": ErrorResponse}},
     summary="Get feature flags for current tenant",
 )
 async def get_features_endpoint(
+        request: Request,
+        response: Response,
         tenant: str = Path(...),
-        current_user: dict = Depends(get_current_user)
+        current_user: dict = Depends(authorize("tenant.read_features"))
 ):
-    return await get_features_controller(tenant)
+    etag = await get_etag_controller(tenant, "features")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, TENANT_FEATURES_CACHE_CONTROL)
+
+    features, etag = await get_versioned_features_controller(tenant)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = TENANT_FEATURES_CACHE_CONTROL
+    return features
+
+@router.get(
+    "/features/evaluated",
+    response_model=Dict[str, bool],
+    responses={403: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+    summary="Get feature flags as they apply to the calling user",
+)
+async def get_user_features_endpoint(
+        tenant: str = Path(...),
+        current_user: dict = Depends(authorize("tenant.read_features"))
+):
+    """
+    Every flag of the tenant resolved to on/off for the calling user: plain flags as
+    stored, rollout rules by uid, role and the user's stable rollout bucket.
+    Rules are compiled once per config change, not per request.
+    """
+    return await get_user_features_controller(tenant, current_user["uid"], current_user["role"])
 
 @router.put(
     "/features",
@@ -87,7 +128,36 @@ async def get_features_endpoint(
 )
 async def update_features_endpoint(
         body: FeatureUpdateRequest,
+        response: Response,
+        tenant: str = Path(...),
+        current_user: dict = Depends(authorize("tenant.update_features"))
+):
+    updated = await update_features_controller(tenant, body.model_dump()["features"])
+    response.headers["ETag"] = await get_etag_controller(tenant, "features")
+    return updated
+
+@router.get(
+    "/events",
+    responses={404: {"model": ErrorResponse}},
+    summary="Stream config and feature changes (Server-Sent Events)",
+    response_description="text/event-stream of `created`, `config`, `features` and `resync` events",
+)
+async def tenant_events_endpoint(
+        request: Request,
         tenant: str = Path(...),
-        current_user: dict = Depends(require_role(["HR", "Admin"]))
+        last_event_id: Optional[str] = Query(None, description="Resume after this event id (alternative to the Last-Event-ID header)"),
+        current_user: dict = Depends(authorize("tenant.events"))
 ):
-    return await update_features_controller(tenant, body.features)
+    """
+    Pushes each committed change to the tenant's config or features as an SSE event.
+    On reconnect, pass the last received event id (the `Last-Event-ID` header browsers
+    send automatically, or `?last_event_id=`) to receive the missed events.
+    A `resync` event means events were lost (client too slow, or history expired):
+    refetch `/config` and `/features`, then keep listening.
+    """
+    events = await open_event_stream_controller(tenant, request.headers.get("last-event-id") or last_event_id)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,92 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from models.tenant import ErrorResponse, TenantBulkRecord, TenantChangesResponse, TenantListResponse
+from utils.security import authorize
+from config import (
+    TENANT_LIST_DEFAULT_LIMIT,
+    TENANT_LIST_MAX_LIMIT,
+    TENANT_CHANGES_DEFAULT_LIMIT,
+    TENANT_CHANGES_MAX_LIMIT,
+)
+from controllers.tenant_controller import bulk_tenants_controller, list_tenants_controller, tenant_changes_controller
+
+router = APIRouter()
+
+@router.get(
+    "",
+    response_model=TenantListResponse,
+    responses={400: {"model": ErrorResponse}, 403: {"model": ErrorResponse}},
+    summary="List tenants with filters and cursor pagination (Admin only)",
+)
+async def list_tenants_endpoint(
+        feature: Optional[List[str]] = Query(None, description="Feature flag filter, repeatable: `TimeSheet` (enabled) or `TimeSheet:false`"),
+        where: Optional[List[str]] = Query(None, description="Config field filter, repeatable: `layout:top`, `brandName:Acme`"),
+        fields: Optional[str] = Query(None, description="Comma-separated config fields to return (default: all)", example="brandName,layout"),
+        cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+        limit: int = Query(TENANT_LIST_DEFAULT_LIMIT, ge=1, le=TENANT_LIST_MAX_LIMIT),
+        current_user: dict = Depends(authorize("tenants.list"))
+):
+    """
+    Filters are answered from the in-memory feature/config index, so a page costs
+    a few integer operations plus one config lookup per returned tenant.
+    All filters must match. Non-string config values are matched by their JSON
+    form (`where=enabled:true`).
+    """
+    return await list_tenants_controller(feature, where, fields, cursor, limit)
+
+@router.get(
+    "/changes",
+    response_model=TenantChangesResponse,
+    responses={403: {"model": ErrorResponse}},
+    summary="Tenant changes since a version, for mirrors (Admin only)",
+)
+async def tenant_changes_endpoint(
+        since: Optional[int] = Query(None, ge=0, description="`version` of the previous response; omit for a full snapshot"),
+        epoch: Optional[str] = Query(None, description="`epoch` of the previous response"),
+        limit: int = Query(TENANT_CHANGES_DEFAULT_LIMIT, ge=1, le=TENANT_CHANGES_MAX_LIMIT),
+        current_user: dict = Depends(authorize("tenants.changes"))
+):
+    """
+    Start with a snapshot (no `since`), then poll with the returned `version` and `epoch`
+    to receive only the changes made since, oldest first. When the version is older
+    than the retained change log (TENANT_EVENT_HISTORY), or the server restarted,
+    a fresh snapshot is returned instead. Changes are those committed by the serving
+    worker process; if the store was changed by another worker in the meantime the
+    epoch changes and a snapshot is returned.
+    """
+    body = await tenant_changes_controller(since, epoch, limit)
+    return Response(content=body, media_type="application/json")
+
+@router.post(
+    "/bulk",
+    responses={403: {"model": ErrorResponse}},
+    summary="Create or update many tenants at once (Admin only)",
+    response_description="application/x-ndjson: one TenantBulkResult per record, then a `summary` line",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "application/json": {"schema": {"type": "array", "items": TenantBulkRecord.model_json_schema()}},
+            },
+        }
+    },
+)
+async def bulk_tenants_endpoint(
+        request: Request,
+        current_user: dict = Depends(authorize("tenants.bulk"))
+):
+    """
+    Accepts NDJSON (one TenantBulkRecord per line) or a JSON array of TenantBulkRecord.
+    The body is parsed and validated as it arrives; valid rows are applied in one
+    storage commit per TENANT_BULK_COMMIT_ROWS rows. Invalid or conflicting rows
+    (tenant exists, not found, domain taken) are reported and skipped.
+    """
+    summary, results = await bulk_tenants_controller(request.stream())
+    return StreamingResponse(
+        results,
+        media_type="application/x-ndjson",
+        headers={"X-Bulk-Created": str(summary["created"]), "X-Bulk-Updated": str(summary["updated"]),
+                 "X-Bulk-Failed": str(summary["failed"])},
+    )
@@ -0,0 +1,41 @@
+from typing import Dict, Optional, Tuple
+from config import ASSETS_DIR, ASSET_URL_PREFIX, ASSET_INLINE_MAX_BYTES, ASSET_CHECK_INTERVAL
+from services.asset_store import Asset, AssetStore
+
+# Tenant logos under assets/, indexed at startup (see main.lifespan)
+asset_store = AssetStore(ASSETS_DIR, inline_max_bytes=ASSET_INLINE_MAX_BYTES, check_interval=ASSET_CHECK_INTERVAL)
+
+
+def index_assets() -> int:
+    """Index (or re-index) the assets directory. Returns the number of assets."""
+    return asset_store.scan()
+
+
+def resolve_asset(filename: str) -> Tuple[Optional[Asset], bool]:
+    """
+    Asset for a plain (`logo2.png`) or content-hashed (`logo2.<hash>.png`) file name.
+    Returns (asset or None, whether the URL is immutable). May touch the disk.
+    """
+    return asset_store.resolve(filename)
+
+
+def resolve_asset_cached(filename: str) -> Optional[Tuple[Asset, bool]]:
+    """In-memory only variant of resolve_asset; None if a disk lookup is needed."""
+    return asset_store.resolve_cached(filename)
+
+
+def asset_url(url: str) -> str:
+    """Content-hashed form of a `/static/logos/<name>` URL; other URLs are returned unchanged."""
+    return asset_store.hashed_url(url, ASSET_URL_PREFIX)
+
+
+def with_asset_version(etag: str) -> str:
+    """
+    Extend a tenant config ETag with the asset index fingerprint: the served
+    config embeds hashed logo URLs, which change when a logo file does.
+    """
+    return etag[:-1] + "." + asset_store.fingerprint() + '"'
+
+
+def get_asset_stats() -> Dict[str, int]:
+    return asset_store.stats()
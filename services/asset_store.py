@@ -0,0 +1,223 @@
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# ===================
+# STATIC ASSET INDEX
+# ===================
+#
+# Files in the assets directory are indexed once (content hash, size, content
+# type), small ones are kept in memory. Each asset is also reachable under a
+# content-hashed name (`logo2.1a2b3c4d5e6f.png`) that never changes meaning,
+# so browsers may cache it forever. Index entries are re-validated with a
+# single stat() at most every `check_interval` seconds.
+
+HASH_LENGTH = 12
+_HASHED_NAME = re.compile(rf"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{{{HASH_LENGTH}}})(?P<ext>\.[^.]+)?$")
+
+# Checked when the extension alone doesn't tell (mimetypes returns None)
+_MAGIC_TYPES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\x00\x00\x01\x00", "image/x-icon"),
+)
+
+
+def guess_content_type(name: str, head: bytes) -> str:
+    content_type, _ = mimetypes.guess_type(name)
+    if content_type:
+        return content_type
+    for magic, magic_type in _MAGIC_TYPES:
+        if head.startswith(magic):
+            return magic_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if b"<svg" in head[:512]:
+        return "image/svg+xml"
+    return "application/octet-stream"
+
+
+class Asset:
+    __slots__ = ("name", "path", "size", "signature", "digest", "etag", "content_type", "data", "checked")
+
+    def __init__(self, name: str, path: str, size: int, signature: Tuple[int, int],
+                 digest: str, content_type: str, data: Optional[bytes]):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.signature = signature
+        self.digest = digest
+        self.etag = f'"{digest[:20]}"'
+        self.content_type = content_type
+        # File contents if small enough to serve from memory, else None
+        self.data = data
+        self.checked = time.monotonic()
+
+    @property
+    def hashed_name(self) -> str:
+        stem, ext = os.path.splitext(self.name)
+        return f"{stem}.{self.digest[:HASH_LENGTH]}{ext}"
+
+
+class AssetStore:
+    def __init__(self, directory: str, inline_max_bytes: int = 256 * 1024, check_interval: float = 5.0):
+        self.directory = directory
+        self.inline_max_bytes = inline_max_bytes
+        self.check_interval = check_interval
+        self._assets: Dict[str, Asset] = {}
+        self._lock = threading.Lock()
+        self._scanned = False
+        self._fingerprint: Optional[str] = None
+
+    # -------------------
+    # Indexing
+    # -------------------
+
+    def scan(self) -> int:
+        """(Re)index every file in the directory. Returns the number of assets."""
+        try:
+            names = [name for name in os.listdir(self.directory) if self._valid_name(name)]
+        except FileNotFoundError:
+            names = []
+        assets = {}
+        for name in names:
+            asset = self._load(name, self._assets.get(name))
+            if asset is not None:
+                assets[name] = asset
+        with self._lock:
+            self._assets = assets
+            self._fingerprint = None
+            self._scanned = True
+        return len(assets)
+
+    @staticmethod
+    def _valid_name(name: str) -> bool:
+        return bool(name) and not name.startswith(".") and os.path.basename(name) == name
+
+    def _load(self, name: str, previous: Optional[Asset]) -> Optional[Asset]:
+        path = os.path.join(self.directory, name)
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not os.path.isfile(path):
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        if previous is not None and previous.signature == signature:
+            previous.checked = time.monotonic()
+            return previous
+
+        sha = hashlib.sha256()
+        head = b""
+        chunks = []
+        keep = st.st_size <= self.inline_max_bytes
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                if not head:
+                    head = chunk[:512]
+                sha.update(chunk)
+                if keep:
+                    chunks.append(chunk)
+        data = b"".join(chunks) if keep else None
+        size = len(data) if data is not None else st.st_size
+        return Asset(name, path, size, signature, sha.hexdigest(), guess_content_type(name, head), data)
+
+    # -------------------
+    # Lookups
+    # -------------------
+
+    def peek(self, name: str) -> Optional[Asset]:
+        """Indexed asset if it was validated recently enough to serve without I/O, else None."""
+        asset = self._assets.get(name)
+        if asset is not None and time.monotonic() - asset.checked < self.check_interval:
+            return asset
+        return None
+
+    def get(self, name: str) -> Optional[Asset]:
+        """Asset by plain file name, re-validating the index entry if it is due (may do I/O)."""
+        if not self._scanned:
+            self.scan()
+        asset = self.peek(name)
+        if asset is not None:
+            return asset
+        if not self._valid_name(name):
+            return None
+        previous = self._assets.get(name)
+        asset = self._load(name, previous)
+        if asset is not previous:
+            with self._lock:
+                if asset is None:
+                    self._assets.pop(name, None)
+                else:
+                    self._assets[name] = asset
+                self._fingerprint = None
+        return asset
+
+    def resolve(self, filename: str) -> Tuple[Optional[Asset], bool]:
+        """
+        Look up a plain or content-hashed file name.
+        Returns (asset, immutable); `immutable` is True only for a hashed name
+        whose hash matches the current content.
+        """
+        asset = self.peek(filename)
+        if asset is not None:
+            return asset, False
+        match = _HASHED_NAME.match(filename)
+        if match is not None:
+            name = match.group("stem") + (match.group("ext") or "")
+            asset = self.peek(name) or self.get(name)
+            if asset is not None:
+                # An outdated hash still gets the current file, just not as a forever-cacheable response
+                return asset, asset.digest.startswith(match.group("digest"))
+        return self.get(filename), False
+
+    def resolve_cached(self, filename: str) -> Optional[Tuple[Asset, bool]]:
+        """Like `resolve`, but only answers from the in-memory index; None means a lookup with I/O is needed."""
+        asset = self.peek(filename)
+        if asset is not None:
+            return asset, False
+        match = _HASHED_NAME.match(filename)
+        if match is not None:
+            asset = self.peek(match.group("stem") + (match.group("ext") or ""))
+            if asset is not None:
+                return asset, asset.digest.startswith(match.group("digest"))
+        return None
+
+    def hashed_url(self, url: str, prefix: str) -> str:
+        """
+        Rewrite `<prefix><name>` to its content-hashed form if `name` is an
+        indexed asset; other URLs are returned unchanged. No I/O once the
+        directory has been indexed.
+        """
+        if not url.startswith(prefix):
+            return url
+        if not self._scanned:
+            self.scan()
+        asset = self._assets.get(url[len(prefix):])
+        return prefix + asset.hashed_name if asset is not None else url
+
+    def fingerprint(self) -> str:
+        """Short digest of all indexed asset hashes; changes whenever any asset does."""
+        fingerprint = self._fingerprint
+        if fingerprint is None:
+            with self._lock:
+                joined = "\n".join(f"{name}:{asset.digest}" for name, asset in sorted(self._assets.items()))
+                fingerprint = self._fingerprint = hashlib.sha1(joined.encode()).hexdigest()[:8]
+        return fingerprint
+
+    def stats(self) -> Dict[str, int]:
+        assets = list(self._assets.values())
+        return {
+            "assets": len(assets),
+            "inline_assets": sum(1 for asset in assets if asset.data is not None),
+            "inline_bytes": sum(asset.size for asset in assets if asset.data is not None),
+        }
@@ -1,9 +1,81 @@
-from firebase_client import db
-from typing import Optional
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from firebase_client import db, firebase_auth
+from typing import Dict, List, Optional, Tuple
+from config import (
+    TOKEN_CACHE_MAX_ENTRIES,
+    TOKEN_CACHE_MAX_TTL,
+    USER_CACHE_TTL,
+    USER_CACHE_NEGATIVE_TTL,
+    USER_CACHE_MAX_ENTRIES,
+    USER_BATCH_SIZE,
+    USER_BATCH_CONCURRENCY,
+    AUTH_TOKEN_CLAIMS,
+)
+from services.user_cache import UserMetadataCache, MISS
+from utils.token_cache import TokenCache
+from utils.executor import run_blocking
+from utils.metrics import metrics
+from utils.single_flight import single_flight
+
+# Shared by utils.security.get_current_user and the /auth controllers
+user_cache = UserMetadataCache(
+    ttl=USER_CACHE_TTL,
+    negative_ttl=USER_CACHE_NEGATIVE_TTL,
+    max_entries=USER_CACHE_MAX_ENTRIES,
+)
+
+# Tokens that already passed verify_id_token (see utils.security.get_current_user);
+# a user's entries are dropped whenever their metadata is written
+token_cache = TokenCache(max_entries=TOKEN_CACHE_MAX_ENTRIES, max_ttl=TOKEN_CACHE_MAX_TTL)
+
+# uid -> time.time() its role/tenant claims last changed on this worker. ID tokens
+# signed in before that must not be trusted for their claims. ID tokens live at
+# most an hour, so older stamps no longer matter and are pruned.
+ID_TOKEN_MAX_AGE = 3600.0
+_claims_changed: "OrderedDict[str, float]" = OrderedDict()
+_claims_changed_lock = threading.Lock()
+
+def _mark_claims_changed(uid: str) -> None:
+    now = time.time()
+    with _claims_changed_lock:
+        _claims_changed[uid] = now
+        _claims_changed.move_to_end(uid)
+        while _claims_changed and next(iter(_claims_changed.values())) < now - ID_TOKEN_MAX_AGE:
+            _claims_changed.popitem(last=False)
+    token_cache.invalidate_uid(uid)
+
+def claims_outdated(uid: str, auth_time: Optional[float]) -> bool:
+    """True if the role/tenant claims of a token signed in at `auth_time` changed since."""
+    changed = _claims_changed.get(uid)
+    return changed is not None and (auth_time or 0) < int(changed)
+
+# Concurrent cache misses for the same uid share one Firestore read
+_user_reads = single_flight("firestore.users.get")
+
+def _read_user_doc(uid: str) -> Optional[dict]:
+    # Taken before the read: a write-through that lands while we wait on Firestore wins
+    generation = user_cache.generation(uid)
+    try:
+        with metrics.timed("firestore.users.get"):
+            doc = db.collection("users").document(uid).get()
+        metadata = doc.to_dict() if doc.exists else None
+    except Exception as e:
+        # Log or handle error as needed
+        raise Exception(f"Failed to fetch metadata for user {uid}: {e}")
+    user_cache.put(uid, metadata, generation)
+    return metadata
+
+def _copy(metadata: Optional[dict]) -> Optional[dict]:
+    # A coalesced read hands the same dict to every waiter
+    return dict(metadata) if metadata is not None else None
 
 def fetch_user_metadata(uid: str) -> Optional[dict]:
     """
     Fetch a user's metadata (role, tenant, etc.) from Firestore.
+    Served from the user metadata cache when possible; missing users are cached too.
 
     Args:
         uid (str): Firebase Authentication user UID.
@@ -17,16 +89,49 @@ def fetch_user_metadata(uid: str) -> Optional[dict]:
     """
     if not uid:
         raise ValueError("User UID must be provided.")
-    try:
-        doc = db.collection("users").document(uid).get()
-        return doc.to_dict() if doc.exists else None
-    except Exception as e:
-        # Log or handle error as needed
-        raise Exception(f"Failed to fetch metadata for user {uid}: {e}")
+    cached = user_cache.get(uid)
+    if cached is not MISS:
+        return cached
+    return _copy(_user_reads.do(uid, _read_user_doc, uid))
+
+async def fetch_user_metadata_async(uid: str) -> Optional[dict]:
+    """
+    Async variant of fetch_user_metadata: cache hits are answered inline,
+    Firestore reads run on the blocking I/O executor.
+    """
+    if not uid:
+        raise ValueError("User UID must be provided.")
+    cached = user_cache.get(uid)
+    if cached is not MISS:
+        return cached
+    return _copy(await _user_reads.do_async(uid, _read_user_doc, uid))
+
+def _set_token_claims(uid: str, role: str, tenant: str) -> None:
+    """
+    Mirror role and tenant into the user's custom claims, keeping any other
+    custom claims. If the user's tokens carried a different role or tenant,
+    their sessions are ended: refresh tokens are revoked, and ID tokens signed
+    in before now stop being trusted for their claims on this worker at once
+    (elsewhere, via the revocation check made for cross-tenant roles).
+    """
+    with metrics.timed("firebase.get_user"):
+        claims = dict(firebase_auth.get_user(uid).custom_claims or {})
+    previous = (claims.get("role"), claims.get("tenant"))
+    if previous == (role, tenant):
+        return
+    claims.update(role=role, tenant=tenant)
+    with metrics.timed("firebase.set_custom_user_claims"):
+        firebase_auth.set_custom_user_claims(uid, claims)
+    if previous != (None, None):
+        _mark_claims_changed(uid)
+        with metrics.timed("firebase.revoke_refresh_tokens"):
+            firebase_auth.revoke_refresh_tokens(uid)
 
 def update_user_metadata(uid: str, role: str, tenant: str) -> None:
     """
-    Update or set a user's metadata (role, tenant) in Firestore.
+    Update or set a user's metadata (role, tenant) in Firestore, and in the
+    user's ID token custom claims (AUTH_TOKEN_CLAIMS).
+    The cached copy is updated as soon as the Firestore write succeeds.
 
     Args:
         uid (str): Firebase Authentication user UID.
@@ -40,10 +145,87 @@ def update_user_metadata(uid: str, role: str, tenant: str) -> None:
     if not uid or not role or not tenant:
         raise ValueError("User UID, role, and tenant are required to update metadata.")
     try:
-        db.collection("users").document(uid).set({
-            "role": role,
-            "tenant": tenant
-        }, merge=True)
+        with metrics.timed("firestore.users.set"):
+            db.collection("users").document(uid).set({
+                "role": role,
+                "tenant": tenant
+            }, merge=True)
     except Exception as e:
         # Log or handle error as needed
+        user_cache.invalidate(uid)
         raise Exception(f"Failed to update metadata for user {uid}: {e}")
+    user_cache.merge(uid, {"role": role, "tenant": tenant})
+    # Requests re-verify the token, so a revocation (TOKEN_CHECK_REVOKED) is seen at once
+    token_cache.invalidate_uid(uid)
+    if AUTH_TOKEN_CLAIMS:
+        try:
+            _set_token_claims(uid, role, tenant)
+        except Exception as e:
+            raise Exception(f"Failed to update token claims for user {uid}: {e}")
+
+def _commit_user_batch(updates: List[Tuple[str, str, str]]) -> Dict[str, Optional[str]]:
+    """
+    Write one Firestore batch (all or nothing) of (uid, role, tenant), update
+    the user cache accordingly, then the token claims of each user.
+
+    Returns:
+        dict: uid -> None if updated, else the error message.
+    """
+    batch = db.batch()
+    users = db.collection("users")
+    for uid, role, tenant in updates:
+        batch.set(users.document(uid), {"role": role, "tenant": tenant}, merge=True)
+    try:
+        with metrics.timed("firestore.users.batch_set"):
+            batch.commit()
+    except Exception as e:
+        for uid, _, _ in updates:
+            user_cache.invalidate(uid)
+        return {uid: str(e) for uid, _, _ in updates}
+    token_cache.invalidate_uids(uid for uid, _, _ in updates)
+    results: Dict[str, Optional[str]] = {}
+    for uid, role, tenant in updates:
+        user_cache.merge(uid, {"role": role, "tenant": tenant})
+        results[uid] = None
+        if AUTH_TOKEN_CLAIMS:
+            # Firebase has no batch call for custom claims
+            try:
+                _set_token_claims(uid, role, tenant)
+            except Exception as e:
+                results[uid] = f"Failed to update token claims: {e}"
+    return results
+
+async def update_users_metadata(
+        updates: List[Tuple[str, str, str]],
+        batch_size: int = USER_BATCH_SIZE,
+        concurrency: int = USER_BATCH_CONCURRENCY
+) -> Dict[str, Optional[str]]:
+    """
+    Set (uid, role, tenant) for many users using Firestore batched writes of up
+    to `batch_size` documents, at most `concurrency` batches in flight.
+    A uid listed more than once gets its last assignment.
+
+    Returns:
+        dict: uid -> None if updated, else the error message. A batch commits
+        atomically, so a failing batch reports the error for each of its uids.
+        Token claims are set per user after the batch commits.
+    """
+    results: Dict[str, Optional[str]] = {}
+    latest: Dict[str, Tuple[str, str, str]] = {}
+    for uid, role, tenant in updates:
+        if not uid or not role or not tenant:
+            results[uid] = "User UID, role, and tenant are required to update metadata."
+            continue
+        results.pop(uid, None)
+        latest[uid] = (uid, role, tenant)
+
+    valid = list(latest.values())
+    batches = [valid[i:i + batch_size] for i in range(0, len(valid), max(1, batch_size))]
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def commit(batch: List[Tuple[str, str, str]]) -> None:
+        async with limit:
+            results.update(await run_blocking(_commit_user_batch, batch))
+
+    await asyncio.gather(*(commit(batch) for batch in batches))
+    return results
@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+from config import CONFIG_RESPONSE_CACHE_MAX_ENTRIES
+from models.tenant import TenantConfig
+from services.asset_service import asset_store, asset_url, with_asset_version
+from services.tenant_service import get_tenant_config_ref
+
+# ===================
+# PRE-SERIALIZED CONFIG RESPONSES
+# ===================
+# GET /{tenant}/config returns the same bytes until the tenant or a logo
+# changes. They are built once per (tenant, base URL) - logo rewrite,
+# TenantConfig validation, orjson encoding - and reused while the stored
+# config object and the asset fingerprint are unchanged.
+#
+# The endpoint is public, so rollout rules are served as `false`: their uids
+# and roles stay on the authenticated endpoints, and users get their own
+# result from /{tenant}/features/evaluated.
+
+
+class RenderedConfigCache:
+    """Bounded LRU of (tenant, base_url) -> (config object, asset fingerprint, etag, body)."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], str, str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    def get(self, key: Tuple[str, str], config: Dict[str, Any], fingerprint: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not config or entry[1] != fingerprint:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def put(self, key: Tuple[str, str], config: Dict[str, Any], fingerprint: str, etag: str, body: bytes) -> None:
+        with self._lock:
+            self.renders += 1
+            self._entries[key] = (config, fingerprint, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "renders": self.renders, "entries": len(self._entries), "max_entries": self.max_entries}
+
+
+rendered_configs = RenderedConfigCache(CONFIG_RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def render_config_body(config: Dict[str, Any], base_url: str) -> bytes:
+    """
+    Public config JSON for `config`, with local logo paths turned into absolute
+    content-hashed URLs and rollout rules collapsed to `false`.
+    """
+    payload = dict(config)
+    payload["features"] = {name: value is True for name, value in (config.get("features") or {}).items()}
+    logo = payload.get("logo")
+    if logo and not logo.startswith("http"):
+        payload["logo"] = base_url.rstrip("/") + asset_url(logo)
+    # Validated once per change, so the response matches the TenantConfig schema exactly
+    return orjson.dumps(TenantConfig.model_validate(payload).model_dump())
+
+
+def get_rendered_config(tenant: str, base_url: str) -> Optional[Tuple[str, bytes]]:
+    """
+    (ETag, JSON body) of the tenant's config as served from `base_url`,
+    or None if the tenant does not exist.
+    """
+    config, etag = get_tenant_config_ref(tenant)
+    if config is None:
+        return None
+    key = (tenant, base_url)
+    fingerprint = asset_store.fingerprint()
+    cached = rendered_configs.get(key, config, fingerprint)
+    if cached is not None:
+        return cached
+    etag = with_asset_version(etag)
+    body = render_config_body(config, base_url)
+    rendered_configs.put(key, config, fingerprint, etag, body)
+    return etag, body
+
+
+def get_rendered_config_stats() -> Dict[str, int]:
+    return rendered_configs.stats()
@@ -0,0 +1,86 @@
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+# ===================
+# HOST -> TENANT INDEX
+# ===================
+
+
+def normalize_host(host: str) -> str:
+    """Lower-case host name without port or trailing dot (`Acme.Example.com:443` -> `acme.example.com`)."""
+    host = host.strip().lower()
+    if host.startswith("["):
+        # IPv6 literal, never a tenant domain
+        return host.split("]", 1)[0] + "]"
+    return host.rsplit(":", 1)[0].rstrip(".") if ":" in host else host.rstrip(".")
+
+
+def normalize_domains(domains: Optional[Iterable[str]]) -> FrozenSet[str]:
+    return frozenset(normalize_host(domain) for domain in (domains or ()) if domain and domain.strip())
+
+
+class DomainIndex:
+    """
+    Resolves a Host header to a tenant with dict lookups:
+
+    1. custom domains listed in a tenant's `domains` config (exact match), then
+    2. the first label of the host as a tenant key
+       (`tenant1-multitenantcore.example.com` -> `tenant1-multitenantcore`).
+
+    Only tenant keys and their domains are kept; handlers read the config
+    itself through the tenant store.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._domains: Dict[str, str] = {}
+        # tenant -> custom domains it owns; the keys are every known tenant
+        self._tenant_domains: Dict[str, FrozenSet[str]] = {}
+
+    def rebuild(self, tenants: Dict[str, Dict[str, Any]]) -> None:
+        domains: Dict[str, str] = {}
+        tenant_domains: Dict[str, FrozenSet[str]] = {}
+        for tenant, config in tenants.items():
+            owned = normalize_domains(config.get("domains"))
+            tenant_domains[tenant] = owned
+            for domain in owned:
+                domains.setdefault(domain, tenant)
+        with self._lock:
+            self._domains = domains
+            self._tenant_domains = tenant_domains
+
+    def update(self, tenant: str, config: Dict[str, Any]) -> None:
+        """Incrementally re-index one tenant after it was created or changed."""
+        owned = normalize_domains(config.get("domains"))
+        with self._lock:
+            previous = self._tenant_domains.get(tenant, frozenset())
+            for domain in previous - owned:
+                if self._domains.get(domain) == tenant:
+                    del self._domains[domain]
+            for domain in owned:
+                self._domains.setdefault(domain, tenant)
+            self._tenant_domains[tenant] = owned
+
+    def owner(self, domain: str) -> Optional[str]:
+        """Tenant that claims `domain` as a custom domain, if any."""
+        return self._domains.get(normalize_host(domain))
+
+    def resolve(self, host: str) -> Optional[Tuple[str, str]]:
+        """
+        (tenant, "domain" | "subdomain") for a Host header value, or None if it
+        does not belong to a tenant.
+        """
+        if not host:
+            return None
+        host = normalize_host(host)
+        tenant = self._domains.get(host)
+        source = "domain"
+        if tenant is None:
+            tenant = host.split(".", 1)[0]
+            source = "subdomain"
+        if tenant not in self._tenant_domains:
+            return None
+        return tenant, source
+
+    def __len__(self) -> int:
+        return len(self._tenant_domains)
@@ -0,0 +1,184 @@
+import heapq
+import json
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# ===================
+# FEATURE FLAG INDEX
+# ===================
+
+
+def field_key(value: Any) -> Optional[str]:
+    """Index key of a scalar config value (strings as-is, others as JSON); None if not indexable."""
+    if isinstance(value, str):
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return json.dumps(value)
+    return None
+
+
+def _indexed_fields(config: Dict[str, Any]) -> Dict[str, str]:
+    """Top-level scalar config fields (layout, brandName, ...) by index key."""
+    fields = {}
+    for name, value in config.items():
+        key = field_key(value) if name != "features" else None
+        if key is not None:
+            fields[name] = key
+    return fields
+
+
+class FeatureIndex:
+    """
+    Precomputed feature flag lookup over all tenants.
+
+    Every tenant gets a small integer id; for each feature a Python int is
+    used as a bitset of the tenant ids that have it enabled, which makes
+    "which tenants have X" a couple of integer operations. Single
+    (tenant, feature) checks use the per-tenant set of enabled features.
+
+    Top-level scalar config fields get the same treatment (field -> value ->
+    bitset), so tenant listings filter with integer operations.
+    Ids follow tenant key order as of the last rebuild, then creation order, so
+    they differ between indexes; results are returned in tenant key order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._all = 0
+        self._enabled: Dict[str, int] = {}
+        self._tenant_features: Dict[str, FrozenSet[str]] = {}
+        self._fields: Dict[str, Dict[str, int]] = {}
+        self._tenant_fields: Dict[str, Dict[str, str]] = {}
+
+    def rebuild(self, tenants: Dict[str, Dict[str, Any]]) -> None:
+        ids: Dict[str, int] = {}
+        names: List[str] = []
+        enabled: Dict[str, int] = {}
+        tenant_features: Dict[str, FrozenSet[str]] = {}
+        fields: Dict[str, Dict[str, int]] = {}
+        tenant_fields: Dict[str, Dict[str, str]] = {}
+        for tenant in sorted(tenants):
+            config = tenants[tenant]
+            bit = 1 << len(names)
+            ids[tenant] = len(names)
+            names.append(tenant)
+            on = frozenset(name for name, value in (config.get("features") or {}).items() if value is True)
+            tenant_features[tenant] = on
+            for feature in on:
+                enabled[feature] = enabled.get(feature, 0) | bit
+            tenant_fields[tenant] = values = _indexed_fields(config)
+            for name, key in values.items():
+                by_value = fields.setdefault(name, {})
+                by_value[key] = by_value.get(key, 0) | bit
+        with self._lock:
+            self._ids, self._names, self._enabled = ids, names, enabled
+            self._tenant_features = tenant_features
+            self._fields, self._tenant_fields = fields, tenant_fields
+            self._all = (1 << len(names)) - 1
+
+    def update(self, tenant: str, features: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Incrementally re-index one tenant after its features changed
+        (and its config fields too, if the new `config` is given).
+        """
+        on = frozenset(name for name, value in (features or {}).items() if value is True)
+        with self._lock:
+            idx = self._ids.get(tenant)
+            if idx is None:
+                idx = self._ids[tenant] = len(self._names)
+                self._names.append(tenant)
+                self._all |= 1 << idx
+            bit = 1 << idx
+            previous = self._tenant_features.get(tenant, frozenset())
+            for feature in previous - on:
+                self._enabled[feature] &= ~bit
+                if not self._enabled[feature]:
+                    del self._enabled[feature]
+            for feature in on - previous:
+                self._enabled[feature] = self._enabled.get(feature, 0) | bit
+            self._tenant_features[tenant] = on
+            if config is not None:
+                self._update_fields(tenant, bit, _indexed_fields(config))
+
+    def _update_fields(self, tenant: str, bit: int, values: Dict[str, str]) -> None:
+        previous = self._tenant_fields.get(tenant, {})
+        for name, key in previous.items():
+            if values.get(name) != key:
+                by_value = self._fields[name]
+                by_value[key] &= ~bit
+                if not by_value[key]:
+                    del by_value[key]
+        for name, key in values.items():
+            if previous.get(name) != key:
+                by_value = self._fields.setdefault(name, {})
+                by_value[key] = by_value.get(key, 0) | bit
+        self._tenant_fields[tenant] = values
+
+    def is_enabled(self, tenant: str, feature: str) -> Optional[bool]:
+        """Whether `feature` is enabled for `tenant`; None if the tenant is unknown."""
+        on = self._tenant_features.get(tenant)
+        if on is None:
+            return None
+        return feature in on
+
+    def tenants_with(self, feature: str, enabled: bool = True) -> List[str]:
+        """Tenants that have `feature` enabled (or not enabled), in key order."""
+        with self._lock:
+            mask = self._enabled.get(feature, 0)
+            if not enabled:
+                mask = self._all & ~mask
+            names = self._names
+        return sorted(self._iter_bits(mask, names))
+
+    def query(
+            self,
+            features: Optional[Dict[str, bool]] = None,
+            fields: Optional[Dict[str, str]] = None,
+            after: Optional[str] = None,
+            limit: int = 50
+    ) -> Tuple[List[str], Optional[str], int]:
+        """
+        One page of tenants matching every filter: `features` {name: enabled}
+        and `fields` {config field: index key (see field_key)}, in tenant key
+        order, starting after `after` (which need not be a tenant any more).
+
+        Key order, not index order, so a cursor from one index (another worker,
+        or before a rebuild) continues correctly on any other.
+
+        Returns:
+            (tenants, tenant to pass as `after` for the next page or None, total matches).
+        """
+        with self._lock:
+            mask = self._all
+            for feature, enabled in (features or {}).items():
+                bits = self._enabled.get(feature, 0)
+                mask &= bits if enabled else ~bits
+            for name, key in (fields or {}).items():
+                mask &= self._fields.get(name, {}).get(key, 0)
+            names = self._names
+        total = bin(mask).count("1")
+        matches = self._iter_bits(mask, names)
+        if after is not None:
+            matches = (name for name in matches if name > after)
+        page = heapq.nsmallest(limit + 1, matches)
+        if len(page) > limit:
+            return page[:limit], page[limit - 1], total
+        return page, None, total
+
+    def evaluate(self, tenants: Iterable[str], features: Iterable[str]) -> Dict[str, Optional[Dict[str, bool]]]:
+        """Feature matrix for several tenants; unknown tenants map to None."""
+        features = list(features)
+        matrix: Dict[str, Optional[Dict[str, bool]]] = {}
+        for tenant in tenants:
+            on = self._tenant_features.get(tenant)
+            matrix[tenant] = None if on is None else {feature: feature in on for feature in features}
+        return matrix
+
+    @staticmethod
+    def _iter_bits(mask: int, names: List[str]):
+        while mask:
+            low = mask & -mask
+            yield names[low.bit_length() - 1]
+            mask ^= low
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from config import FEATURE_RULES_CACHE_MAX_ENTRIES
+from services.tenant_service import get_tenant_config_ref
+
+# ===================
+# FEATURE ROLLOUT RULES
+# ===================
+#
+# A tenant's feature flag is either a boolean or a rollout rule:
+#
+#   "NewDashboard": {"percentage": 25, "roles": ["Admin"], "uids": ["u1"]}
+#
+# which is on for the listed uids, for users with one of the listed roles, and
+# for `percentage` % of all other users. Users are bucketed by a stable hash of
+# (tenant, flag, uid), so a user keeps their bucket across requests, workers and
+# restarts, and raising the percentage only ever adds users.
+#
+# Rules are compiled once per stored config object; a request then costs a dict
+# lookup plus one hash per percentage rule. Tenant-level views (feature index,
+# /flags endpoints) count only `true` as enabled.
+
+BUCKETS = 10000
+
+
+class CompiledRule(NamedTuple):
+    name: str
+    uids: FrozenSet[str]
+    roles: FrozenSet[str]
+    # Users whose bucket is below this are in the rollout (percentage * BUCKETS / 100)
+    threshold: int
+    salt: bytes
+
+
+def bucket(salt: bytes, uid: str) -> int:
+    """Stable bucket in [0, BUCKETS) of `uid` for the flag identified by `salt`."""
+    digest = hashlib.blake2b(uid.encode(), digest_size=8, key=salt).digest()
+    return int.from_bytes(digest, "big") % BUCKETS
+
+
+class CompiledFlags:
+    """A tenant's feature flags, ready to evaluate for any user."""
+
+    def __init__(self, tenant: str, features: Dict[str, Any]):
+        self.static: Dict[str, bool] = {}
+        self.rules: List[CompiledRule] = []
+        for name, value in (features or {}).items():
+            if isinstance(value, dict):
+                try:
+                    percentage = min(100.0, max(0.0, float(value.get("percentage") or 0)))
+                except (TypeError, ValueError):
+                    percentage = 0.0
+                self.rules.append(CompiledRule(
+                    name,
+                    frozenset(value.get("uids") or ()),
+                    frozenset(value.get("roles") or ()),
+                    int(percentage * BUCKETS / 100),
+                    hashlib.sha256(f"{tenant}\0{name}".encode()).digest(),
+                ))
+            else:
+                self.static[name] = value is True
+
+    def evaluate(self, uid: Optional[str], role: Optional[str]) -> Dict[str, bool]:
+        flags = dict(self.static)
+        for rule in self.rules:
+            flags[rule.name] = (
+                uid in rule.uids
+                or role in rule.roles
+                or (rule.threshold > 0 and uid is not None
+                    and (rule.threshold >= BUCKETS or bucket(rule.salt, uid) < rule.threshold))
+            )
+        return flags
+
+
+class CompiledFlagsCache:
+    """Bounded LRU of tenant -> (config object compiled from, CompiledFlags)."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], CompiledFlags]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.compiles = 0
+
+    def get(self, tenant: str, config: Dict[str, Any]) -> CompiledFlags:
+        with self._lock:
+            entry = self._entries.get(tenant)
+            if entry is not None and entry[0] is config:
+                self._entries.move_to_end(tenant)
+                self.hits += 1
+                return entry[1]
+        # Stored configs are replaced, not mutated, on change: a new object means recompile
+        compiled = CompiledFlags(tenant, config.get("features", {}))
+        with self._lock:
+            self.compiles += 1
+            self._entries[tenant] = (config, compiled)
+            self._entries.move_to_end(tenant)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "compiles": self.compiles, "entries": len(self._entries), "max_entries": self.max_entries}
+
+
+compiled_flags = CompiledFlagsCache(FEATURE_RULES_CACHE_MAX_ENTRIES)
+
+
+def evaluate_user_features(tenant: str, uid: Optional[str], role: Optional[str]) -> Optional[Dict[str, bool]]:
+    """Every feature flag of `tenant` as it applies to this user; None if the tenant does not exist."""
+    config, _ = get_tenant_config_ref(tenant)
+    if config is None:
+        return None
+    return compiled_flags.get(tenant, config).evaluate(uid, role)
+
+
+def get_feature_rules_stats() -> Dict[str, int]:
+    return compiled_flags.stats()
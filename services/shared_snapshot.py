@@ -0,0 +1,338 @@
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import orjson
+
+from services.tenant_store import TenantBatchWrite, TenantChange, TenantStore, TenantWrite
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: single process only
+    fcntl = None
+
+# ===================
+# CROSS-WORKER SHARED SNAPSHOT
+# ===================
+#
+# Every worker process maps the same read-only snapshot file, so the tenant
+# data lives once in the OS page cache however many workers run. A tenant is
+# found through an open-addressing hash table inside the file and only its
+# own JSON slice is decoded.
+#
+# Writes go to the backing store under an exclusive file lock, then a new
+# snapshot is written to a temp file and renamed into place, and the 8-byte
+# generation counter in `<snapshot>.gen` (also mmap'd by every worker) is
+# bumped. Readers compare that counter on every lookup - a memory read, no
+# system call - and remap when it moves, so changes are visible to all
+# workers as soon as the writer returns.
+#
+# File layout (little endian):
+#   header  magic(8) generation(u64) slot_count(u32) tenant_count(u32) meta_len(u32) pad(u32)
+#   meta    JSON: {"backing": <backing store signature>}
+#   slots   slot_count x (crc32(u32) key_len(u32) offset(u64) value_len(u32) pad(u32) version(u64))
+#   data    key bytes followed by value (config JSON) bytes, per tenant
+
+MAGIC = b"MTSNAP01"
+_HEADER = struct.Struct("<8sQIIII")
+_SLOT = struct.Struct("<IIQIIQ")
+_GEN = struct.Struct("<Q")
+
+
+def _slot_count(tenants: int) -> int:
+    count = 8
+    while count < tenants * 2:
+        count *= 2
+    return count
+
+
+def build_snapshot(
+        tenants: Dict[str, Dict[str, Any]],
+        generation: int,
+        versions: Dict[str, int],
+        meta: Dict[str, Any]
+) -> bytes:
+    """Serialize `tenants` into the snapshot format. `versions` gives each tenant's last-changed generation."""
+    meta_bytes = orjson.dumps(meta)
+    slot_count = _slot_count(len(tenants))
+    slots_start = _HEADER.size + len(meta_bytes)
+    slots_start += -slots_start % 8
+    data_start = slots_start + slot_count * _SLOT.size
+
+    slots = [None] * slot_count
+    data = bytearray()
+    mask = slot_count - 1
+    for tenant, config in tenants.items():
+        key = tenant.encode()
+        value = orjson.dumps(config)
+        crc = zlib.crc32(key)
+        index = crc & mask
+        while slots[index] is not None:
+            index = (index + 1) & mask
+        slots[index] = (crc, len(key), data_start + len(data), len(value), 0, versions.get(tenant, generation))
+        data += key
+        data += value
+
+    out = bytearray(_HEADER.pack(MAGIC, generation, slot_count, len(tenants), len(meta_bytes), 0))
+    out += meta_bytes
+    out += b"\0" * (slots_start - len(out))
+    empty = _SLOT.pack(0, 0, 0, 0, 0, 0)
+    for slot in slots:
+        out += empty if slot is None else _SLOT.pack(*slot)
+    out += data
+    return bytes(out)
+
+
+class SnapshotView:
+    """Read-only access to one mapped snapshot file."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        magic, self.generation, self.slot_count, self.count, meta_len, _ = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise Exception("Corrupted tenant snapshot file.")
+        self.meta = orjson.loads(buffer[_HEADER.size:_HEADER.size + meta_len])
+        slots_start = _HEADER.size + meta_len
+        self.slots_start = slots_start + (-slots_start % 8)
+
+    def find(self, tenant: str) -> Optional[Tuple[int, int, int]]:
+        """(value offset, value length, version) for `tenant`, or None."""
+        key = tenant.encode()
+        crc = zlib.crc32(key)
+        mask = self.slot_count - 1
+        index = crc & mask
+        buffer = self.buffer
+        for _ in range(self.slot_count):
+            slot_crc, key_len, offset, value_len, _, version = _SLOT.unpack_from(buffer, self.slots_start + index * _SLOT.size)
+            if offset == 0:
+                return None
+            if slot_crc == crc and key_len == len(key) and buffer[offset:offset + key_len] == key:
+                return offset + key_len, value_len, version
+            index = (index + 1) & mask
+        return None
+
+    def items(self) -> Iterator[Tuple[str, int, int, int]]:
+        """(tenant, value offset, value length, version) for every tenant."""
+        for index in range(self.slot_count):
+            _, key_len, offset, value_len, _, version = _SLOT.unpack_from(self.buffer, self.slots_start + index * _SLOT.size)
+            if offset:
+                yield self.buffer[offset:offset + key_len].decode(), offset + key_len, value_len, version
+
+
+class SharedSnapshotTenantStore(TenantStore):
+    """
+    Serves reads from the shared mmap'd snapshot, writes through to `backing`
+    (a multi-process safe store: "file" or "sqlite").
+    """
+
+    def __init__(
+            self,
+            backing: TenantStore,
+            snapshot_path: str,
+            memo_max_entries: int = 10000,
+            backing_check_interval: float = 1.0
+    ):
+        self.backing = backing
+        self.snapshot_path = snapshot_path
+        self.generation_path = f"{snapshot_path}.gen"
+        self.lock_path = f"{snapshot_path}.lock"
+        self.memo_max_entries = max(0, memo_max_entries)
+        self.backing_check_interval = backing_check_interval
+
+        self._local_lock = threading.RLock()
+        self._view: Optional[SnapshotView] = None
+        self._gen_map: Optional[mmap.mmap] = None
+        self._last_backing_check = 0.0
+        # tenant -> (version, parsed config); same dict returned until the tenant changes
+        self._memo: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self.remaps = 0
+        self.publishes = 0
+
+    def open(self) -> "SharedSnapshotTenantStore":
+        with self._exclusive():
+            if not os.path.exists(self.generation_path) or os.path.getsize(self.generation_path) < _GEN.size:
+                with open(self.generation_path, "wb") as f:
+                    f.write(_GEN.pack(0))
+            with open(self.generation_path, "r+b") as f:
+                self._gen_map = mmap.mmap(f.fileno(), _GEN.size)
+            try:
+                self._remap()
+                stale = self._view.meta.get("backing") != self._backing_signature()
+            except Exception:
+                # Missing or unreadable snapshot: rebuild it from the backing store
+                stale = True
+            if stale:
+                self._publish()
+        self._last_backing_check = time.monotonic()
+        return self
+
+    def close(self) -> None:
+        self.backing.close()
+
+    # -------------------
+    # Reads
+    # -------------------
+
+    def _current(self) -> SnapshotView:
+        view = self._view
+        if view is None or _GEN.unpack_from(self._gen_map, 0)[0] != view.generation:
+            with self._local_lock:
+                self._remap()
+                view = self._view
+        now = time.monotonic()
+        if now - self._last_backing_check >= self.backing_check_interval:
+            self._last_backing_check = now
+            # tenants.json / the database may have been edited outside the app
+            if view.meta.get("backing") != self._backing_signature():
+                with self._exclusive():
+                    self._remap()
+                    if self._view.meta.get("backing") != self._backing_signature():
+                        self._publish()
+                view = self._view
+        return view
+
+    def get(self, tenant: str) -> Optional[Dict[str, Any]]:
+        view = self._current()
+        found = view.find(tenant)
+        if found is None:
+            return None
+        offset, length, version = found
+        with self._memo_lock:
+            memo = self._memo.get(tenant)
+            if memo is not None and memo[0] == version:
+                self._memo.move_to_end(tenant)
+                return memo[1]
+        config = orjson.loads(view.buffer[offset:offset + length])
+        self._remember(tenant, version, config)
+        return config
+
+    def exists(self, tenant: str) -> bool:
+        return self._current().find(tenant) is not None
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        view = self._current()
+        return {tenant: orjson.loads(view.buffer[offset:offset + length]) for tenant, offset, length, _ in view.items()}
+
+    def signature(self) -> Hashable:
+        return self._current().generation
+
+    def stats(self) -> Dict[str, Any]:
+        view = self._current()
+        return {
+            "generation": view.generation,
+            "tenants": view.count,
+            "snapshot_bytes": len(view.buffer),
+            "memo_entries": len(self._memo),
+            "remaps": self.remaps,
+            "publishes": self.publishes,
+        }
+
+    # -------------------
+    # Writes
+    # -------------------
+
+    def create(self, tenant: str, config: Dict[str, Any]) -> TenantWrite:
+        return self._write(lambda: self.backing.create(tenant, config))
+
+    def update_config(self, tenant: str, updates: Dict[str, Any]) -> TenantWrite:
+        return self._write(lambda: self.backing.update_config(tenant, updates))
+
+    def update_features(self, tenant: str, features: Dict[str, Any]) -> TenantWrite:
+        return self._write(lambda: self.backing.update_features(tenant, features))
+
+    def apply_batch(self, changes: List[TenantChange]) -> TenantBatchWrite:
+        with self._exclusive():
+            self._remap()
+            before = self._view.generation
+            batch = self.backing.apply_batch(changes)
+            if batch.after != batch.before:
+                self._publish()
+            return TenantBatchWrite(batch.results, before, self._view.generation)
+
+    def _write(self, apply) -> TenantWrite:
+        with self._exclusive():
+            self._remap()
+            before = self._view.generation
+            write = apply()
+            self._publish()
+            return TenantWrite(write.config, before, self._view.generation)
+
+    # -------------------
+    # Internals
+    # -------------------
+
+    def _backing_signature(self) -> Any:
+        # JSON round trip so it compares equal to the copy stored in the snapshot meta
+        return orjson.loads(orjson.dumps(self.backing.signature()))
+
+    def _remap(self) -> None:
+        with open(self.snapshot_path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # The previous mapping stays valid for readers still holding it and is released with it
+        self._view = SnapshotView(buffer)
+        self.remaps += 1
+
+    def _publish(self) -> None:
+        """Write a new snapshot generation from the backing store. Caller holds the exclusive lock."""
+        previous = self._view
+        generation = max(_GEN.unpack_from(self._gen_map, 0)[0], previous.generation if previous else 0) + 1
+        tenants = self.backing.load_all()
+
+        # Unchanged tenants keep their version, so workers keep their parsed copies
+        versions: Dict[str, int] = {}
+        if previous is not None:
+            encoded = {tenant: orjson.dumps(config) for tenant, config in tenants.items()}
+            for tenant, offset, length, version in previous.items():
+                value = encoded.get(tenant)
+                if value is not None and previous.buffer[offset:offset + length] == value:
+                    versions[tenant] = version
+
+        data = build_snapshot(tenants, generation, versions, {"backing": self.backing.signature()})
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.snapshot_path)
+        _GEN.pack_into(self._gen_map, 0, generation)
+        self.publishes += 1
+        self._remap()
+
+    def _remember(self, tenant: str, version: int, config: Dict[str, Any]) -> None:
+        if not self.memo_max_entries:
+            return
+        with self._memo_lock:
+            self._memo[tenant] = (version, config)
+            self._memo.move_to_end(tenant)
+            while len(self._memo) > self.memo_max_entries:
+                self._memo.popitem(last=False)
+
+    def _exclusive(self):
+        return _ExclusiveLock(self.lock_path, self._local_lock)
+
+
+class _ExclusiveLock:
+    """Thread lock + flock on `path`: one writer across all worker processes."""
+
+    def __init__(self, path: str, thread_lock: threading.RLock):
+        self.path = path
+        self.thread_lock = thread_lock
+        self._file = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            self._file = open(self.path, "a+b")
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self.thread_lock.release()
@@ -0,0 +1,243 @@
+import argparse
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from services.tenant_store import TenantBatchWrite, TenantChange, TenantStore, TenantWrite, apply_change, read_json_file
+
+# ===================
+# SQLITE TENANT STORE
+# ===================
+#
+# One row per tenant, keyed by the tenant name (primary key index), in WAL
+# mode so readers never block the writer and several worker processes can
+# share the database. Every write bumps a global `generation` counter in the
+# same transaction; it doubles as the store signature.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenants (
+    tenant  TEXT PRIMARY KEY,
+    config  TEXT NOT NULL,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+"""
+
+
+class SqliteTenantStore(TenantStore):
+    def __init__(self, path: str, memo_max_entries: int = 10000, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.memo_max_entries = max(0, memo_max_entries)
+        self._local = threading.local()
+        # tenant -> (row version, parsed config): skips json.loads for unchanged rows
+        # and keeps returning the same dict object until the row changes
+        self._memo: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads; one per executor thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -------------------
+    # Reads
+    # -------------------
+
+    def get(self, tenant: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT version, config FROM tenants WHERE tenant = ?", (tenant,)
+        ).fetchone()
+        if row is None:
+            return None
+        version, raw = row
+        with self._memo_lock:
+            memo = self._memo.get(tenant)
+            if memo is not None and memo[0] == version:
+                self._memo.move_to_end(tenant)
+                return memo[1]
+        config = json.loads(raw)
+        self._remember(tenant, version, config)
+        return config
+
+    def exists(self, tenant: str) -> bool:
+        return self._conn().execute("SELECT 1 FROM tenants WHERE tenant = ?", (tenant,)).fetchone() is not None
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._conn().execute("SELECT tenant, config FROM tenants ORDER BY tenant").fetchall()
+        return {tenant: json.loads(raw) for tenant, raw in rows}
+
+    def signature(self) -> Hashable:
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        count = self._conn().execute("SELECT COUNT(*) FROM tenants").fetchone()[0]
+        return {"tenants": count, "generation": self.signature(), "memo_entries": len(self._memo)}
+
+    # -------------------
+    # Writes
+    # -------------------
+
+    def create(self, tenant: str, config: Dict[str, Any]) -> TenantWrite:
+        def mutate(current):
+            if current is not None:
+                raise Exception("Tenant already exists.")
+            return dict(config)
+        return self._write(tenant, mutate)
+
+    def update_config(self, tenant: str, updates: Dict[str, Any]) -> TenantWrite:
+        def mutate(current):
+            if current is None:
+                raise Exception("Tenant not found.")
+            return {**current, **updates}
+        return self._write(tenant, mutate)
+
+    def update_features(self, tenant: str, features: Dict[str, Any]) -> TenantWrite:
+        def mutate(current):
+            if current is None:
+                raise Exception("Tenant not found.")
+            return {**current, "features": {**current.get("features", {}), **features}}
+        return self._write(tenant, mutate)
+
+    def apply_batch(self, changes: List[TenantChange]) -> TenantBatchWrite:
+        """All changes in one transaction; every changed row gets the same new generation."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._generation(conn)
+            after = before + 1
+            # Later changes to the same tenant build on earlier ones in the batch
+            pending: Dict[str, Dict[str, Any]] = {}
+            results: List[Any] = []
+            for change in changes:
+                current = pending.get(change.tenant)
+                if current is None:
+                    row = conn.execute("SELECT config FROM tenants WHERE tenant = ?", (change.tenant,)).fetchone()
+                    current = json.loads(row[0]) if row is not None else None
+                try:
+                    config = apply_change(current, change)
+                except Exception as e:
+                    results.append(e)
+                    continue
+                pending[change.tenant] = config
+                results.append(config)
+            conn.executemany(
+                "INSERT OR REPLACE INTO tenants (tenant, config, version) VALUES (?, ?, ?)",
+                [(tenant, json.dumps(config, separators=(",", ":")), after) for tenant, config in pending.items()],
+            )
+            if pending:
+                conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (after,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        for tenant, config in pending.items():
+            self._remember(tenant, after, config)
+        return TenantBatchWrite(results, before, after if pending else before)
+
+    def import_tenants(self, tenants: Dict[str, Dict[str, Any]], overwrite: bool = False) -> int:
+        """
+        Bulk-load tenants in a single transaction.
+        Existing tenants are kept unless `overwrite` is set. Returns the number of rows written.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            generation = self._generation(conn) + 1
+            verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+            written = 0
+            for tenant, config in tenants.items():
+                cursor = conn.execute(
+                    f"{verb} INTO tenants (tenant, config, version) VALUES (?, ?, ?)",
+                    (tenant, json.dumps(config, separators=(",", ":")), generation),
+                )
+                written += cursor.rowcount
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (generation,))
+            conn.execute("COMMIT")
+            return written
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -------------------
+    # Internals
+    # -------------------
+
+    @staticmethod
+    def _generation(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def _write(self, tenant: str, mutate) -> TenantWrite:
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so read-modify-write is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._generation(conn)
+            row = conn.execute("SELECT config FROM tenants WHERE tenant = ?", (tenant,)).fetchone()
+            config = mutate(json.loads(row[0]) if row is not None else None)
+            after = before + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO tenants (tenant, config, version) VALUES (?, ?, ?)",
+                (tenant, json.dumps(config, separators=(",", ":")), after),
+            )
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (after,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._remember(tenant, after, config)
+        return TenantWrite(config, before, after)
+
+    def _remember(self, tenant: str, version: int, config: Dict[str, Any]) -> None:
+        if not self.memo_max_entries:
+            return
+        with self._memo_lock:
+            memo = self._memo.get(tenant)
+            if memo is not None and memo[0] > version:
+                return
+            self._memo[tenant] = (version, config)
+            self._memo.move_to_end(tenant)
+            while len(self._memo) > self.memo_max_entries:
+                self._memo.popitem(last=False)
+
+
+def main(argv=None) -> None:
+    """
+    Import an existing tenants.json into a SQLite tenant database:
+
+        python -m services.sqlite_store tenants.json tenants.db [--overwrite]
+    """
+    parser = argparse.ArgumentParser(description="Import tenants.json into the SQLite tenant store.")
+    parser.add_argument("source", help="Path to tenants.json")
+    parser.add_argument("database", help="Path to the SQLite database (created if missing)")
+    parser.add_argument("--overwrite", action="store_true", help="Replace tenants that already exist in the database")
+    args = parser.parse_args(argv)
+
+    tenants = read_json_file(args.source)
+    store = SqliteTenantStore(args.database)
+    written = store.import_tenants(tenants, overwrite=args.overwrite)
+    print(f"Imported {written} of {len(tenants)} tenant(s) from {args.source} into {args.database}")
+
+
+if __name__ == "__main__":
+    main()
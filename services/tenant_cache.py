@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Optional, Tuple
+
+# ===================
+# IN-PROCESS TENANT CACHE
+# ===================
+
+_UNLOADED = object()
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Cheap change detector for a file: (mtime_ns, size, inode).
+    Returns None if the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def copy_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy a tenant config deep enough that callers may mutate it
+    (e.g. rewriting `logo` or updating `features`) without touching the cache.
+    """
+    copied = dict(config)
+    if isinstance(copied.get("features"), dict):
+        copied["features"] = dict(copied["features"])
+    return copied
+
+
+class TenantCache:
+    """
+    Keeps parsed tenant configs in memory and reloads them only when the
+    backing storage signature changes.
+
+    Up to `max_entries` tenants are kept; beyond that the least recently used
+    ones are evicted and a lookup for an evicted tenant triggers a reload.
+    The keys of every stored tenant are kept regardless, so a lookup for a
+    tenant that does not exist never does.
+    """
+
+    def __init__(
+            self,
+            loader: Callable[[], Dict[str, Dict[str, Any]]],
+            signature: Callable[[], Hashable],
+            max_entries: int = 10000
+    ):
+        self._loader = loader
+        self._signature_fn = signature
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._signature: Any = _UNLOADED
+        self._complete = False
+        # Every tenant key at the cached signature (None until loaded)
+        self._keys: Optional[FrozenSet[str]] = None
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def get(self, tenant: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached config for `tenant` (not a copy), or None if the
+        tenant does not exist.
+        """
+        with self._lock:
+            current = self._signature_fn()
+            if current != self._signature:
+                self._reload(current)
+
+            config = self._entries.get(tenant)
+            if config is not None:
+                self._entries.move_to_end(tenant)
+                self.hits += 1
+                return config
+            if self._complete or (self._keys is not None and tenant not in self._keys):
+                # Not stored at this signature, no need to go back to storage
+                self.hits += 1
+                return None
+
+            # Tenant was evicted (or never cached): go back to storage
+            self.misses += 1
+            data = self._load()
+            config = data.get(tenant)
+            if config is not None:
+                self._entries[tenant] = config
+                self._evict()
+            return config
+
+    def prime(self, data: Dict[str, Dict[str, Any]], signature: Hashable) -> None:
+        """
+        Replace the cached contents after a local write, so the process does
+        not need to re-read what it just stored.
+        """
+        with self._lock:
+            self._fill(data)
+            self._signature = signature
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._signature = _UNLOADED
+            self._complete = False
+            self._keys = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    # -------------------
+    # Internals (lock held)
+    # -------------------
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        self.reloads += 1
+        return self._loader()
+
+    def _reload(self, signature: Hashable) -> None:
+        self._fill(self._load())
+        self._signature = signature
+
+    def _fill(self, data: Dict[str, Dict[str, Any]]) -> None:
+        self._keys = frozenset(data)
+        if len(data) <= self.max_entries:
+            self._entries = OrderedDict(data)
+            self._complete = True
+            return
+        # Too many tenants: keep the ones that were hot before, in recency order
+        entries = OrderedDict()
+        for key in self._entries:
+            if key in data:
+                entries[key] = data[key]
+        self._entries = entries
+        self._complete = False
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            self._complete = False
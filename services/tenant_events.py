@@ -0,0 +1,202 @@
+import asyncio
+import json
+import threading
+import itertools
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+# ===================
+# TENANT CHANGE EVENTS
+# ===================
+#
+# In-process pub/sub for tenant config/feature changes. Every committed write
+# gets a monotonically increasing version; the last `history_size` events are
+# retained so reconnecting clients can resume from their last-seen version.
+# Subscribers only see writes made by this worker process.
+
+
+class TenantEvent:
+    __slots__ = ("version", "tenant", "kind", "changes", "_sse")
+
+    def __init__(self, version: int, tenant: str, kind: str, changes: Dict[str, Any]):
+        self.version = version
+        self.tenant = tenant
+        self.kind = kind
+        self.changes = changes
+        self._sse: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": self.version, "tenant": self.tenant, "type": self.kind, "changes": self.changes}
+
+    def sse(self, epoch: str) -> str:
+        # Formatted once and shared by every subscriber of the tenant
+        if self._sse is None:
+            self._sse = format_sse(self.kind, self.to_dict(), f"{epoch}-{self.version}")
+        return self._sse
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """
+    One stream's bounded buffer. Idle subscriptions cost a deque and an
+    asyncio.Event; if a slow client lets `max_buffer` events pile up the
+    buffer is dropped and the client is told to resync instead.
+    """
+
+    def __init__(self, tenant: str, loop: asyncio.AbstractEventLoop, max_buffer: int):
+        self.tenant = tenant
+        self.loop = loop
+        self.max_buffer = max_buffer
+        self.overflowed = False
+        # Bus version at subscription time; later events reach the buffer
+        self.version = 0
+        self._buffer: Deque[TenantEvent] = deque()
+        self._wakeup = asyncio.Event()
+
+    def deliver(self, event: TenantEvent) -> None:
+        """Runs on the subscriber's event loop."""
+        if len(self._buffer) >= self.max_buffer:
+            self._buffer.clear()
+            self.overflowed = True
+        else:
+            self._buffer.append(event)
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: float) -> Tuple[List[TenantEvent], bool]:
+        """
+        Wait up to `timeout` seconds for events.
+        Returns (events, overflowed); both empty/False means the wait timed out.
+        """
+        if not self._buffer and not self.overflowed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return [], False
+        self._wakeup.clear()
+        events = list(self._buffer)
+        self._buffer.clear()
+        overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+
+
+class TenantEventBus:
+    def __init__(self, history_size: int = 1000, buffer_size: int = 100):
+        self.history_size = history_size
+        self.buffer_size = buffer_size
+        # Distinguishes event ids of this process from those of any other worker,
+        # including ones forked from the same parent or started in the same instant
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        self._history: Deque[TenantEvent] = deque(maxlen=history_size)
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, tenant: str, kind: str, changes: Dict[str, Any]) -> TenantEvent:
+        """Record a committed change and fan it out. Safe to call from any thread."""
+        with self._lock:
+            self.version += 1
+            event = TenantEvent(self.version, tenant, kind, changes)
+            self._history.append(event)
+            subscribers = list(self._subscribers.get(tenant, ()))
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.deliver, event)
+            except RuntimeError:
+                # Subscriber's loop is closed; it will be unsubscribed by its stream
+                pass
+        return event
+
+    def subscribe(self, tenant: str, last_event_id: Optional[str] = None) -> Tuple[Subscription, List[TenantEvent], bool]:
+        """
+        Register a subscription for `tenant` on the running event loop.
+
+        Returns:
+            (subscription, missed events to replay, whether the client must resync
+            because its last-seen version is no longer in the retained history).
+        """
+        sub = Subscription(tenant, asyncio.get_running_loop(), self.buffer_size)
+        with self._lock:
+            self._subscribers.setdefault(tenant, set()).add(sub)
+            sub.version = self.version
+            if last_event_id is None:
+                return sub, [], False
+            since = self._parse_event_id(last_event_id)
+            oldest = self._history[0].version if self._history else self.version + 1
+            if since is None or since > self.version or since < oldest - 1:
+                return sub, [], True
+            backlog = [event for event in self._history if event.version > since and event.tenant == tenant]
+        return sub, backlog, False
+
+    def since(self, version: int, limit: int) -> Optional[Tuple[List[TenantEvent], int]]:
+        """
+        Up to `limit` events (all tenants) after `version`, in version order.
+
+        Returns:
+            (events, current bus version), or None if `version` is no longer
+            (or not yet) covered by the retained history.
+        """
+        with self._lock:
+            oldest = self._history[0].version if self._history else self.version + 1
+            if version < oldest - 1 or version > self.version:
+                return None
+            # Retained versions are consecutive, so the first one wanted is at a known offset
+            start = version - oldest + 1
+            return list(itertools.islice(self._history, start, start + max(0, limit))), self.version
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(sub.tenant)
+            if subscribers is not None:
+                subscribers.discard(sub)
+                if not subscribers:
+                    del self._subscribers[sub.tenant]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "version": self.version,
+                "retained_events": len(self._history),
+                "subscribers": sum(len(subs) for subs in self._subscribers.values()),
+            }
+
+    def _parse_event_id(self, last_event_id: str) -> Optional[int]:
+        epoch, _, version = last_event_id.strip().rpartition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    async def stream(self, tenant: str, last_event_id: Optional[str], heartbeat: float) -> AsyncIterator[str]:
+        """
+        Server-Sent Events text for one client. The subscription is created on
+        first iteration and removed when the client goes away.
+        """
+        sub, backlog, resync = self.subscribe(tenant, last_event_id)
+        try:
+            yield "retry: 5000\n\n"
+            if resync:
+                yield self._resync_event(tenant, sub.version)
+            for event in backlog:
+                yield event.sse(self.epoch)
+            while True:
+                events, overflowed = await sub.next_batch(heartbeat)
+                if overflowed:
+                    yield self._resync_event(tenant, events[0].version - 1 if events else self.version)
+                elif not events:
+                    yield ": heartbeat\n\n"
+                for event in events:
+                    yield event.sse(self.epoch)
+        finally:
+            self.unsubscribe(sub)
+
+    def _resync_event(self, tenant: str, version: int) -> str:
+        # Client must refetch /config and /features, then continue from this id
+        return format_sse("resync", {"tenant": tenant, "version": version}, f"{self.epoch}-{version}")
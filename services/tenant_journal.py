@@ -0,0 +1,349 @@
+import json
+import logging
+import os
+import threading
+from collections import ChainMap
+from typing import Any, Dict, Hashable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: single process only
+    fcntl = None
+
+from services.tenant_store import TenantBatchWrite, TenantChange, TenantStore, TenantWrite, atomic_write_json, read_json_file
+
+logger = logging.getLogger("MintTenantCore.TenantJournal")
+
+# ===================
+# JOURNALED TENANT STORAGE
+# ===================
+#
+# The snapshot (tenants.json) holds the full store; every mutation since the
+# last compaction is appended to the journal as one JSON line. All record
+# types are plain assignments, so replaying a record twice is harmless; this
+# is what makes a crash in the middle of a compaction recoverable.
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+def apply_record(tenants: Dict[str, Dict[str, Any]], record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply one journal record to `tenants` and return the tenant's new config.
+    Configs are replaced, never mutated in place, so readers holding the old
+    dict keep a consistent view.
+    """
+    op = record["op"]
+    tenant = record["tenant"]
+
+    if op == "set":
+        config = dict(record["config"])
+    elif op == "update":
+        config = {**tenants.get(tenant, {}), **record["updates"]}
+    elif op == "features":
+        current = tenants.get(tenant, {})
+        config = {**current, "features": {**current.get("features", {}), **record["features"]}}
+    else:
+        raise Exception(f"Unknown journal record type '{op}'.")
+
+    tenants[tenant] = config
+    return config
+
+
+class TenantJournal(TenantStore):
+    """
+    Append-only tenant store: snapshot + journal of delta records, with
+    background compaction into a fresh snapshot.
+
+    Single writer process: `open` takes an exclusive flock on `<journal>.lock`
+    (the journal itself is swapped out by compaction) and fails if another
+    process holds it. The in-memory state is authoritative once the journal
+    has been replayed.
+    """
+
+    def __init__(
+            self,
+            snapshot_path: str,
+            journal_path: str,
+            fsync: str = "always",
+            fsync_interval: float = 1.0,
+            compact_every: int = 1000
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid journal fsync policy '{fsync}', expected one of {FSYNC_POLICIES}.")
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compacting_path = f"{journal_path}.compacting"
+        self.lock_path = f"{journal_path}.lock"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self._tenants: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._file = None
+        self._lock_file = None
+        self._dirty = False
+        self._closed = threading.Event()
+        self.version = 0
+        self.records_since_compaction = 0
+        self.compactions = 0
+
+    # -------------------
+    # Lifecycle
+    # -------------------
+
+    def open(self) -> "TenantJournal":
+        """
+        Replay snapshot + journal(s) and open the journal for appending.
+
+        Raises:
+            Exception: if another process already has the journal open, or a
+                record before the last one is corrupted.
+        """
+        with self._lock:
+            self._acquire_file_lock()
+            try:
+                self._tenants = read_json_file(self.snapshot_path)
+                # A leftover `.compacting` segment means we crashed mid-compaction;
+                # its records are older than anything in the live journal.
+                replayed = self._replay(self.compacting_path) + self._replay(self.journal_path)
+            except Exception:
+                self._release_file_lock()
+                raise
+            self.records_since_compaction = replayed
+            self._file = open(self.journal_path, "a")
+            self._closed.clear()
+        if self.fsync == "interval":
+            threading.Thread(target=self._flush_loop, name="tenant-journal-fsync", daemon=True).start()
+        if replayed:
+            logger.info("Replayed %d tenant journal record(s)", replayed)
+        return self
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+            self._release_file_lock()
+
+    # -------------------
+    # Reads
+    # -------------------
+
+    def get(self, tenant: str) -> Optional[Dict[str, Any]]:
+        return self._tenants.get(tenant)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._tenants)
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        return self.snapshot()
+
+    def signature(self) -> Hashable:
+        return self.version
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "version": self.version,
+            "tenants": len(self._tenants),
+            "records_since_compaction": self.records_since_compaction,
+            "compactions": self.compactions,
+        }
+
+    # -------------------
+    # Writes
+    # -------------------
+
+    def apply(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate, persist and apply one mutation record.
+
+        Raises:
+            Exception: "Tenant already exists." / "Tenant not found." on precondition failure.
+        """
+        with self._lock:
+            self._check(self._tenants, record)
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._file.flush()
+            self._dirty = True
+            if self.fsync == "always":
+                self._sync()
+
+            config = apply_record(self._tenants, record)
+            self.version += 1
+            self.records_since_compaction += 1
+            if self.compact_every and self.records_since_compaction >= self.compact_every:
+                self.compact_in_background()
+            return config
+
+    def create(self, tenant: str, config: Dict[str, Any]) -> TenantWrite:
+        return self._write({"op": "set", "tenant": tenant, "config": config, "create": True})
+
+    def update_config(self, tenant: str, updates: Dict[str, Any]) -> TenantWrite:
+        return self._write({"op": "update", "tenant": tenant, "updates": updates})
+
+    def update_features(self, tenant: str, features: Dict[str, Any]) -> TenantWrite:
+        return self._write({"op": "features", "tenant": tenant, "features": features})
+
+    def apply_batch(self, changes: List[TenantChange]) -> TenantBatchWrite:
+        """All accepted changes appended with a single write + fsync."""
+        with self._lock:
+            before = self.version
+            # Changes are staged on top of the live state, which is only updated once they are durable
+            staged: Dict[str, Dict[str, Any]] = {}
+            view = ChainMap(staged, self._tenants)
+            lines: List[str] = []
+            results: List[Any] = []
+            for change in changes:
+                record = self._record(change)
+                try:
+                    self._check(view, record)
+                except Exception as e:
+                    results.append(e)
+                    continue
+                results.append(apply_record(view, record))
+                lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+            if lines:
+                self._file.write("".join(lines))
+                self._file.flush()
+                self._dirty = True
+                if self.fsync == "always":
+                    self._sync()
+                self._tenants.update(staged)
+                self.version += len(lines)
+                self.records_since_compaction += len(lines)
+                if self.compact_every and self.records_since_compaction >= self.compact_every:
+                    self.compact_in_background()
+            return TenantBatchWrite(results, before, self.version)
+
+    @staticmethod
+    def _record(change: TenantChange) -> Dict[str, Any]:
+        if change.op == "create":
+            return {"op": "set", "tenant": change.tenant, "config": change.data, "create": True}
+        if change.op == "update_config":
+            return {"op": "update", "tenant": change.tenant, "updates": change.data}
+        if change.op == "update_features":
+            return {"op": "features", "tenant": change.tenant, "features": change.data}
+        raise ValueError(f"Unknown tenant change '{change.op}'.")
+
+    @staticmethod
+    def _check(tenants, record: Dict[str, Any]) -> None:
+        exists = record["tenant"] in tenants
+        if record["op"] == "set" and record.get("create") and exists:
+            raise Exception("Tenant already exists.")
+        if record["op"] in ("update", "features") and not exists:
+            raise Exception("Tenant not found.")
+
+    def _write(self, record: Dict[str, Any]) -> TenantWrite:
+        with self._lock:
+            before = self.version
+            config = self.apply(record)
+            return TenantWrite(config, before, self.version)
+
+    def compact_in_background(self) -> None:
+        if self._compact_lock.locked():
+            return
+        threading.Thread(target=self.compact, name="tenant-journal-compact", daemon=True).start()
+
+    def compact(self) -> None:
+        """
+        Write the current state to a new snapshot (temp file + rename) and
+        drop the journal records it covers.
+        """
+        if not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                if os.path.exists(self.compacting_path):
+                    # Previous compaction never finished; fold it into this one
+                    self._append_file(self.journal_path, self.compacting_path)
+                self._sync()
+                self._file.close()
+                os.replace(self.journal_path, self.compacting_path)
+                self._file = open(self.journal_path, "a")
+                data = dict(self._tenants)
+                self.records_since_compaction = 0
+
+            # Heavy part runs without blocking writers
+            atomic_write_json(self.snapshot_path, data)
+            os.remove(self.compacting_path)
+            self.compactions += 1
+            logger.info("Compacted tenant journal into snapshot (%d tenants)", len(data))
+        except Exception:
+            logger.exception("Tenant journal compaction failed")
+        finally:
+            self._compact_lock.release()
+
+    # -------------------
+    # Internals
+    # -------------------
+
+    def _replay(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        good_offset = 0
+        with open(path, "rb") as f:
+            lines = f.readlines()
+        for index, line in enumerate(lines):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("torn record")
+                apply_record(self._tenants, json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                # Torn line, bad JSON or a record missing its fields
+                if index == len(lines) - 1:
+                    # Crash mid-append: drop the partial trailing record
+                    logger.warning("Truncating partial record at end of %s", path)
+                    with open(path, "r+b") as f:
+                        f.truncate(good_offset)
+                    break
+                raise Exception(f"Corrupted tenant journal {os.path.basename(path)}.")
+            good_offset += len(line)
+            count += 1
+        self.version += count
+        return count
+
+    def _acquire_file_lock(self) -> None:
+        if fcntl is None or self._lock_file is not None:
+            return
+        lock_file = open(self.lock_path, "a+b")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise Exception(f"Tenant journal {os.path.basename(self.journal_path)} is in use by another process.")
+        self._lock_file = lock_file
+
+    def _release_file_lock(self) -> None:
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _append_file(self, src: str, dest: str) -> None:
+        self._sync()
+        with open(src, "rb") as f_src, open(dest, "ab") as f_dest:
+            f_dest.write(f_src.read())
+            f_dest.flush()
+            os.fsync(f_dest.fileno())
+        self._file.close()
+        os.replace(dest, src)
+        self._file = open(src, "a")
+
+    def _sync(self) -> None:
+        if self._file is not None and self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.fsync_interval):
+            with self._lock:
+                try:
+                    self._sync()
+                except (OSError, ValueError):
+                    logger.exception("Tenant journal fsync failed")
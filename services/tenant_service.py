@@ -1,6 +1,11 @@
 import os
 import json
-from typing import Dict, Any, Optional
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, List
 from config import (
     DEFAULT_FEATURE_FLAGS,
     DEFAULT_PRIMARY_COLOR,
@@ -8,41 +13,232 @@ from config import (
     DEFAULT_LOGO,
     DEFAULT_LAYOUT,
     DEFAULT_BRAND_NAME,
+    TENANT_CACHE_MAX_ENTRIES,
+    TENANT_STORAGE_MODE,
+    TENANT_SQLITE_PATH,
+    TENANT_JOURNAL_FSYNC,
+    TENANT_JOURNAL_FSYNC_INTERVAL,
+    TENANT_JOURNAL_COMPACT_EVERY,
+    TENANT_SHARED_SNAPSHOT,
+    TENANT_SNAPSHOT_PATH,
+    TENANT_SNAPSHOT_CHECK_INTERVAL,
+    TENANT_EVENT_HISTORY,
+    TENANT_EVENT_BUFFER,
 )
+from services.tenant_cache import copy_config
+from services.tenant_store import TenantChange, TenantStore, TenantWrite, create_tenant_store
+from services.feature_index import FeatureIndex
+from services.domain_index import DomainIndex, normalize_domains
+from services.tenant_events import TenantEventBus
+from utils.metrics import metrics
+from utils.single_flight import single_flight
 
 TENANTS_FILE = os.path.join(os.path.dirname(__file__), "../tenants.json")
+TENANTS_JOURNAL_FILE = os.path.join(os.path.dirname(__file__), "../tenants.journal")
+
+# Storage backend selected by TENANT_STORAGE_MODE: "file" (tenants.json),
+# "journal" (tenants.json snapshot + tenants.journal) or "sqlite",
+# optionally behind the cross-worker shared snapshot (TENANT_SHARED_SNAPSHOT)
+_store: TenantStore = create_tenant_store(
+    TENANT_STORAGE_MODE,
+    path=TENANTS_FILE,
+    journal_path=TENANTS_JOURNAL_FILE,
+    sqlite_path=TENANT_SQLITE_PATH,
+    cache_max_entries=TENANT_CACHE_MAX_ENTRIES,
+    fsync=TENANT_JOURNAL_FSYNC,
+    fsync_interval=TENANT_JOURNAL_FSYNC_INTERVAL,
+    compact_every=TENANT_JOURNAL_COMPACT_EVERY,
+    snapshot_path=TENANT_SNAPSHOT_PATH if TENANT_SHARED_SNAPSHOT else None,
+    snapshot_check_interval=TENANT_SNAPSHOT_CHECK_INTERVAL,
+)
+
+
+def use_tenant_store(store: TenantStore) -> TenantStore:
+    """
+    Swap the storage backend (tests, tools, benchmarks). Derived indexes are
+    rebuilt from the new store on next use. Returns the previous store.
+    """
+    global _store, _derived_signature, _derived_checked, _feed_signature
+    previous, _store = _store, store
+    with _derived_lock:
+        _derived_signature = _NOT_BUILT
+        _derived_checked = 0.0
+        _feed_signature = _NOT_BUILT
+    with _etags_lock:
+        _etags.clear()
+    return previous
+
+
+# Concurrent full reads of the same stored state share one parse
+_full_loads = single_flight("tenant_store.load_all")
+
+
+def _load_all() -> Dict[str, Dict[str, Any]]:
+    with metrics.timed("tenant_store.load_all"):
+        return _store.load_all()
 
 
 def load_tenants() -> Dict[str, Dict[str, Any]]:
-    try:
-        with open(TENANTS_FILE, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError:
-        raise Exception("Corrupted tenants.json file.")
+    """
+    All stored tenants (shared with concurrent callers, do not mutate). Keyed by the
+    store signature, so a caller never joins a read that started before the last write.
+    """
+    return _full_loads.do((id(_store), _store.signature()), _load_all)
 
 
-def save_tenants(data: Dict[str, Dict[str, Any]]):
-    with open(TENANTS_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def _lookup(tenant: str) -> Optional[Dict[str, Any]]:
+    with metrics.timed("tenant_store.get"):
+        return _store.get(tenant)
 
 
-def create_tenant(
-        tenant: str,
+def _content_etag(value: Any) -> str:
+    digest = hashlib.sha1(json.dumps(value, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+# tenant -> (config object the tags were computed from, config etag, features etag).
+# Stored configs are replaced rather than mutated on change, so object identity
+# tells us whether the memoized tags are still current. Bounded like the tenant
+# cache, so it never keeps more configs alive than the store itself does.
+_etags: "OrderedDict[str, Tuple[Dict[str, Any], str, str]]" = OrderedDict()
+_etags_lock = threading.Lock()
+
+
+def _etags_for(tenant: str, config: Dict[str, Any]) -> Tuple[str, str]:
+    with _etags_lock:
+        memo = _etags.get(tenant)
+        if memo is not None and memo[0] is config:
+            _etags.move_to_end(tenant)
+            return memo[1], memo[2]
+    config_etag = _content_etag(config)
+    features_etag = _content_etag(config.get("features", {}))
+    with _etags_lock:
+        _etags[tenant] = (config, config_etag, features_etag)
+        _etags.move_to_end(tenant)
+        while len(_etags) > max(1, TENANT_CACHE_MAX_ENTRIES):
+            _etags.popitem(last=False)
+    return config_etag, features_etag
+
+
+# ===================
+# DERIVED INDEXES
+# ===================
+# Built lazily from the full store, then maintained incrementally by the write
+# paths below. Another process may change the store too, so the store
+# signature the indexes were built from is remembered and compared.
+
+feature_index = FeatureIndex()
+domain_index = DomainIndex()
+
+_NOT_BUILT = object()
+_derived_signature: Any = _NOT_BUILT
+# time.monotonic() of the last signature check
+_derived_checked = 0.0
+_derived_lock = threading.RLock()
+
+
+def _refresh_derived() -> None:
+    global _derived_signature, _derived_checked
+    with _derived_lock:
+        signature = _store.signature()
+        if signature != _derived_signature:
+            tenants = _full_loads.do((id(_store), signature), _load_all)
+            with metrics.timed("feature_index.rebuild"):
+                feature_index.rebuild(tenants)
+            domain_index.rebuild(tenants)
+            _derived_signature = signature
+        _derived_checked = time.monotonic()
+
+
+def derived_indexes_fresh(max_age: float) -> bool:
+    """
+    True if the derived indexes were built and checked against the store
+    within the last `max_age` seconds, i.e. may be used without any I/O.
+    """
+    return _derived_signature is not _NOT_BUILT and time.monotonic() - _derived_checked < max_age
+
+
+# Change notifications for streaming subscribers (see GET /api/{tenant}/events)
+tenant_events = TenantEventBus(history_size=TENANT_EVENT_HISTORY, buffer_size=TENANT_EVENT_BUFFER)
+
+# The change feed (GET /tenants/changes) is built from this worker's writes only.
+# It is complete while every store change since the last check was one of them:
+# _feed_signature follows the store signature through local writes, and a store
+# that moved anyway (another worker, a hand edit) gets a new feed epoch, which
+# sends every client back to a snapshot.
+_feed_signature: Any = _NOT_BUILT
+_feed_epoch = uuid.uuid4().hex
+
+
+def _tenant_changed(tenant: str, write: TenantWrite, kind: str, changes: Dict[str, Any]) -> None:
+    """
+    Propagate a committed local write: publish the delta to subscribers and
+    apply it to the derived indexes.
+    """
+    _tenants_changed([(tenant, write.config, kind, changes)], write.before, write.after)
+
+
+def _tenants_changed(
+        changed: List[Tuple[str, Dict[str, Any], str, Dict[str, Any]]],
+        before: Any,
+        after: Any
+) -> None:
+    """_tenant_changed for several (tenant, new config, kind, changes) committed together."""
+    global _derived_signature, _feed_signature
+    for tenant, _, kind, changes in changed:
+        tenant_events.publish(tenant, kind, changes)
+    with _derived_lock:
+        if before == _feed_signature:
+            _feed_signature = after
+        if _derived_signature is _NOT_BUILT:
+            return
+        if before != _derived_signature:
+            # Indexes were already behind another change; rebuild on next use
+            _derived_signature = _NOT_BUILT
+            return
+        for tenant, config, _, _ in changed:
+            feature_index.update(tenant, config.get("features", {}), config)
+            domain_index.update(tenant, config)
+        _derived_signature = after
+
+
+def _claim_domains(tenant: str, domains: List[str]) -> List[str]:
+    """Normalized custom domains for `tenant`. Raises if another tenant already uses one."""
+    normalized = sorted(normalize_domains(domains))
+    _refresh_derived()
+    for domain in normalized:
+        owner = domain_index.owner(domain)
+        if owner is not None and owner != tenant:
+            raise Exception(f"Domain '{domain}' already belongs to another tenant.")
+    return normalized
+
+
+def resolve_tenant_host(host: str) -> Optional[Tuple[str, str]]:
+    """Tenant owning a Host header value: (tenant, "domain" | "subdomain"), or None."""
+    _refresh_derived()
+    return domain_index.resolve(host)
+
+
+def resolve_tenant_host_cached(host: str) -> Optional[Tuple[str, str]]:
+    """resolve_tenant_host from the in-memory index only; check derived_indexes_fresh() first."""
+    return domain_index.resolve(host)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Cache/storage counters of the tenant store (hit/miss/reload/eviction for the file backend)."""
+    return _store.stats()
+
+
+def _new_tenant_config(
         primaryColor: Optional[str] = None,
         secondaryColor: Optional[str] = None,
         logo: Optional[str] = None,
         brandName: Optional[str] = None,
         layout: Optional[str] = None,
-        features: Optional[Dict[str, bool]] = None
+        features: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
-    tenants = load_tenants()
-
-    if tenant in tenants:
-        raise Exception("Tenant already exists.")
-
-    config = {
+    """A new tenant's config, with defaults for every field not given."""
+    return {
         "features": features if features is not None else DEFAULT_FEATURE_FLAGS.copy(),
         "primaryColor": primaryColor or DEFAULT_PRIMARY_COLOR,
         "secondaryColor": secondaryColor or DEFAULT_SECONDARY_COLOR,
@@ -51,45 +247,241 @@ def create_tenant(
         "layout": layout or DEFAULT_LAYOUT,
     }
 
-    tenants[tenant] = config
-    save_tenants(tenants)
-    return config
+
+def create_tenant(
+        tenant: str,
+        primaryColor: Optional[str] = None,
+        secondaryColor: Optional[str] = None,
+        logo: Optional[str] = None,
+        brandName: Optional[str] = None,
+        layout: Optional[str] = None,
+        features: Optional[Dict[str, Any]] = None,
+        domains: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    config = _new_tenant_config(primaryColor, secondaryColor, logo, brandName, layout, features)
+    if domains:
+        config["domains"] = _claim_domains(tenant, domains)
+
+    with metrics.timed("tenant_store.write"):
+        write = _store.create(tenant, config)
+    _tenant_changed(tenant, write, "created", write.config)
+    return copy_config(write.config)
 
 
 def get_tenant_config(tenant: str) -> Optional[Dict[str, Any]]:
-    tenants = load_tenants()
-    return tenants.get(tenant)
+    config = _lookup(tenant)
+    return copy_config(config) if config is not None else None
+
+
+def get_tenant_etag(tenant: str, part: str = "config") -> Optional[str]:
+    """
+    Content-hash ETag of a tenant's config (`part="config"`) or feature flags
+    (`part="features"`). Any change to the content yields a new tag.
+    Returns None if the tenant does not exist.
+    """
+    config = _lookup(tenant)
+    if config is None:
+        return None
+    config_etag, features_etag = _etags_for(tenant, config)
+    return features_etag if part == "features" else config_etag
+
+
+def get_tenant_config_and_etag(tenant: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Config copy plus its ETag, taken from the same stored version."""
+    config = _lookup(tenant)
+    if config is None:
+        return None, None
+    return copy_config(config), _etags_for(tenant, config)[0]
+
+
+def get_tenant_config_ref(tenant: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    The stored config object itself (NOT a copy, must not be mutated) plus its
+    ETag. Changes replace the object, so callers may memoize on its identity.
+    """
+    config = _lookup(tenant)
+    if config is None:
+        return None, None
+    return config, _etags_for(tenant, config)[0]
 
 
 def update_tenant_config(tenant: str, updates: dict) -> Dict[str, Any]:
-    tenants = load_tenants()
+    if updates.get("domains") is not None:
+        updates = {**updates, "domains": _claim_domains(tenant, updates["domains"])}
+    with metrics.timed("tenant_store.write"):
+        write = _store.update_config(tenant, updates)
+    _tenant_changed(tenant, write, "config", updates)
+    return copy_config(write.config)
 
-    if tenant not in tenants:
-        raise Exception("Tenant not found.")
 
-    tenants[tenant].update(updates)
-    save_tenants(tenants)
-    return tenants[tenant]
+def apply_tenant_batch(rows: List[Tuple[str, str, Dict[str, Any]]]) -> List[Tuple[str, Any]]:
+    """
+    Create/update many tenants in one storage commit.
+
+    `rows` are (op, tenant, fields): "create" takes the create_tenant fields
+    (missing ones get defaults), "update" the update_tenant_config fields.
+    Returns one ("created" | "updated", config copy) or ("error", message) per row;
+    a failed row does not stop the others.
+    """
+    outcomes: List[Optional[Tuple[str, Any]]] = [None] * len(rows)
+    changes: List[TenantChange] = []
+    submitted: List[Tuple[int, str, Dict[str, Any]]] = []
+    # Custom domains claimed by earlier rows of this batch
+    claimed: Dict[str, str] = {}
+
+    for index, (op, tenant, fields) in enumerate(rows):
+        try:
+            fields = dict(fields)
+            domains = fields.pop("domains", None)
+            if op == "create":
+                data = _new_tenant_config(**fields)
+                kind = "created"
+            elif op == "update":
+                data = fields
+                kind = "config"
+            else:
+                raise Exception(f"Unknown operation '{op}', expected 'create' or 'update'.")
+            if domains is not None:
+                normalized = _claim_domains(tenant, domains)
+                for domain in normalized:
+                    if claimed.setdefault(domain, tenant) != tenant:
+                        raise Exception(f"Domain '{domain}' already belongs to another tenant.")
+                if normalized or op == "update":
+                    data["domains"] = normalized
+        except Exception as e:
+            outcomes[index] = ("error", str(e))
+            continue
+        changes.append(TenantChange("create" if op == "create" else "update_config", tenant, data))
+        submitted.append((index, kind, data))
+
+    if changes:
+        with metrics.timed("tenant_store.write_batch"):
+            batch = _store.apply_batch(changes)
+        changed = []
+        for (index, kind, data), change, result in zip(submitted, changes, batch.results):
+            if isinstance(result, Exception):
+                outcomes[index] = ("error", str(result))
+                continue
+            changed.append((change.tenant, result, kind, result if kind == "created" else data))
+            outcomes[index] = ("created" if kind == "created" else "updated", copy_config(result))
+        _tenants_changed(changed, batch.before, batch.after)
+    return outcomes
 
 
-def get_tenant_features(tenant: str) -> Dict[str, bool]:
-    tenants = load_tenants()
+def get_tenant_features(tenant: str) -> Dict[str, Any]:
+    config = _lookup(tenant)
 
-    if tenant not in tenants:
+    if config is None:
         raise Exception("Tenant not found.")
 
-    return tenants[tenant].get("features", {})
+    return dict(config.get("features", {}))
 
 
-def update_tenant_features(tenant: str, features_update: Dict[str, bool]) -> Dict[str, bool]:
-    tenants = load_tenants()
+def get_tenant_features_and_etag(tenant: str) -> Tuple[Dict[str, Any], str]:
+    config = _lookup(tenant)
 
-    if tenant not in tenants:
+    if config is None:
         raise Exception("Tenant not found.")
 
-    current = tenants[tenant].get("features", {})
-    current.update(features_update)
-    tenants[tenant]["features"] = current
+    return dict(config.get("features", {})), _etags_for(tenant, config)[1]
+
+
+def update_tenant_features(tenant: str, features_update: Dict[str, Any]) -> Dict[str, Any]:
+    with metrics.timed("tenant_store.write"):
+        write = _store.update_features(tenant, features_update)
+    _tenant_changed(tenant, write, "features", features_update)
+    return dict(write.config.get("features", {}))
+
+
+def evaluate_features(
+        checks: List[Tuple[str, str]],
+        tenants: List[str],
+        features: List[str]
+) -> Tuple[List[Optional[bool]], Dict[str, Optional[Dict[str, bool]]]]:
+    """
+    Bulk feature flag evaluation from the feature index.
 
-    save_tenants(tenants)
-    return current
+    Returns:
+        (one result per (tenant, feature) check, tenant -> {feature: enabled} matrix).
+        Unknown tenants evaluate to None.
+    """
+    _refresh_derived()
+    results = [feature_index.is_enabled(tenant, feature) for tenant, feature in checks]
+    return results, feature_index.evaluate(tenants, features)
+
+
+def list_tenants(
+        features: Optional[Dict[str, bool]] = None,
+        fields: Optional[Dict[str, str]] = None,
+        after: Optional[str] = None,
+        limit: int = 50,
+        projection: Optional[List[str]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+    """
+    One page of tenants matching the feature flag / config field filters,
+    served from the feature index (see FeatureIndex.query).
+
+    Returns:
+        ([{"tenant": key, **config fields (only `projection`, if given)}], last tenant of the
+        page if there are more, total matches).
+    """
+    _refresh_derived()
+    tenants, next_after, total = feature_index.query(features, fields, after, limit)
+    items = []
+    for tenant in tenants:
+        config = _lookup(tenant) or {}
+        if projection is not None:
+            config = {name: config[name] for name in projection if name in config}
+        item = copy_config(config)
+        item["tenant"] = tenant
+        items.append(item)
+    return items, next_after, total
+
+
+def list_tenants_by_feature(feature: str, enabled: bool = True) -> List[str]:
+    """Tenants that have `feature` enabled (or, with enabled=False, not enabled)."""
+    _refresh_derived()
+    return feature_index.tenants_with(feature, enabled)
+
+
+def get_tenant_changes(since: Optional[int], epoch: Optional[str] = None, limit: int = 500) -> Dict[str, Any]:
+    """
+    Change records committed by this worker after version `since`, oldest first,
+    at most `limit` of them. Falls back to a full snapshot of every tenant when
+    `since` is None, from another `epoch` (process), older than the retained history,
+    or when the store was changed by someone other than this worker since.
+
+    Returns:
+        dict: epoch, version (pass back as `since`), snapshot flag, changes,
+        more (further changes are waiting) and, for snapshots, tenants.
+    """
+    global _feed_signature, _feed_epoch
+    with _derived_lock:
+        signature = _store.signature()
+        if signature != _feed_signature:
+            _feed_signature = signature
+            _feed_epoch = uuid.uuid4().hex
+        current_epoch = _feed_epoch
+    if since is not None and epoch == current_epoch:
+        delta = tenant_events.since(since, limit)
+        if delta is not None:
+            events, latest = delta
+            version = events[-1].version if events else since
+            return {
+                "epoch": current_epoch,
+                "version": version,
+                "snapshot": False,
+                "changes": [event.to_dict() for event in events],
+                "more": version < latest,
+            }
+    # Version first: changes committed while loading may be in the snapshot and then
+    # be returned again as deltas, which is harmless since they are replayed in order
+    version = tenant_events.version
+    return {
+        "epoch": current_epoch,
+        "version": version,
+        "snapshot": True,
+        "changes": [],
+        "more": False,
+        "tenants": load_tenants(),
+    }
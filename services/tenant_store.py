@@ -0,0 +1,254 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional
+
+from services.tenant_cache import TenantCache, file_signature
+
+# ===================
+# TENANT STORAGE BACKENDS
+# ===================
+
+
+class TenantWrite(NamedTuple):
+    """
+    Result of a committed write.
+    `before`/`after` are the store signatures immediately before and after the
+    write, so derived indexes can tell whether they may apply it incrementally.
+    """
+    config: Dict[str, Any]
+    before: Hashable
+    after: Hashable
+
+
+class TenantChange(NamedTuple):
+    """One mutation in a batch: `op` is "create", "update_config" or "update_features"."""
+    op: str
+    tenant: str
+    data: Dict[str, Any]
+
+
+class TenantBatchWrite(NamedTuple):
+    """
+    Result of a committed batch: one new config, or the Exception that
+    rejected it, per change; store signatures before and after the commit.
+    """
+    results: List[Any]
+    before: Hashable
+    after: Hashable
+
+
+def apply_change(current: Optional[Dict[str, Any]], change: TenantChange) -> Dict[str, Any]:
+    """
+    New config of `change.tenant` after applying `change` to its `current` config (None if absent).
+    Raises Exception("Tenant already exists.") / Exception("Tenant not found.").
+    """
+    if change.op == "create":
+        if current is not None:
+            raise Exception("Tenant already exists.")
+        return dict(change.data)
+    if current is None:
+        raise Exception("Tenant not found.")
+    if change.op == "update_config":
+        return {**current, **change.data}
+    if change.op == "update_features":
+        return {**current, "features": {**current.get("features", {}), **change.data}}
+    raise ValueError(f"Unknown tenant change '{change.op}'.")
+
+
+class TenantStore:
+    """
+    Storage interface behind services.tenant_service.
+
+    Configs returned by `get`/`load_all` are shared with the store and must not
+    be mutated; backends replace a tenant's dict on every change instead of
+    updating it in place, so callers may rely on object identity to detect changes.
+    """
+
+    def get(self, tenant: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def exists(self, tenant: str) -> bool:
+        return self.get(tenant) is not None
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def signature(self) -> Hashable:
+        """Value that changes whenever the stored data changes, in any process."""
+        raise NotImplementedError
+
+    def create(self, tenant: str, config: Dict[str, Any]) -> TenantWrite:
+        """Raises Exception("Tenant already exists.") if the tenant exists."""
+        raise NotImplementedError
+
+    def update_config(self, tenant: str, updates: Dict[str, Any]) -> TenantWrite:
+        """Shallow-merge `updates` into the config. Raises Exception("Tenant not found.")."""
+        raise NotImplementedError
+
+    def update_features(self, tenant: str, features: Dict[str, Any]) -> TenantWrite:
+        """Merge `features` into the feature flags. Raises Exception("Tenant not found.")."""
+        raise NotImplementedError
+
+    def apply_batch(self, changes: List[TenantChange]) -> TenantBatchWrite:
+        """
+        Apply `changes` in order, in as few storage commits as the backend allows
+        (backends override this to commit once). A rejected change does not stop the others.
+        """
+        before = self.signature()
+        results: List[Any] = []
+        for change in changes:
+            try:
+                write = getattr(self, change.op)(change.tenant, change.data)
+                results.append(write.config)
+            except Exception as e:
+                results.append(e)
+        return TenantBatchWrite(results, before, self.signature())
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 4) -> None:
+    """
+    Write JSON to `path` via a temp file + fsync + rename, so readers and
+    crash recovery only ever see the old or the new file, never a truncated one.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_json_file(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        raise Exception(f"Corrupted {os.path.basename(path)} file.")
+
+
+class JsonFileTenantStore(TenantStore):
+    """
+    The original tenants.json storage: reads are served from an in-process
+    cache that reloads when the file changes, every write rewrites the file.
+    """
+
+    def __init__(self, path: str, cache_max_entries: int = 10000):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._cache = TenantCache(
+            loader=self.load_all,
+            signature=self.signature,
+            max_entries=cache_max_entries,
+        )
+
+    def get(self, tenant: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(tenant)
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        return read_json_file(self.path)
+
+    def signature(self) -> Hashable:
+        return file_signature(self.path)
+
+    def create(self, tenant: str, config: Dict[str, Any]) -> TenantWrite:
+        def mutate(tenants):
+            if tenant in tenants:
+                raise Exception("Tenant already exists.")
+            return dict(config)
+        return self._write(tenant, mutate)
+
+    def update_config(self, tenant: str, updates: Dict[str, Any]) -> TenantWrite:
+        def mutate(tenants):
+            if tenant not in tenants:
+                raise Exception("Tenant not found.")
+            return {**tenants[tenant], **updates}
+        return self._write(tenant, mutate)
+
+    def update_features(self, tenant: str, features: Dict[str, Any]) -> TenantWrite:
+        def mutate(tenants):
+            if tenant not in tenants:
+                raise Exception("Tenant not found.")
+            current = tenants[tenant]
+            return {**current, "features": {**current.get("features", {}), **features}}
+        return self._write(tenant, mutate)
+
+    def apply_batch(self, changes: List[TenantChange]) -> TenantBatchWrite:
+        """All changes in one rewrite of the file."""
+        with self._write_lock:
+            before = self.signature()
+            tenants = self.load_all()
+            results: List[Any] = []
+            for change in changes:
+                try:
+                    config = apply_change(tenants.get(change.tenant), change)
+                except Exception as e:
+                    results.append(e)
+                    continue
+                tenants[change.tenant] = config
+                results.append(config)
+            if any(not isinstance(result, Exception) for result in results):
+                atomic_write_json(self.path, tenants)
+            after = self.signature()
+            self._cache.prime(tenants, after)
+            return TenantBatchWrite(results, before, after)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+    def _write(self, tenant: str, mutate) -> TenantWrite:
+        with self._write_lock:
+            before = self.signature()
+            tenants = self.load_all()
+            config = mutate(tenants)
+            tenants[tenant] = config
+            atomic_write_json(self.path, tenants)
+            after = self.signature()
+            # This process just wrote the file, so refresh the cache without re-parsing it
+            self._cache.prime(tenants, after)
+            return TenantWrite(config, before, after)
+
+
+def create_tenant_store(mode: str, **options: Any) -> TenantStore:
+    """
+    Build the backend selected by TENANT_STORAGE_MODE ("file", "journal" or "sqlite"),
+    wrapped in the cross-worker shared snapshot when `snapshot_path` is given.
+    """
+    if options.get("snapshot_path") and mode == "journal":
+        raise ValueError("The shared tenant snapshot needs a multi-process store ('file' or 'sqlite'), not 'journal'.")
+    store = _create_backing_store(mode, **options)
+    if options.get("snapshot_path"):
+        from services.shared_snapshot import SharedSnapshotTenantStore
+        return SharedSnapshotTenantStore(
+            store,
+            options["snapshot_path"],
+            memo_max_entries=options.get("cache_max_entries", 10000),
+            backing_check_interval=options.get("snapshot_check_interval", 1.0),
+        ).open()
+    return store
+
+
+def _create_backing_store(mode: str, **options: Any) -> TenantStore:
+    if mode == "file":
+        return JsonFileTenantStore(options["path"], cache_max_entries=options.get("cache_max_entries", 10000))
+    if mode == "journal":
+        from services.tenant_journal import TenantJournal
+        return TenantJournal(
+            options["path"],
+            options["journal_path"],
+            fsync=options.get("fsync", "always"),
+            fsync_interval=options.get("fsync_interval", 1.0),
+            compact_every=options.get("compact_every", 1000),
+        ).open()
+    if mode == "sqlite":
+        from services.sqlite_store import SqliteTenantStore
+        return SqliteTenantStore(options["sqlite_path"], memo_max_entries=options.get("cache_max_entries", 10000))
+    raise ValueError(f"Unknown tenant storage mode '{mode}', expected 'file', 'journal' or 'sqlite'.")
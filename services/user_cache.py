@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# ===================
+# USER METADATA CACHE
+# ===================
+
+# Returned by UserMetadataCache.get when the uid is not cached at all
+# (as opposed to None, which means "cached as missing in Firestore")
+MISS = object()
+
+
+class UserMetadataCache:
+    """
+    Bounded TTL cache of Firestore `users/{uid}` documents.
+
+    Missing users are cached too (for `negative_ttl` seconds) so that
+    requests from users without a profile don't hit Firestore every time.
+
+    Every merge/invalidate bumps the uid's generation. A reader takes
+    generation(uid) before its Firestore read and passes it to put(), which
+    drops the document if a write happened in between, so a slow read can
+    never overwrite the write-through result with the old document.
+    """
+
+    def __init__(self, ttl: float = 60.0, negative_ttl: float = 10.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # uid -> generation of its last write, for the most recently written uids.
+        # A uid dropped from here falls back to _generation_floor, which is at least
+        # its last generation, so a put() that raced with that write is still refused.
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._generation_counter = 0
+        self._generation_floor = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def get(self, uid: str) -> Any:
+        """Return a copy of the cached metadata, None for a cached miss, or MISS."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is None or now >= entry[0]:
+                if entry is not None:
+                    del self._entries[uid]
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(uid)
+            if entry[1] is None:
+                self.negative_hits += 1
+                return None
+            self.hits += 1
+            return dict(entry[1])
+
+    def generation(self, uid: str) -> int:
+        """Take before reading `uid` from Firestore; see put()."""
+        with self._lock:
+            return self._generations.get(uid, self._generation_floor)
+
+    def put(self, uid: str, metadata: Optional[Dict[str, Any]], generation: Optional[int] = None) -> None:
+        """Cache `metadata`; if `generation` is given, only if `uid` was not written since it was taken."""
+        ttl = self.ttl if metadata is not None else self.negative_ttl
+        if not self.max_entries or ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and self._generations.get(uid, self._generation_floor) != generation:
+                return
+            self._entries[uid] = (time.monotonic() + ttl, dict(metadata) if metadata is not None else None)
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def merge(self, uid: str, fields: Dict[str, Any]) -> None:
+        """
+        Write-through after a Firestore `set(..., merge=True)`: update the cached
+        document if we hold it, otherwise start from just the written fields
+        when Firestore is known not to have had a document.
+        """
+        with self._lock:
+            self._bump(uid)
+            entry = self._entries.pop(uid, None)
+        if entry is None:
+            return
+        current = entry[1] if entry[1] is not None else {}
+        self.put(uid, {**current, **fields})
+
+    def invalidate(self, uid: str) -> None:
+        with self._lock:
+            self._bump(uid)
+            self._entries.pop(uid, None)
+
+    def _bump(self, uid: str) -> None:
+        # Caller holds the lock
+        self._generation_counter += 1
+        self._generations[uid] = self._generation_counter
+        self._generations.move_to_end(uid)
+        while len(self._generations) > max(1, self.max_entries):
+            _, dropped = self._generations.popitem(last=False)
+            self._generation_floor = max(self._generation_floor, dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
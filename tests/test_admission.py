@@ -0,0 +1,73 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from utils.admission import AdmissionController, AdmissionMiddleware, TokenBuckets
+
+def test_token_bucket_refills():
+    buckets = TokenBuckets(rate=2, burst=2, max_keys=2)
+    assert [buckets.acquire("a", now=0.0) for _ in range(2)] == [0.0, 0.0]
+    assert buckets.acquire("a", now=0.0) == 0.5
+    assert buckets.acquire("a", now=0.5) == 0.0
+    # Least recently used keys are forgotten beyond max_keys
+    buckets.acquire("b", now=0.5)
+    buckets.acquire("c", now=0.5)
+    assert len(buckets) == 2 and buckets.acquire("a", now=0.5) == 0.0
+
+def test_rejected_request_spends_no_tokens():
+    controller = AdmissionController(tenant_rate=0.001, tenant_burst=1, uid_rate=0.001, uid_burst=2, tenant_concurrency=0)
+    assert controller.admit("acme", "u1") is None
+    # The tenant bucket is empty: rejected without spending the user's last token
+    assert controller.admit("acme", "u1")[2] == "Too many requests for this tenant."
+    assert controller.uid_buckets.wait("u1") == 0.0
+    assert controller.admit("globex", "u1") is None
+    assert controller.admit("initech", "u1")[2] == "Too many requests."
+    # ... and a user over their limit spends none of the tenant's
+    assert controller.tenant_buckets.wait("initech") == 0.0
+
+def test_concurrency_cap_and_release():
+    controller = AdmissionController(tenant_rate=0, uid_rate=0, tenant_concurrency=2)
+    assert controller.admit("acme", None) is None
+    assert controller.admit("acme", None) is None
+    assert controller.admit("acme", None)[0] == 503
+    assert controller.admit("globex", None) is None
+    controller.release("acme")
+    assert controller.admit("acme", None) is None
+    assert controller.stats()["concurrency_shed"] == 1
+
+def make_client(controller):
+    app = FastAPI()
+
+    @app.get("/api/{tenant}/config")
+    async def config(tenant: str):
+        return {"tenant": tenant}
+
+    @app.get("/api/auth/me")
+    async def me():
+        return {}
+
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=controller,
+        reserved=("auth",),
+        lookup_uid={"good-token": "u1"}.get,
+        lookup_host={"acme.mint.io": "acme"}.get,
+    )
+    return TestClient(app)
+
+def test_middleware_sheds_before_routing():
+    controller = AdmissionController(tenant_rate=1, tenant_burst=2, uid_rate=1, uid_burst=3)
+    client = make_client(controller)
+    codes = [client.get("/api/acme/config").status_code for _ in range(3)]
+    assert codes == [200, 200, 429]
+    rejected = client.get("/api/acme/config")
+    assert rejected.headers["retry-after"] == "1" and rejected.json() == {"detail": "Too many requests for this tenant."}
+    # Other tenants and reserved prefixes have their own (or no) tenant bucket
+    assert client.get("/api/globex/config").status_code == 200
+    assert client.get("/api/auth/me").status_code == 200
+    # ... unless the Host header names a tenant
+    assert client.get("/api/auth/me", headers={"Host": "acme.mint.io"}).status_code == 429
+
+    # Known tokens are limited per uid, across tenants
+    headers = {"Authorization": "Bearer good-token"}
+    codes = [client.get(f"/api/t{i}/config", headers=headers).status_code for i in range(4)]
+    assert codes == [200, 200, 200, 429]
+    assert controller.stats()["uid_rate_limited"] == 1 and controller.stats()["in_flight"] == 0
@@ -0,0 +1,49 @@
+import os
+from services.asset_store import AssetStore
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+def make_store(tmp_path, **kwargs):
+    (tmp_path / "logo.png").write_bytes(PNG)
+    (tmp_path / "mark.svg").write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+    (tmp_path / "noext").write_bytes(PNG)
+    store = AssetStore(str(tmp_path), **kwargs)
+    store.scan()
+    return store
+
+def test_scan_indexes_content_types_and_small_files(tmp_path):
+    store = make_store(tmp_path, inline_max_bytes=64)
+    assert store.get("logo.png").content_type == "image/png"
+    assert store.get("mark.svg").content_type == "image/svg+xml"
+    assert store.get("noext").content_type == "image/png"
+    assert store.get("logo.png").data is None
+    assert store.get("mark.svg").data.startswith(b"<svg")
+    assert store.stats()["assets"] == 3
+
+def test_hashed_names_resolve_as_immutable(tmp_path):
+    store = make_store(tmp_path)
+    asset = store.get("logo.png")
+    assert asset.data == PNG
+    url = store.hashed_url("/static/logos/logo.png", "/static/logos/")
+    assert url == f"/static/logos/{asset.hashed_name}"
+    assert store.resolve(asset.hashed_name) == (asset, True)
+    assert store.resolve("logo.png") == (asset, False)
+    assert store.resolve("logo.000000000000.png") == (asset, False)
+    assert store.hashed_url("https://cdn.example.com/x.png", "/static/logos/") == "https://cdn.example.com/x.png"
+
+def test_changed_file_gets_new_hash(tmp_path):
+    store = make_store(tmp_path, check_interval=0)
+    before = store.get("logo.png")
+    fingerprint = store.fingerprint()
+    (tmp_path / "logo.png").write_bytes(PNG + b"v2")
+    os.utime(tmp_path / "logo.png", ns=(1, 1))
+    after = store.get("logo.png")
+    assert after.digest != before.digest
+    assert store.resolve(before.hashed_name) == (after, False)
+    assert store.fingerprint() != fingerprint
+
+def test_missing_and_unsafe_names(tmp_path):
+    store = make_store(tmp_path)
+    assert store.resolve("missing.png") == (None, False)
+    assert store.resolve("../logo.png") == (None, False)
+    assert store.resolve(".hidden") == (None, False)
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import pytest
+from services import tenant_service
+from services.sqlite_store import SqliteTenantStore
+from services.tenant_journal import TenantJournal
+from services.tenant_store import JsonFileTenantStore, TenantChange
+from utils.json_stream import RecordError, iter_json_records
+
+@pytest.fixture
+def tenants_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"acme": {"features": {"Accounting": True}, "layout": "side"}}))
+    previous = tenant_service.use_tenant_store(JsonFileTenantStore(str(path)))
+    yield path
+    tenant_service.use_tenant_store(previous)
+
+def read_records(body: bytes, chunk_size: int):
+    async def chunks():
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+    async def collect():
+        return [(row, str(r) if isinstance(r, RecordError) else r) async for row, r in iter_json_records(chunks(), 1024)]
+    return asyncio.run(collect())
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+def test_reads_ndjson_and_arrays_across_chunk_boundaries(chunk_size):
+    records = [{"tenant": f"t{i}", "brandName": "Zürich"} for i in range(3)] + [42]
+    ndjson = "\n".join(json.dumps(r) for r in records).encode()
+    array = json.dumps(records, ensure_ascii=False).encode()
+    expected = list(enumerate(records, 1))
+    assert read_records(ndjson, chunk_size) == expected
+    assert read_records(array, chunk_size) == expected
+
+def test_bad_records():
+    rows = read_records(b'{"tenant": "a"}\nnot json\n{"tenant": "b"}\n', 4)
+    assert [row for row, _ in rows] == [1, 2, 3] and rows[1][1].startswith("Invalid JSON")
+    # A broken array cannot be resynchronized, so reading stops
+    assert read_records(b'[{"tenant": "a"} {"tenant": "b"}]', 4) == [(1, {"tenant": "a"}), (2, "Expected ',' or ']' between array elements.")]
+
+def test_batch_applies_rows_in_one_commit(tenants_file):
+    outcomes = tenant_service.apply_tenant_batch([
+        ("create", "globex", {"brandName": "Globex", "domains": ["Globex.example.com"]}),
+        ("create", "initech", {"domains": ["globex.example.com"]}),
+        ("update", "acme", {"layout": "top"}),
+        ("create", "acme", {}),
+        ("update", "missing", {"layout": "top"}),
+    ])
+    assert [status for status, _ in outcomes] == ["created", "error", "updated", "error", "error"]
+    assert "already belongs" in outcomes[1][1] and outcomes[3][1] == "Tenant already exists."
+    assert outcomes[0][1]["layout"] == "side" and outcomes[0][1]["domains"] == ["globex.example.com"]
+
+    stored = json.loads(tenants_file.read_text())
+    assert set(stored) == {"acme", "globex"} and stored["acme"]["layout"] == "top"
+    assert tenant_service.resolve_tenant_host("globex.example.com")[0] == "globex"
+
+@pytest.mark.parametrize("backend", ["sqlite", "journal"])
+def test_store_batches(tmp_path, backend):
+    if backend == "sqlite":
+        store = SqliteTenantStore(str(tmp_path / "tenants.db"))
+    else:
+        store = TenantJournal(str(tmp_path / "tenants.json"), str(tmp_path / "tenants.journal")).open()
+    store.create("acme", {"features": {}})
+    before = store.signature()
+    batch = store.apply_batch([
+        TenantChange("create", "globex", {"features": {}}),
+        TenantChange("update_features", "globex", {"Accounting": True}),
+        TenantChange("create", "acme", {}),
+    ])
+    assert isinstance(batch.results[2], Exception)
+    assert batch.before == before and batch.after != before
+    assert store.get("globex") == {"features": {"Accounting": True}}
+    assert store.get("acme") == {"features": {}}
@@ -0,0 +1,57 @@
+import json
+import pytest
+from services import tenant_service
+from services.config_response import get_rendered_config, rendered_configs
+from services.tenant_store import JsonFileTenantStore
+
+ACME = {
+    "features": {"Accounting": True},
+    "primaryColor": "#000000",
+    "secondaryColor": "#ffffff",
+    "logo": "https://cdn.example.com/acme.png",
+    "brandName": "Acme",
+    "layout": "side",
+    "internalNote": "not part of TenantConfig",
+}
+
+@pytest.fixture
+def tenants_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"acme": ACME}))
+    previous = tenant_service.use_tenant_store(JsonFileTenantStore(str(path)))
+    rendered_configs.clear()
+    yield path
+    tenant_service.use_tenant_store(previous)
+
+def test_body_matches_response_model(tenants_file):
+    etag, body = get_rendered_config("acme", "http://testserver/")
+    payload = json.loads(body)
+    assert "internalNote" not in payload
+    assert payload["logo"] == "https://cdn.example.com/acme.png"
+    assert payload["features"] == {"Accounting": True}
+    assert etag.startswith('"') and etag.endswith('"')
+    assert get_rendered_config("missing", "http://testserver/") is None
+
+def test_rollout_rules_are_not_public(tenants_file):
+    tenant_service.update_tenant_features("acme", {"Beta": {"percentage": 50, "uids": ["secret-uid"], "roles": ["HR"]}})
+    _, body = get_rendered_config("acme", "http://testserver/")
+    assert json.loads(body)["features"] == {"Accounting": True, "Beta": False}
+    assert b"secret-uid" not in body and b"roles" not in body
+
+def test_bytes_reused_until_tenant_changes(tenants_file):
+    first = get_rendered_config("acme", "http://testserver/")
+    renders = rendered_configs.stats()["renders"]
+    assert get_rendered_config("acme", "http://testserver/")[1] is first[1]
+    assert rendered_configs.stats()["renders"] == renders
+
+    tenant_service.update_tenant_config("acme", {"brandName": "Acme 2"})
+    etag, body = get_rendered_config("acme", "http://testserver/")
+    assert json.loads(body)["brandName"] == "Acme 2"
+    assert etag != first[0]
+
+def test_bodies_are_per_base_url(tenants_file):
+    tenant_service.update_tenant_config("acme", {"logo": "/static/logos/acme.png"})
+    _, local = get_rendered_config("acme", "http://localhost:8000/")
+    _, public = get_rendered_config("acme", "https://api.example.com/")
+    assert json.loads(local)["logo"].startswith("http://localhost:8000/static/logos/")
+    assert json.loads(public)["logo"].startswith("https://api.example.com/static/logos/")
@@ -0,0 +1,47 @@
+import json
+import pytest
+from services import tenant_service
+from services.domain_index import DomainIndex, normalize_host
+from services.tenant_store import JsonFileTenantStore
+
+def test_normalize_host():
+    assert normalize_host("Acme.Example.com:8443") == "acme.example.com"
+    assert normalize_host("acme.example.com.") == "acme.example.com"
+    assert normalize_host("[::1]:8000") == "[::1]"
+
+def test_custom_domain_then_subdomain():
+    index = DomainIndex()
+    index.rebuild({
+        "acme": {"domains": ["portal.acme.com"]},
+        "globex": {},
+    })
+    assert index.resolve("PORTAL.acme.com:443") == ("acme", "domain")
+    assert index.resolve("globex.mint.io") == ("globex", "subdomain")
+    assert index.resolve("globex")[0] == "globex"
+    assert index.resolve("unknown.mint.io") is None
+    assert index.resolve("") is None
+
+def test_update_moves_domains():
+    index = DomainIndex()
+    index.rebuild({"acme": {"domains": ["old.acme.com"]}})
+    index.update("acme", {"domains": ["new.acme.com"]})
+    assert index.resolve("old.acme.com") is None
+    assert index.resolve("new.acme.com")[0] == "acme"
+    index.update("initech", {})
+    assert index.resolve("initech.mint.io")[0] == "initech"
+
+@pytest.fixture
+def tenants_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"acme": {"features": {}, "domains": ["portal.acme.com"]}, "globex": {"features": {}}}))
+    previous = tenant_service.use_tenant_store(JsonFileTenantStore(str(path)))
+    yield path
+    tenant_service.use_tenant_store(previous)
+
+def test_service_resolves_and_rejects_taken_domains(tenants_file):
+    assert tenant_service.resolve_tenant_host("portal.acme.com")[0] == "acme"
+    assert tenant_service.derived_indexes_fresh(60)
+    with pytest.raises(Exception, match="already belongs"):
+        tenant_service.update_tenant_config("globex", {"domains": ["portal.acme.com"]})
+    tenant_service.update_tenant_config("globex", {"domains": ["Globex.COM"]})
+    assert tenant_service.resolve_tenant_host_cached("globex.com")[0] == "globex"
@@ -0,0 +1,92 @@
+
+import json
+import pytest
+from services import tenant_service
+from services.feature_index import FeatureIndex
+from services.tenant_store import JsonFileTenantStore
+
+def test_rebuild_and_query():
+    index = FeatureIndex()
+    index.rebuild({
+        "a": {"features": {"Accounting": True, "TimeSheet": False}},
+        "b": {"features": {"Accounting": True}},
+        "c": {"features": {}},
+    })
+    assert index.tenants_with("Accounting") == ["a", "b"]
+    assert index.tenants_with("Accounting", enabled=False) == ["c"]
+    assert index.is_enabled("a", "TimeSheet") is False
+    assert index.is_enabled("missing", "TimeSheet") is None
+    assert index.evaluate(["b", "missing"], ["Accounting", "TimeSheet"]) == {
+        "b": {"Accounting": True, "TimeSheet": False},
+        "missing": None,
+    }
+
+def test_incremental_update():
+    index = FeatureIndex()
+    index.rebuild({"a": {"features": {"Accounting": True}}})
+    index.update("a", {"Accounting": False, "TimeSheet": True})
+    index.update("b", {"Accounting": True})
+    assert index.tenants_with("Accounting") == ["b"]
+    assert index.tenants_with("TimeSheet") == ["a"]
+    assert index.tenants_with("TimeSheet", enabled=False) == ["b"]
+
+@pytest.fixture
+def tenants_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"acme": {"features": {"Accounting": True}}}))
+    previous = tenant_service.use_tenant_store(JsonFileTenantStore(str(path)))
+    yield path
+    tenant_service.use_tenant_store(previous)
+
+def test_service_index_follows_writes(tenants_file, monkeypatch):
+    assert tenant_service.list_tenants_by_feature("Accounting") == ["acme"]
+    tenant_service.create_tenant("beta", features={"Accounting": True})
+    tenant_service.update_tenant_features("acme", {"Accounting": False})
+
+    # Later writes must be applied incrementally, not by re-reading the file
+    monkeypatch.setattr(tenant_service._store, "load_all", lambda: pytest.fail("index was rebuilt"))
+    assert tenant_service.list_tenants_by_feature("Accounting") == ["beta"]
+    results, matrix = tenant_service.evaluate_features([("acme", "Accounting")], ["beta"], ["Accounting"])
+    assert results == [False]
+    assert matrix == {"beta": {"Accounting": True}}
+
+def test_query_filters_and_pages():
+    index = FeatureIndex()
+    index.rebuild({
+        f"t{i:02d}": {"features": {"TimeSheet": i % 2 == 0}, "layout": "top" if i % 3 == 0 else "side", "beta": i == 3}
+        for i in range(12)
+    })
+    page, after, total = index.query(fields={"layout": "top"}, limit=2)
+    assert (page, after, total) == (["t00", "t03"], "t03", 4)
+    assert index.query(fields={"layout": "top"}, after=after, limit=2) == (["t06", "t09"], None, 4)
+    assert index.query({"TimeSheet": False}, {"layout": "top"})[0] == ["t03", "t09"]
+    assert index.query(fields={"beta": "true"})[0] == ["t03"]
+    assert index.query(fields={"layout": "grid"})[0] == []
+    # A cursor that is no longer a tenant still continues in key order
+    assert index.query(fields={"layout": "top"}, after="t04", limit=2) == (["t06", "t09"], None, 4)
+
+def test_pages_continue_across_indexes():
+    # Tenants created after a rebuild get the highest ids on this worker ...
+    local = FeatureIndex()
+    local.rebuild({"b": {"features": {}}, "d": {"features": {}}})
+    local.update("a", {}, {"features": {}})
+    local.update("c", {}, {"features": {}})
+    page, after, total = local.query(limit=2)
+    assert (page, after, total) == (["a", "b"], "b", 4)
+    # ... but the next page, served by a freshly rebuilt index, picks up where it left off
+    rebuilt = FeatureIndex()
+    rebuilt.rebuild({name: {"features": {}} for name in "abcd"})
+    assert rebuilt.query(after=after, limit=2) == (["c", "d"], None, 4)
+    assert local.tenants_with("X", enabled=False) == ["a", "b", "c", "d"]
+
+def test_service_listing_follows_writes(tenants_file, monkeypatch):
+    assert tenant_service.list_tenants()[0] == [{"tenant": "acme", "features": {"Accounting": True}}]
+    monkeypatch.setattr(tenant_service.feature_index, "rebuild", lambda tenants: pytest.fail("index was rebuilt"))
+    tenant_service.create_tenant("beta", layout="top", features={"TimeSheet": False})
+    tenant_service.update_tenant_config("acme", {"layout": "top"})
+    items, after, total = tenant_service.list_tenants(fields={"layout": "top"}, projection=["layout"])
+    assert items == [{"tenant": "acme", "layout": "top"}, {"tenant": "beta", "layout": "top"}]
+    assert (after, total) == (None, 2)
+    tenant_service.update_tenant_config("beta", {"layout": "side"})
+    # A missing flag counts as not enabled
+    assert [item["tenant"] for item in tenant_service.list_tenants({"TimeSheet": False}, {"layout": "top"})[0]] == ["acme"]
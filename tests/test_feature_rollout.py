@@ -0,0 +1,57 @@
+import json
+import pytest
+from services import tenant_service
+from services.feature_rollout import BUCKETS, CompiledFlags, compiled_flags, evaluate_user_features
+from services.tenant_store import JsonFileTenantStore
+
+def test_rules_target_uids_roles_and_percentage():
+    flags = CompiledFlags("acme", {
+        "Accounting": True,
+        "TimeSheet": False,
+        "Beta": {"uids": ["u1"], "roles": ["Admin"]},
+        "Half": {"percentage": 50},
+        "Everyone": {"percentage": 100},
+    })
+    evaluated = flags.evaluate("u1", "Employee")
+    assert set(evaluated) == {"Accounting", "TimeSheet", "Beta", "Half", "Everyone"}
+    assert (evaluated["Accounting"], evaluated["TimeSheet"], evaluated["Beta"], evaluated["Everyone"]) == (True, False, True, True)
+    assert flags.evaluate("u2", "Admin")["Beta"] is True
+    assert flags.evaluate("u2", "Employee")["Beta"] is False
+
+    users = [f"user{i}" for i in range(2000)]
+    enabled = sum(flags.evaluate(uid, None)["Half"] for uid in users)
+    assert 850 < enabled < 1150
+
+def test_buckets_are_stable_and_rollouts_only_grow():
+    users = [f"user{i}" for i in range(500)]
+    ten = CompiledFlags("acme", {"New": {"percentage": 10}})
+    again = CompiledFlags("acme", {"New": {"percentage": 10}})
+    thirty = CompiledFlags("acme", {"New": {"percentage": 30}})
+    in_ten = {uid for uid in users if ten.evaluate(uid, None)["New"]}
+    assert in_ten == {uid for uid in users if again.evaluate(uid, None)["New"]}
+    assert in_ten < {uid for uid in users if thirty.evaluate(uid, None)["New"]}
+    # Another flag buckets users independently
+    other = CompiledFlags("acme", {"Other": {"percentage": 10}})
+    assert in_ten != {uid for uid in users if other.evaluate(uid, None)["Other"]}
+    assert ten.rules[0].threshold == BUCKETS // 10
+
+@pytest.fixture
+def tenants_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"acme": {"features": {"Accounting": True, "Beta": {"roles": ["HR"]}}}}))
+    previous = tenant_service.use_tenant_store(JsonFileTenantStore(str(path)))
+    yield path
+    tenant_service.use_tenant_store(previous)
+
+def test_compiled_once_per_config_change(tenants_file):
+    compiles = compiled_flags.stats()["compiles"]
+    assert evaluate_user_features("acme", "u1", "HR") == {"Accounting": True, "Beta": True}
+    assert evaluate_user_features("acme", "u1", "Employee") == {"Accounting": True, "Beta": False}
+    assert compiled_flags.stats()["compiles"] == compiles + 1
+
+    tenant_service.update_tenant_features("acme", {"Beta": {"uids": ["u1"]}})
+    assert evaluate_user_features("acme", "u1", "Employee")["Beta"] is True
+    assert compiled_flags.stats()["compiles"] == compiles + 2
+    # Rollout flags are not "enabled" for the tenant as a whole
+    assert tenant_service.list_tenants_by_feature("Beta") == []
+    assert evaluate_user_features("missing", "u1", "HR") is None
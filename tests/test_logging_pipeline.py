@@ -0,0 +1,75 @@
+import io
+import logging
+import queue
+from utils.logging_pipeline import (
+    ContextFormatter,
+    LoggingPipeline,
+    NonBlockingQueueHandler,
+    RequestContextFilter,
+    SamplingFilter,
+    _request_scope,
+    parse_logger_settings,
+)
+
+def make_record(msg="hello %s", args=("world",)):
+    return logging.LogRecord("MintTenantCore.Auth", logging.INFO, __file__, 1, msg, args, None)
+
+def test_parse_logger_settings():
+    assert parse_logger_settings(" MintTenantCore.Auth=10, MintTenantCore.Health=0.5,bad,") == {
+        "MintTenantCore.Auth": 10.0,
+        "MintTenantCore.Health": 0.5,
+    }
+    assert parse_logger_settings("") == {}
+
+def test_rate_limit_and_sampling(monkeypatch):
+    limited = SamplingFilter(per_second=2)
+    assert [limited.filter(make_record()) for _ in range(4)] == [True, True, False, False]
+    assert limited.rate_limited == 2
+
+    sampled = SamplingFilter(rate=0.25)
+    monkeypatch.setattr("utils.logging_pipeline.random.random", iter([0.1, 0.5, 0.9, 0.2]).__next__)
+    assert [sampled.filter(make_record()) for _ in range(4)] == [True, False, False, True]
+    assert sampled.sampled_out == 2
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = make_record()
+    handler.handle(record)
+    handler.handle(make_record())
+    assert handler.dropped == 1
+    # Queued as-is: the message is merged with its arguments by the writer thread
+    assert handler.queue.get_nowait() is record and record.args == ("world",)
+
+def test_request_context_is_rendered():
+    token = _request_scope.set({"type": "http", "path": "/api/acme/config", "state": {"uid": "u1"},
+                                "path_params": {"tenant": "acme"}})
+    try:
+        record = make_record()
+        RequestContextFilter().filter(record)
+    finally:
+        _request_scope.reset(token)
+    formatter = ContextFormatter("%(message)s%(context)s")
+    assert formatter.format(record) == "hello world tenant=acme uid=u1 route=/api/acme/config"
+    assert formatter.format(make_record()) == "hello world"
+
+def test_pipeline_writes_on_background_thread():
+    stream = io.StringIO()
+    pipeline = LoggingPipeline()
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    try:
+        pipeline.configure("INFO", queue_size=100, rate_limits={"test.pipeline.health": 1}, capture=(), stream=stream)
+        for _ in range(3):
+            logging.getLogger("test.pipeline.health").info("Health check called")
+        logging.getLogger("test.pipeline").info("tenant %s updated", "acme")
+        pipeline.stop()
+    finally:
+        logging.getLogger("test.pipeline.health").removeFilter(pipeline.filters["test.pipeline.health"])
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2 and lines[1].endswith("test.pipeline tenant acme updated")
+    assert pipeline.stats()["rate_limited"] == 2
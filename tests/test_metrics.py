@@ -0,0 +1,57 @@
+import asyncio
+from types import SimpleNamespace
+from utils.metrics import MetricsRegistry, MetricsMiddleware, Histogram, OTHER
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram("h", "test", ("route",), buckets=(0.01, 0.1))
+    hist.observe(("/a",), 0.005)
+    hist.observe(("/a",), 0.05)
+    hist.observe(("/a",), 5)
+    text = "\n".join(hist.render())
+    assert 'h_bucket{route="/a",le="0.01"} 1' in text
+    assert 'h_bucket{route="/a",le="0.1"} 2' in text
+    assert 'h_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'h_count{route="/a"} 3' in text
+
+def test_series_are_capped():
+    hist = Histogram("h", "test", ("route",), max_series=2)
+    for route in ("/a", "/b", "/c", "/d"):
+        hist.observe((route,), 0.001)
+    assert set(hist.snapshot()) == {("/a",), ("/b",), (OTHER,)}
+
+def test_tenant_labels_are_bounded():
+    registry = MetricsRegistry(max_tenants=1)
+    route = SimpleNamespace(path="/api/{tenant}/config")
+    for tenant, status in (("t1", 200), ("t2", 200), ("junk", 404)):
+        registry.observe_request({"method": "GET", "route": route, "path_params": {"tenant": tenant}}, status, 0.001)
+    tenants = {labels[2] for labels in registry.requests.snapshot()}
+    assert tenants == {"t1", OTHER}
+
+def test_dependency_timer_attributed_to_route():
+    registry = MetricsRegistry()
+    route = SimpleNamespace(path="/api/{tenant}/features")
+
+    async def app(scope, receive, send):
+        with registry.timed("tenant_store.get"):
+            pass
+        try:
+            with registry.timed("firestore.users.get"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path_params": {"tenant": "t1"}, "route": route}
+    asyncio.run(MetricsMiddleware(app, registry)(scope, None, send))
+
+    assert set(registry.dependencies.snapshot()) == {
+        ("/api/{tenant}/features", "tenant_store.get"),
+        ("/api/{tenant}/features", "firestore.users.get"),
+    }
+    assert set(registry.requests.snapshot()) == {("GET", "/api/{tenant}/features", "t1", "2xx")}
+    assert 'mint_dependency_errors_total{route="/api/{tenant}/features",dependency="firestore.users.get"} 1' in registry.render()
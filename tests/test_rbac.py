@@ -0,0 +1,40 @@
+import os
+import pytest
+from utils.rbac import RbacPolicy, load_policy
+
+POLICY_FILE = os.path.join(os.path.dirname(__file__), "..", "rbac_policy.json")
+
+def test_shipped_policy_matches_roles():
+    policy = load_policy(POLICY_FILE)
+    update_config = policy.rule("tenant.update_config")
+    assert policy.check(update_config, "HR", "acme", "acme") is None
+    assert "another tenant" in policy.check(update_config, "HR", "acme", "globex")
+    assert policy.check(update_config, "Admin", "acme", "globex") is None
+    assert "lacks permission" in policy.check(update_config, "Employee", "acme", "acme")
+    # Every authenticated user may read their own tenant's features, whatever the role
+    assert policy.check(policy.rule("tenant.read_features"), "Contractor", "acme", "acme") is None
+    assert policy.check(policy.rule("users.assign"), "HR", "acme", None) is not None
+    # Cross-tenant endpoints (bulk writes, listings, change feed, flag queries) are Admin only
+    for rule in ("tenants.bulk", "tenants.list", "tenants.changes", "flags.evaluate", "flags.tenants"):
+        assert policy.check(policy.rule(rule), "HR", "acme", None) is not None
+        assert policy.check(policy.rule(rule), "Admin", "acme", None) is None
+    assert policy.grants_cross_tenant("Admin")
+    assert not policy.grants_cross_tenant("HR") and not policy.grants_cross_tenant(None)
+
+def test_compiles_to_bitmasks():
+    policy = RbacPolicy({
+        "permissions": ["read", "write", "any"],
+        "cross_tenant_permission": "any",
+        "roles": {"*": ["read"], "Editor": ["write"], "Root": ["*"]},
+        "routes": {"edit": {"require": ["read", "write"], "tenant_scoped": True}},
+    })
+    assert policy.role_masks == {"Editor": 0b011, "Root": 0b111}
+    assert policy.rules["edit"].required == 0b011
+    assert policy.check(policy.rule("edit"), "Root", "a", "b") is None
+    assert policy.check(policy.rule("edit"), "Editor", "a", "b") is not None
+
+def test_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        RbacPolicy({"permissions": ["read"], "roles": {"HR": ["write"]}})
+    with pytest.raises(KeyError):
+        RbacPolicy({}).rule("missing")
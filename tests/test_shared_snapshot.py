@@ -0,0 +1,72 @@
+import json
+import pytest
+from services.shared_snapshot import SharedSnapshotTenantStore, build_snapshot, SnapshotView
+from services.sqlite_store import SqliteTenantStore
+from services.tenant_store import JsonFileTenantStore, create_tenant_store
+
+@pytest.fixture
+def paths(tmp_path):
+    tenants = tmp_path / "tenants.json"
+    tenants.write_text(json.dumps({"acme": {"features": {"Accounting": True}, "layout": "side"}}))
+    return str(tenants), str(tmp_path / "tenants.snapshot")
+
+def worker(paths, **options):
+    tenants, snapshot = paths
+    return SharedSnapshotTenantStore(JsonFileTenantStore(tenants), snapshot, **options).open()
+
+def test_snapshot_lookup():
+    tenants = {f"tenant{i}": {"features": {"Accounting": i % 2 == 0}} for i in range(100)}
+    view = SnapshotView(build_snapshot(tenants, 7, {"tenant3": 2}, {"backing": None}))
+    assert view.generation == 7 and view.count == 100
+    offset, length, version = view.find("tenant3")
+    assert json.loads(view.buffer[offset:offset + length]) == tenants["tenant3"]
+    assert version == 2 and view.find("tenant4")[2] == 7
+    assert view.find("missing") is None
+    assert {tenant for tenant, *_ in view.items()} == set(tenants)
+
+def test_reads_and_writes(paths):
+    store = worker(paths)
+    assert store.get("acme") == {"features": {"Accounting": True}, "layout": "side"}
+    assert store.get("missing") is None
+
+    start = store.signature()
+    write = store.update_features("acme", {"TimeSheet": False})
+    assert (write.before, write.after) == (start, start + 1)
+    store.create("globex", {"features": {}})
+    assert set(store.load_all()) == {"acme", "globex"}
+    with pytest.raises(Exception, match="already exists"):
+        store.create("globex", {})
+    # Written through to tenants.json
+    assert json.load(open(paths[0]))["acme"]["features"] == {"Accounting": True, "TimeSheet": False}
+
+def test_writes_are_visible_to_other_workers(paths):
+    first, second = worker(paths), worker(paths)
+    assert second.get("acme")["layout"] == "side"
+    first.update_config("acme", {"layout": "top"})
+    assert second.get("acme")["layout"] == "top"
+    assert second.signature() == first.signature()
+
+def test_unchanged_tenants_keep_their_parsed_config(paths):
+    store = worker(paths)
+    acme = store.get("acme")
+    assert store.get("acme") is acme
+    store.create("globex", {"features": {}})
+    assert store.get("acme") is acme
+    store.update_config("acme", {"layout": "top"})
+    assert store.get("acme") is not acme
+
+def test_external_edits_are_republished(paths):
+    store = worker(paths, backing_check_interval=0)
+    before = store.signature()
+    with open(paths[0], "w") as f:
+        json.dump({"acme": {"features": {}, "layout": "top"}}, f)
+    assert store.get("acme")["layout"] == "top"
+    assert store.signature() > before
+
+def test_factory_wraps_sqlite_and_rejects_journal(tmp_path):
+    store = create_tenant_store("sqlite", sqlite_path=str(tmp_path / "tenants.db"), snapshot_path=str(tmp_path / "tenants.snapshot"))
+    assert isinstance(store, SharedSnapshotTenantStore) and isinstance(store.backing, SqliteTenantStore)
+    store.create("acme", {"features": {}})
+    assert store.get("acme") == {"features": {}}
+    with pytest.raises(ValueError, match="journal"):
+        create_tenant_store("journal", path=str(tmp_path / "t.json"), journal_path=str(tmp_path / "t.journal"), snapshot_path=str(tmp_path / "s"))
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+import pytest
+from utils.single_flight import SingleFlight
+
+def slow(calls, result, delay=0.05):
+    def run():
+        calls.append(1)
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return run
+
+def test_threads_share_one_call():
+    group, calls, results = SingleFlight("test"), [], []
+    run = slow(calls, {"role": "Admin"})
+    threads = [threading.Thread(target=lambda: results.append(group.do("u1", run))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len(results) == 8 and all(r is results[0] for r in results)
+    assert group.stats() == {"calls": 1, "coalesced": 7, "in_flight": 0}
+    # Nothing in flight any more: the next call runs again
+    group.do("u1", run)
+    assert len(calls) == 2
+
+def test_async_waiters_get_result_and_errors():
+    group, calls = SingleFlight("test"), []
+
+    async def main():
+        results = await asyncio.gather(*(group.do_async("acme", slow(calls, "ok")) for _ in range(5)))
+        failed = await asyncio.gather(*(group.do_async("acme", slow(calls, KeyError("boom"))) for _ in range(3)),
+                                      return_exceptions=True)
+        return results, failed
+
+    results, failed = asyncio.run(main())
+    assert results == ["ok"] * 5 and len(calls) == 2
+    assert all(isinstance(error, KeyError) for error in failed)
+    assert group.stats()["coalesced"] == 6
+
+def test_cancelled_waiter_does_not_cancel_the_call():
+    group, calls = SingleFlight("test"), []
+
+    async def main():
+        first = asyncio.ensure_future(group.do_async("u1", slow(calls, "ok", delay=0.1)))
+        second = asyncio.ensure_future(group.do_async("u1", slow(calls, "other")))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "ok" and len(calls) == 1
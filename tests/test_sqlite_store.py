@@ -0,0 +1,76 @@
+
+import json
+import threading
+import pytest
+from services import tenant_service
+from services.sqlite_store import SqliteTenantStore, main as migrate
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "tenants.db")
+
+def test_crud_and_signature(db_path):
+    store = SqliteTenantStore(db_path)
+    start = store.signature()
+    write = store.create("acme", {"features": {"Accounting": True}, "layout": "side"})
+    assert (write.before, write.after) == (start, start + 1)
+    with pytest.raises(Exception, match="already exists"):
+        store.create("acme", {})
+
+    store.update_config("acme", {"layout": "top"})
+    store.update_features("acme", {"TimeSheet": False})
+    assert store.get("acme") == {"features": {"Accounting": True, "TimeSheet": False}, "layout": "top"}
+    assert store.get("missing") is None
+    with pytest.raises(Exception, match="not found"):
+        store.update_features("missing", {})
+    assert store.signature() == start + 3
+
+def test_unchanged_rows_return_the_same_object(db_path):
+    store = SqliteTenantStore(db_path)
+    store.create("acme", {"features": {}})
+    first = store.get("acme")
+    assert store.get("acme") is first
+    store.update_config("acme", {"layout": "top"})
+    assert store.get("acme") is not first
+
+def test_changes_are_visible_to_other_connections(db_path):
+    writer = SqliteTenantStore(db_path)
+    reader = SqliteTenantStore(db_path)
+    writer.create("acme", {"features": {}})
+    before = reader.signature()
+    writer.update_features("acme", {"Accounting": True})
+    assert reader.signature() != before
+    assert reader.get("acme")["features"] == {"Accounting": True}
+
+def test_concurrent_updates_are_not_lost(db_path):
+    store = SqliteTenantStore(db_path)
+    store.create("acme", {"features": {}})
+
+    def toggle(i):
+        store.update_features("acme", {f"f{i}": True})
+
+    threads = [threading.Thread(target=toggle, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get("acme")["features"]) == 20
+
+def test_migration_command(tmp_path, db_path, capsys):
+    source = tmp_path / "tenants.json"
+    source.write_text(json.dumps({"a": {"features": {}}, "b": {"features": {"X": True}}}))
+    migrate([str(source), db_path])
+    assert "Imported 2 of 2" in capsys.readouterr().out
+    migrate([str(source), db_path])
+    assert "Imported 0 of 2" in capsys.readouterr().out
+    assert SqliteTenantStore(db_path).load_all()["b"] == {"features": {"X": True}}
+
+def test_service_on_sqlite_backend(db_path):
+    previous = tenant_service.use_tenant_store(SqliteTenantStore(db_path))
+    try:
+        tenant_service.create_tenant("acme", features={"Accounting": True})
+        tenant_service.update_tenant_features("acme", {"Accounting": False})
+        assert tenant_service.get_tenant_features("acme") == {"Accounting": False}
+        assert tenant_service.list_tenants_by_feature("Accounting", enabled=False) == ["acme"]
+    finally:
+        tenant_service.use_tenant_store(previous)
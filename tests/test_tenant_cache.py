@@ -0,0 +1,85 @@
+
+import json
+import os
+import pytest
+from services import tenant_service
+from services.tenant_cache import TenantCache
+from services.tenant_store import JsonFileTenantStore
+
+@pytest.fixture
+def tenants_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({
+        "acme": {"features": {"Accounting": True}, "primaryColor": "#000000", "logo": "/static/logos/a.png"}
+    }))
+    previous = tenant_service.use_tenant_store(JsonFileTenantStore(str(path)))
+    yield path
+    tenant_service.use_tenant_store(previous)
+
+def test_repeated_reads_do_not_reparse(tenants_file):
+    before = tenant_service.get_cache_stats()["reloads"]
+    for _ in range(5):
+        assert tenant_service.get_tenant_config("acme")["primaryColor"] == "#000000"
+    assert tenant_service.get_tenant_config("missing") is None
+    assert tenant_service.get_cache_stats()["reloads"] == before + 1
+
+def test_returned_config_is_a_copy(tenants_file):
+    config = tenant_service.get_tenant_config("acme")
+    config["logo"] = "http://changed"
+    config["features"]["Accounting"] = False
+    assert tenant_service.get_tenant_config("acme")["logo"] == "/static/logos/a.png"
+    assert tenant_service.get_tenant_features("acme") == {"Accounting": True}
+
+def test_external_file_change_is_picked_up(tenants_file):
+    assert tenant_service.get_tenant_config("acme")["primaryColor"] == "#000000"
+    tenants_file.write_text(json.dumps({"acme": {"features": {}, "primaryColor": "#ffffff"}}))
+    stat = os.stat(tenants_file)
+    os.utime(tenants_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert tenant_service.get_tenant_config("acme")["primaryColor"] == "#ffffff"
+
+def test_local_write_primes_cache(tenants_file):
+    tenant_service.get_tenant_config("acme")
+    reloads = tenant_service.get_cache_stats()["reloads"]
+    tenant_service.update_tenant_features("acme", {"TimeSheet": True})
+    assert tenant_service.get_tenant_features("acme") == {"Accounting": True, "TimeSheet": True}
+    # update_* reads the file once for the write; the following read is served from memory
+    assert tenant_service.get_cache_stats()["reloads"] == reloads
+
+def test_lru_bound_evicts_and_reloads():
+    data = {f"t{i}": {"features": {}, "n": i} for i in range(5)}
+    cache = TenantCache(loader=lambda: data, signature=lambda: 1, max_entries=2)
+    assert cache.get("t0")["n"] == 0
+    assert cache.get("t1")["n"] == 1
+    assert cache.get("t2")["n"] == 2
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] >= 1
+    # Unknown tenants are answered from the known keys, without a reload
+    assert cache.get("missing") is None
+    assert cache.get("missing") is None
+    assert cache.stats()["reloads"] == stats["reloads"]
+
+def test_etag_tracks_content(tenants_file):
+    config_etag = tenant_service.get_tenant_etag("acme")
+    features_etag = tenant_service.get_tenant_etag("acme", "features")
+    assert config_etag == tenant_service.get_tenant_config_and_etag("acme")[1]
+    assert tenant_service.get_tenant_etag("missing") is None
+
+    tenant_service.update_tenant_config("acme", {"primaryColor": "#111111"})
+    assert tenant_service.get_tenant_etag("acme") != config_etag
+    assert tenant_service.get_tenant_etag("acme", "features") == features_etag
+
+    tenant_service.update_tenant_features("acme", {"Accounting": False})
+    assert tenant_service.get_tenant_features_and_etag("acme")[1] != features_etag
+
+def test_etag_memo_is_bounded(tmp_path, monkeypatch):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({f"t{i}": {"features": {}} for i in range(5)}))
+    previous = tenant_service.use_tenant_store(JsonFileTenantStore(str(path)))
+    monkeypatch.setattr(tenant_service, "TENANT_CACHE_MAX_ENTRIES", 2)
+    try:
+        tags = [tenant_service.get_tenant_etag(f"t{i}") for i in range(5)]
+        assert list(tenant_service._etags) == ["t3", "t4"]
+        assert tenant_service.get_tenant_etag("t0") == tags[0]
+    finally:
+        tenant_service.use_tenant_store(previous)
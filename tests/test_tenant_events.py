@@ -0,0 +1,105 @@
+
+import asyncio
+import json
+import threading
+import pytest
+from services import tenant_service
+from services.tenant_events import TenantEventBus
+from services.tenant_store import JsonFileTenantStore
+
+async def next_chunk(stream, timeout=1.0):
+    return await asyncio.wait_for(stream.__anext__(), timeout)
+
+@pytest.mark.asyncio
+async def test_live_events_from_other_threads():
+    bus = TenantEventBus()
+    stream = bus.stream("acme", None, heartbeat=5)
+    assert (await next_chunk(stream)).startswith("retry:")
+
+    reader = asyncio.ensure_future(next_chunk(stream))
+    await asyncio.sleep(0)
+    worker = threading.Thread(target=bus.publish, args=("acme", "features", {"Accounting": False}))
+    worker.start()
+    worker.join()
+    chunk = await reader
+    assert "event: features" in chunk
+    assert '"Accounting":false' in chunk
+    await stream.aclose()
+    assert bus.stats()["subscribers"] == 0
+
+@pytest.mark.asyncio
+async def test_resume_replays_only_missed_events_for_tenant():
+    bus = TenantEventBus()
+    first = bus.publish("acme", "config", {"layout": "top"})
+    bus.publish("other", "config", {"layout": "top"})
+    bus.publish("acme", "features", {"TimeSheet": True})
+
+    stream = bus.stream("acme", f"{bus.epoch}-{first.version}", heartbeat=5)
+    await next_chunk(stream)
+    replayed = await next_chunk(stream)
+    assert f"id: {bus.epoch}-3" in replayed
+    assert "event: features" in replayed
+    await stream.aclose()
+
+@pytest.mark.asyncio
+async def test_unknown_or_expired_event_id_requests_resync():
+    bus = TenantEventBus(history_size=2)
+    for _ in range(5):
+        bus.publish("acme", "config", {})
+    for last_event_id in ("stale-epoch-3", f"{bus.epoch}-1"):
+        stream = bus.stream("acme", last_event_id, heartbeat=5)
+        await next_chunk(stream)
+        assert "event: resync" in await next_chunk(stream)
+        await stream.aclose()
+
+@pytest.mark.asyncio
+async def test_heartbeat_and_bounded_buffer():
+    bus = TenantEventBus(buffer_size=2)
+    stream = bus.stream("acme", None, heartbeat=0.01)
+    await next_chunk(stream)
+    assert await next_chunk(stream) == ": heartbeat\n\n"
+
+    for i in range(5):
+        bus.publish("acme", "config", {"n": i})
+    await asyncio.sleep(0.01)
+    assert "event: resync" in await next_chunk(stream)
+    await stream.aclose()
+
+def test_change_feed_pages_and_compaction():
+    bus = TenantEventBus(history_size=3)
+    for i in range(5):
+        bus.publish(f"t{i}", "config", {"layout": "top"})
+    # Versions 3..5 are retained: deltas after 2 are available, after 1 they are not
+    events, latest = bus.since(2, limit=2)
+    assert [event.version for event in events] == [3, 4] and latest == 5
+    assert bus.since(5, limit=10) == ([], 5)
+    assert bus.since(1, limit=10) is None
+    assert bus.since(6, limit=10) is None
+
+def test_service_change_feed(tmp_path):
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({"acme": {"features": {"Accounting": True}}}))
+    previous = tenant_service.use_tenant_store(JsonFileTenantStore(str(path)))
+    try:
+        snapshot = tenant_service.get_tenant_changes(None)
+        assert snapshot["snapshot"] and set(snapshot["tenants"]) == {"acme"}
+        tenant_service.update_tenant_features("acme", {"Accounting": False})
+        tenant_service.update_tenant_config("acme", {"layout": "top"})
+
+        page = tenant_service.get_tenant_changes(snapshot["version"], snapshot["epoch"], limit=1)
+        assert not page["snapshot"] and page["more"]
+        assert [(c["tenant"], c["type"], c["changes"]) for c in page["changes"]] == [("acme", "features", {"Accounting": False})]
+        page = tenant_service.get_tenant_changes(page["version"], page["epoch"], limit=10)
+        assert [c["type"] for c in page["changes"]] == ["config"] and not page["more"]
+        # Unknown epoch (server restarted): full snapshot again
+        assert tenant_service.get_tenant_changes(page["version"], "elsewhere")["snapshot"]
+        # Another worker wrote to the store: its change is not in this feed, so snapshot
+        path.write_text(json.dumps({"acme": {"features": {}}, "globex": {"features": {}}}))
+        resync = tenant_service.get_tenant_changes(page["version"], page["epoch"])
+        assert resync["snapshot"] and set(resync["tenants"]) == {"acme", "globex"}
+        assert resync["epoch"] != page["epoch"]
+        tenant_service.update_tenant_config("globex", {"layout": "top"})
+        page = tenant_service.get_tenant_changes(resync["version"], resync["epoch"])
+        assert not page["snapshot"] and [c["tenant"] for c in page["changes"]] == ["globex"]
+    finally:
+        tenant_service.use_tenant_store(previous)
@@ -0,0 +1,97 @@
+
+import json
+import pytest
+from services.tenant_journal import TenantJournal
+
+@pytest.fixture
+def paths(tmp_path):
+    snapshot = tmp_path / "tenants.json"
+    snapshot.write_text(json.dumps({"acme": {"features": {"Accounting": True}, "layout": "side"}}))
+    return snapshot, tmp_path / "tenants.journal"
+
+def open_journal(paths, **kwargs):
+    snapshot, journal = paths
+    return TenantJournal(str(snapshot), str(journal), compact_every=0, **kwargs).open()
+
+def test_mutations_are_appended_not_rewritten(paths):
+    snapshot, journal_path = paths
+    journal = open_journal(paths)
+    before = snapshot.read_text()
+    journal.apply({"op": "features", "tenant": "acme", "features": {"TimeSheet": False}})
+    journal.apply({"op": "update", "tenant": "acme", "updates": {"layout": "top"}})
+    journal.close()
+
+    assert snapshot.read_text() == before
+    assert len(journal_path.read_text().splitlines()) == 2
+
+def test_replay_restores_state(paths):
+    journal = open_journal(paths)
+    journal.apply({"op": "set", "tenant": "beta", "config": {"features": {}}, "create": True})
+    journal.apply({"op": "features", "tenant": "acme", "features": {"TimeSheet": True}})
+    journal.close()
+
+    replayed = open_journal(paths)
+    assert replayed.get("beta") == {"features": {}}
+    assert replayed.get("acme")["features"] == {"Accounting": True, "TimeSheet": True}
+
+def test_torn_trailing_record_is_dropped(paths):
+    _, journal_path = paths
+    journal = open_journal(paths)
+    journal.apply({"op": "update", "tenant": "acme", "updates": {"layout": "top"}})
+    journal.close()
+    with open(journal_path, "a") as f:
+        f.write('{"op":"update","tenant":"acme","upd')
+
+    replayed = open_journal(paths)
+    assert replayed.get("acme")["layout"] == "top"
+    replayed.apply({"op": "update", "tenant": "acme", "updates": {"layout": "side"}})
+    replayed.close()
+    assert open_journal(paths).get("acme")["layout"] == "side"
+
+def test_preconditions(paths):
+    journal = open_journal(paths, fsync="never")
+    with pytest.raises(Exception, match="already exists"):
+        journal.apply({"op": "set", "tenant": "acme", "config": {}, "create": True})
+    with pytest.raises(Exception, match="not found"):
+        journal.apply({"op": "features", "tenant": "missing", "features": {}})
+
+def test_compaction_writes_snapshot_and_truncates_journal(paths):
+    snapshot, journal_path = paths
+    journal = open_journal(paths)
+    journal.apply({"op": "update", "tenant": "acme", "updates": {"layout": "top"}})
+    journal.compact()
+
+    assert json.loads(snapshot.read_text())["acme"]["layout"] == "top"
+    assert journal_path.read_text() == ""
+    journal.apply({"op": "update", "tenant": "acme", "updates": {"brandName": "Acme"}})
+    journal.close()
+
+    replayed = open_journal(paths)
+    assert replayed.get("acme")["layout"] == "top"
+    assert replayed.get("acme")["brandName"] == "Acme"
+
+def test_record_missing_fields_is_corrupt(paths):
+    _, journal_path = paths
+    journal = open_journal(paths)
+    journal.apply({"op": "update", "tenant": "acme", "updates": {"layout": "top"}})
+    journal.close()
+    with open(journal_path, "a") as f:
+        f.write('{"op":"update","tenant":"acme"}\n')
+
+    # Trailing: dropped like a torn record
+    replayed = open_journal(paths)
+    assert replayed.get("acme")["layout"] == "top"
+    replayed.close()
+    assert len(journal_path.read_text().splitlines()) == 1
+
+    with open(journal_path, "a") as f:
+        f.write('{"op":"set","tenant":"beta"}\n{"op":"update","tenant":"acme","updates":{}}\n')
+    with pytest.raises(Exception, match="Corrupted"):
+        open_journal(paths)
+
+def test_second_writer_is_refused(paths):
+    journal = open_journal(paths)
+    with pytest.raises(Exception, match="in use"):
+        open_journal(paths)
+    journal.close()
+    open_journal(paths).close()
@@ -0,0 +1,44 @@
+
+import time
+from utils.token_cache import TokenCache
+
+def test_hit_after_put():
+    cache = TokenCache(max_entries=10)
+    assert cache.get("tok") is None
+    cache.put("tok", {"uid": "u1", "exp": time.time() + 3600})
+    assert cache.get("tok")["uid"] == "u1"
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_entry_expires_at_token_exp():
+    cache = TokenCache(max_entries=10, leeway=0)
+    cache.put("expired", {"uid": "u1", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+    cache.put("short", {"uid": "u1", "exp": time.time() + 0.05})
+    assert cache.get("short") is not None
+    time.sleep(0.06)
+    assert cache.get("short") is None
+
+def test_max_ttl_caps_lifetime():
+    cache = TokenCache(max_entries=10, max_ttl=0.05)
+    cache.put("tok", {"uid": "u1", "exp": time.time() + 3600})
+    time.sleep(0.06)
+    assert cache.get("tok") is None
+
+def test_bounded_and_invalidate_uid():
+    cache = TokenCache(max_entries=2)
+    for i in range(3):
+        cache.put(f"tok{i}", {"uid": f"u{i % 2}", "exp": time.time() + 3600})
+    assert cache.get("tok0") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.invalidate_uid("u0") == 1
+    assert cache.get("tok2") is None
+    assert cache.get("tok1") is not None
+
+def test_invalidate_uids_in_one_pass():
+    cache = TokenCache(max_entries=10)
+    for i in range(4):
+        cache.put(f"tok{i}", {"uid": f"u{i}", "exp": time.time() + 3600})
+    assert cache.invalidate_uids(["u0", "u2", "missing"]) == 2
+    assert [cache.peek(f"tok{i}") is not None for i in range(4)] == [False, True, False, True]
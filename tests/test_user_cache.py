@@ -0,0 +1,63 @@
+
+import time
+from services.user_cache import UserMetadataCache, MISS
+
+def test_positive_and_negative_entries():
+    cache = UserMetadataCache(ttl=60, negative_ttl=60)
+    assert cache.get("u1") is MISS
+    cache.put("u1", {"role": "HR", "tenant": "tenant1"})
+    cache.put("ghost", None)
+    assert cache.get("u1") == {"role": "HR", "tenant": "tenant1"}
+    assert cache.get("ghost") is None
+    assert cache.stats()["negative_hits"] == 1
+
+def test_entries_expire():
+    cache = UserMetadataCache(ttl=0.05, negative_ttl=0.01)
+    cache.put("u1", {"role": "HR"})
+    cache.put("ghost", None)
+    time.sleep(0.06)
+    assert cache.get("u1") is MISS
+    assert cache.get("ghost") is MISS
+
+def test_merge_is_write_through():
+    cache = UserMetadataCache()
+    cache.put("u1", {"role": "HR", "tenant": "tenant1", "name": "Ana"})
+    cache.merge("u1", {"role": "Admin", "tenant": "tenant2"})
+    assert cache.get("u1") == {"role": "Admin", "tenant": "tenant2", "name": "Ana"}
+
+    cache.put("ghost", None)
+    cache.merge("ghost", {"role": "Employee", "tenant": "tenant1"})
+    assert cache.get("ghost") == {"role": "Employee", "tenant": "tenant1"}
+
+    cache.merge("unknown", {"role": "HR", "tenant": "tenant1"})
+    assert cache.get("unknown") is MISS
+
+def test_read_started_before_a_write_is_not_cached():
+    cache = UserMetadataCache(max_entries=2)
+    cache.put("u1", {"role": "HR", "tenant": "tenant1"})
+    # A reader takes the generation, then reads Firestore ...
+    generation = cache.generation("u1")
+    # ... while update_user_metadata writes and merges
+    cache.merge("u1", {"role": "Admin"})
+    cache.put("u1", {"role": "HR", "tenant": "tenant1"}, generation)
+    assert cache.get("u1") == {"role": "Admin", "tenant": "tenant1"}
+
+    generation = cache.generation("u2")
+    cache.invalidate("u2")
+    cache.put("u2", {"role": "HR"}, generation)
+    assert cache.get("u2") is MISS
+    cache.put("u2", {"role": "HR"}, cache.generation("u2"))
+    assert cache.get("u2") == {"role": "HR"}
+
+    # Still refused once the writer's generation is no longer tracked per uid
+    generation = cache.generation("u3")
+    for uid in ("u3", "u4", "u5"):
+        cache.invalidate(uid)
+    cache.put("u3", {"role": "HR"}, generation)
+    assert cache.get("u3") is MISS
+
+def test_returned_metadata_is_a_copy():
+    cache = UserMetadataCache()
+    cache.put("u1", {"role": "HR"})
+    cache.get("u1")["role"] = "Admin"
+    assert cache.get("u1") == {"role": "HR"}
@@ -0,0 +1,224 @@
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# ===================
+# ADMISSION CONTROL
+# ===================
+#
+# Requests are admitted or shed before routing, so a rejected request never
+# reaches token verification, Firestore or tenant storage. Everything lives
+# in process memory and runs on the event loop: a request costs a couple of
+# dict operations.
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by an arbitrary string: each key may spend `rate`
+    requests per second with bursts up to `burst`. Only the `max_keys` most
+    recently used keys are tracked; an evicted key starts over with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_keys = max(1, max_keys)
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def _refill(self, key: str, now: float) -> List[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        return bucket
+
+    def wait(self, key: str, now: Optional[float] = None) -> float:
+        """Like acquire() but without taking the token: 0.0 if one is available now."""
+        now = time.monotonic() if now is None else now
+        bucket = self._refill(key, now)
+        if bucket[0] >= 1.0:
+            return 0.0
+        return (1.0 - bucket[0]) / self.rate if self.rate > 0 else 60.0
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Take one token for `key`: 0.0 if admitted, else the seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        wait = self.wait(key, now)
+        if not wait:
+            self._buckets[key][0] -= 1.0
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """
+    Per-tenant and per-uid rate limits plus a cap on concurrent in-flight
+    requests per tenant. A limit of 0 disables that check.
+    """
+
+    def __init__(
+            self,
+            tenant_rate: float = 50.0,
+            tenant_burst: float = 100.0,
+            uid_rate: float = 10.0,
+            uid_burst: float = 20.0,
+            tenant_concurrency: int = 32,
+            max_keys: int = 10000
+    ):
+        self.tenant_buckets = TokenBuckets(tenant_rate, tenant_burst, max_keys) if tenant_rate > 0 else None
+        self.uid_buckets = TokenBuckets(uid_rate, uid_burst, max_keys) if uid_rate > 0 else None
+        self.tenant_concurrency = tenant_concurrency
+        self._in_flight: Dict[str, int] = {}
+        self.admitted = 0
+        self.tenant_rate_limited = 0
+        self.uid_rate_limited = 0
+        self.concurrency_shed = 0
+
+    def admit(self, tenant: Optional[str], uid: Optional[str]) -> Optional[Tuple[int, float, str]]:
+        """
+        Admit a request (the caller must release(tenant) once it completes),
+        or return (status code, Retry-After seconds, detail) to reject it with.
+        """
+        if tenant is not None and self.tenant_concurrency > 0 \
+                and self._in_flight.get(tenant, 0) >= self.tenant_concurrency:
+            self.concurrency_shed += 1
+            return 503, 1.0, "Too many concurrent requests for this tenant."
+        # Both buckets must have a token before either is spent, so a request
+        # rejected for its tenant does not use up the user's budget (or vice versa)
+        now = time.monotonic()
+        check_uid = uid is not None and self.uid_buckets is not None
+        check_tenant = tenant is not None and self.tenant_buckets is not None
+        if check_uid:
+            wait = self.uid_buckets.wait(uid, now)
+            if wait:
+                self.uid_rate_limited += 1
+                return 429, wait, "Too many requests."
+        if check_tenant:
+            wait = self.tenant_buckets.wait(tenant, now)
+            if wait:
+                self.tenant_rate_limited += 1
+                return 429, wait, "Too many requests for this tenant."
+        if check_uid:
+            self.uid_buckets.acquire(uid, now)
+        if check_tenant:
+            self.tenant_buckets.acquire(tenant, now)
+        if tenant is not None:
+            self._in_flight[tenant] = self._in_flight.get(tenant, 0) + 1
+        self.admitted += 1
+        return None
+
+    def release(self, tenant: Optional[str]) -> None:
+        if tenant is None:
+            return
+        remaining = self._in_flight.get(tenant, 0) - 1
+        if remaining > 0:
+            self._in_flight[tenant] = remaining
+        else:
+            self._in_flight.pop(tenant, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "admitted": self.admitted,
+            "tenant_rate_limited": self.tenant_rate_limited,
+            "uid_rate_limited": self.uid_rate_limited,
+            "concurrency_shed": self.concurrency_shed,
+            "in_flight": sum(self._in_flight.values()),
+            "tracked_tenants": len(self.tenant_buckets or ()),
+            "tracked_uids": len(self.uid_buckets or ()),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Applies an AdmissionController to every HTTP request.
+
+    The tenant is the first path segment under `api_prefix` unless it is one of
+    the `reserved` router prefixes (auth, flags, ...), falling back to `lookup_host`
+    given the Host header, which must answer from memory. The uid comes from `lookup_uid`
+    given the bearer token; it only knows already verified tokens, so this never
+    verifies a token itself. Paths in `exempt` skip admission; requests ending in
+    one of `long_lived` (SSE streams) are rate limited but hold no concurrency slot.
+    """
+
+    def __init__(
+            self,
+            app,
+            controller: AdmissionController,
+            api_prefix: str = "/api",
+            reserved: Iterable[str] = (),
+            lookup_uid: Optional[Callable[[str], Optional[str]]] = None,
+            lookup_host: Optional[Callable[[str], Optional[str]]] = None,
+            exempt: Iterable[str] = ("/ping", "/metrics"),
+            long_lived: Iterable[str] = ("/events",)
+    ):
+        self.app = app
+        self.controller = controller
+        self.api_prefix = api_prefix.rstrip("/") + "/"
+        self.reserved = frozenset(reserved)
+        self.lookup_uid = lookup_uid
+        self.lookup_host = lookup_host
+        self.exempt = frozenset(exempt)
+        self.long_lived = tuple(long_lived)
+
+    def _tenant(self, scope) -> Optional[str]:
+        path = scope["path"]
+        if path.startswith(self.api_prefix):
+            segment = path[len(self.api_prefix):].split("/", 1)[0]
+            if segment and segment not in self.reserved:
+                return segment
+        if self.lookup_host is None:
+            return None
+        for name, value in scope["headers"]:
+            if name == b"host":
+                return self.lookup_host(value.decode("latin-1"))
+        return None
+
+    def _uid(self, scope) -> Optional[str]:
+        if self.lookup_uid is None:
+            return None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                header = value.decode("latin-1")
+                return self.lookup_uid(header[7:]) if header.startswith("Bearer ") else None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+        tenant, uid = self._tenant(scope), self._uid(scope)
+        rejected = self.controller.admit(tenant, uid)
+        if rejected is not None:
+            await self._reject(send, *rejected)
+            return
+        if scope["path"].endswith(self.long_lived):
+            self.controller.release(tenant)
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(tenant)
+
+    @staticmethod
+    async def _reject(send, status_code: int, retry_after: float, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
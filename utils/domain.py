@@ -1,7 +1,61 @@
 # utils/domain.py
-from requests import Request
+from typing import Optional
+from fastapi import Request
+from services.tenant_service import (
+    derived_indexes_fresh,
+    resolve_tenant_host,
+    resolve_tenant_host_cached,
+)
+from utils.executor import run_blocking
 
-def extract_tenant(request: Request):
-    host = request.headers.get("host") or ""
-    subdomain = host.split(".")[0]
-    return subdomain
+# ===================
+# HOST-BASED TENANT RESOLUTION
+# ===================
+
+
+class TenantResolutionMiddleware:
+    """
+    Resolves the Host header to a tenant once per request and stores it in
+    request state:
+
+        request.state.tenant         tenant key, or None
+        request.state.tenant_source  "domain" | "subdomain" | None
+
+    Lookups go to the in-memory domain index; it is re-validated against the
+    tenant store (off the event loop) at most every `max_age` seconds. Install
+    it inside admission control, so only admitted requests can cause that I/O.
+    """
+
+    def __init__(self, app, max_age: float = 5.0):
+        self.app = app
+        self.max_age = max_age
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            host = ""
+            for name, value in scope["headers"]:
+                if name == b"host":
+                    host = value.decode("latin-1")
+                    break
+            if derived_indexes_fresh(self.max_age):
+                resolved = resolve_tenant_host_cached(host)
+            else:
+                resolved = await run_blocking(resolve_tenant_host, host)
+            state = scope.setdefault("state", {})
+            state["tenant"], state["tenant_source"] = resolved or (None, None)
+        await self.app(scope, receive, send)
+
+
+def cached_host_tenant(host: str) -> Optional[str]:
+    """Tenant of a Host header value from the in-memory domain index only (never I/O)."""
+    resolved = resolve_tenant_host_cached(host)
+    return resolved[0] if resolved else None
+
+
+def extract_tenant(request: Request) -> Optional[str]:
+    """
+    Tenant of the request: the one resolved from the Host header by
+    TenantResolutionMiddleware, else the `/{tenant}` path segment.
+    """
+    tenant = getattr(request.state, "tenant", None)
+    return tenant or request.path_params.get("tenant")
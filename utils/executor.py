@@ -0,0 +1,59 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+from config import BLOCKING_IO_WORKERS
+from utils.metrics import metrics
+
+# ===================
+# BLOCKING I/O EXECUTOR
+# ===================
+# Firestore calls, token verification and tenant file access are synchronous.
+# Route handlers are `async def`, so that work is pushed onto this bounded
+# pool instead of stalling the event loop for every other in-flight request.
+
+T = TypeVar("T")
+
+# Created on first use, so the app can be started again after shutdown_executor()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    executor = _executor
+    if executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
+            executor = _executor
+    return executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking callable on the I/O executor and await its result.
+    Context variables of the calling task are visible inside `func`.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def call() -> T:
+        # Time spent waiting for a free worker thread
+        metrics.observe_dependency("executor.queue_wait", time.perf_counter() - submitted)
+        return func(*args, **kwargs)
+
+    return await loop.run_in_executor(_get_executor(), functools.partial(ctx.run, call))
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Stop the I/O worker threads (app shutdown); a later run_blocking starts a new pool."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
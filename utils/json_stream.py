@@ -0,0 +1,125 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, Tuple
+
+# ===================
+# INCREMENTAL JSON RECORD READER
+# ===================
+# Reads a request body of records as it arrives, without holding the whole
+# body in memory: either NDJSON (one JSON value per line) or a single JSON
+# array, detected from the first non-whitespace character.
+
+_WHITESPACE = " \t\r\n"
+
+
+class RecordError(Exception):
+    """A record that could not be parsed. `fatal` means the rest of the stream cannot be read."""
+
+    def __init__(self, message: str, fatal: bool = False):
+        super().__init__(message)
+        self.fatal = fatal
+
+
+async def iter_json_records(
+        chunks: AsyncIterator[bytes],
+        max_record_bytes: int = 65536
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (row number, record) per record, starting at 1. A record that cannot be
+    parsed is yielded as a RecordError: NDJSON continues with the next line, a
+    malformed JSON array ends the stream after a fatal RecordError.
+
+    Raises:
+        UnicodeDecodeError: if the body is not valid UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    mode = None
+    row = 0
+    finished = False
+
+    iterator = chunks.__aiter__()
+
+    async def more() -> bool:
+        """Append the next chunk to `buffer`; False at the end of the body."""
+        nonlocal buffer
+        while True:
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                buffer += decoder.decode(b"", final=True)
+                return False
+            if chunk:
+                buffer += decoder.decode(chunk)
+                return True
+
+    eof = False
+    # JSON array state: "first" element or "]", a "separator" (',' or ']'), or a "value"
+    expect = "first"
+    while not finished:
+        if mode is None:
+            stripped = buffer.lstrip(_WHITESPACE)
+            if not stripped:
+                buffer = ""
+                if eof or not await more():
+                    return
+                continue
+            mode = "array" if stripped[0] == "[" else "ndjson"
+            buffer = stripped[1:] if mode == "array" else stripped
+            continue
+
+        if mode == "ndjson":
+            newline = buffer.find("\n")
+            if newline < 0 and not eof:
+                if len(buffer) > max_record_bytes:
+                    row += 1
+                    yield row, RecordError(f"Record exceeds {max_record_bytes} bytes.", fatal=True)
+                    return
+                eof = not await more()
+                continue
+            line, buffer = (buffer[:newline], buffer[newline + 1:]) if newline >= 0 else (buffer, "")
+            if line.strip():
+                row += 1
+                try:
+                    yield row, json.loads(line)
+                except ValueError as e:
+                    yield row, RecordError(f"Invalid JSON: {e}")
+            if eof and not buffer:
+                finished = True
+            continue
+
+        # JSON array: one element at a time
+        buffer = buffer.lstrip(_WHITESPACE)
+        if not buffer:
+            if eof:
+                yield row + 1, RecordError("Unexpected end of JSON array.", fatal=True)
+                return
+            eof = not await more()
+            continue
+        if expect != "value":
+            if buffer[0] == "]":
+                return
+            if expect == "separator":
+                if buffer[0] != ",":
+                    yield row + 1, RecordError("Expected ',' or ']' between array elements.", fatal=True)
+                    return
+                buffer = buffer[1:]
+            expect = "value"
+            continue
+        try:
+            record, end = json.JSONDecoder().raw_decode(buffer)
+        except ValueError as e:
+            # Possibly just incomplete: read more unless the element is already too large
+            if eof or len(buffer) > max_record_bytes:
+                yield row + 1, RecordError(f"Invalid JSON array element: {e}", fatal=True)
+                return
+            eof = not await more()
+            continue
+        if end == len(buffer) and not eof:
+            # A trailing number may continue in the next chunk
+            eof = not await more()
+            continue
+        row += 1
+        buffer = buffer[end:]
+        expect = "separator"
+        yield row, record
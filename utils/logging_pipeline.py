@@ -0,0 +1,200 @@
+import atexit
+import contextvars
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# ===================
+# ASYNC LOGGING PIPELINE
+# ===================
+#
+# Request code only creates a LogRecord and puts it on a bounded queue; a
+# background thread formats and writes it. %-style arguments are merged into
+# the message on that thread too, so a line costs the caller a record, a
+# couple of context lookups and a non-blocking queue put. When the queue is
+# full, records are dropped (and counted) rather than blocking the event loop.
+#
+# High-volume loggers (auth success, health checks) can be sampled and/or
+# rate limited per logger name, see LOG_SAMPLE_RATES / LOG_RATE_LIMITS.
+
+# ASGI scope of the request being served, for the tenant/uid/route log context
+_request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("log_request_scope", default=None)
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s%(context)s"
+
+
+def parse_logger_settings(spec: str) -> Dict[str, float]:
+    """`name=value,name=value` (LOG_SAMPLE_RATES / LOG_RATE_LIMITS) -> {logger name: value}."""
+    settings = {}
+    for item in (spec or "").split(","):
+        name, sep, value = item.strip().partition("=")
+        if sep and name.strip():
+            settings[name.strip()] = float(value)
+    return settings
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware making the current request visible to log records."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Captures tenant, uid and route of the current request as record attributes
+    (plain dict reads in the calling thread). The `context` suffix is only
+    rendered by ContextFormatter, on the logging thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        scope = _request_scope.get()
+        if scope is not None:
+            state = scope.get("state") or {}
+            route = scope.get("route")
+            record.tenant = state.get("tenant") or (scope.get("path_params") or {}).get("tenant")
+            record.uid = state.get("uid")
+            record.route = getattr(route, "path", None) if route is not None else scope.get("path")
+        return True
+
+
+class ContextFormatter(logging.Formatter):
+    """Appends ` tenant=... uid=... route=...` for records logged during a request."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [f"{name}={getattr(record, name)}" for name in ("tenant", "uid", "route") if getattr(record, name, None)]
+        record.context = " " + " ".join(parts) if parts else ""
+        return super().format(record)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a `rate` fraction of records (0..1) and at most `per_second` records
+    per second (token bucket, bursts up to one second's worth). Attached to a
+    single logger; records it rejects are never queued or formatted.
+    """
+
+    def __init__(self, rate: float = 1.0, per_second: Optional[float] = None):
+        super().__init__()
+        self.rate = rate
+        self.per_second = per_second
+        self._tokens = per_second or 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate < 1.0 and random.random() >= self.rate:
+            self.sampled_out += 1
+            return False
+        if self.per_second is not None:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.per_second, self._tokens + (now - self._updated) * self.per_second)
+                self._updated = now
+                if self._tokens < 1.0:
+                    self.rate_limited += 1
+                    return False
+                self._tokens -= 1.0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that neither formats in the caller nor blocks on a full queue."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting (message args, exception text) happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    def __init__(self):
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+        self.filters: Dict[str, SamplingFilter] = {}
+
+    def configure(
+            self,
+            level: str = "INFO",
+            queue_size: int = 10000,
+            sample_rates: Optional[Dict[str, float]] = None,
+            rate_limits: Optional[Dict[str, float]] = None,
+            capture=("uvicorn", "uvicorn.access"),
+            stream=None
+    ) -> None:
+        """
+        Route the root logger, and the `capture` loggers that have handlers of their
+        own (uvicorn's access log), through the queue. Reconfiguring replaces the previous setup.
+        """
+        self.stop()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(ContextFormatter(LOG_FORMAT))
+
+        self.handler = NonBlockingQueueHandler(queue.Queue(maxsize=max(1, queue_size)))
+        self.handler.addFilter(RequestContextFilter())
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        for name in capture:
+            captured = logging.getLogger(name)
+            for handler in list(captured.handlers):
+                captured.removeHandler(handler)
+            captured.propagate = True
+
+        for name, sampling in self.filters.items():
+            logging.getLogger(name).removeFilter(sampling)
+        self.filters = {}
+        sample_rates, rate_limits = sample_rates or {}, rate_limits or {}
+        for name in set(sample_rates) | set(rate_limits):
+            sampling = SamplingFilter(sample_rates.get(name, 1.0), rate_limits.get(name))
+            logging.getLogger(name).addFilter(sampling)
+            self.filters[name] = sampling
+
+        self.listener = QueueListener(self.handler.queue, output, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Flush queued records and stop the writer thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.handler.queue.qsize() if self.handler else 0,
+            "dropped": self.handler.dropped if self.handler else 0,
+            "sampled_out": sum(f.sampled_out for f in self.filters.values()),
+            "rate_limited": sum(f.rate_limited for f in self.filters.values()),
+        }
+
+
+logging_pipeline = LoggingPipeline()
+atexit.register(logging_pipeline.stop)
@@ -0,0 +1,286 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from config import METRICS_MAX_TENANTS
+
+# ===================
+# REQUEST & DEPENDENCY METRICS
+# ===================
+# Fixed-bucket histograms kept in process memory and rendered in the
+# Prometheus text format by GET /metrics. Observing a value is a dict lookup,
+# a bisect and two increments under an uncontended lock.
+#
+# Label cardinality is bounded: routes are the route *templates* (unmatched
+# paths share one label), only the first `max_tenants` tenants that got a
+# successful response get their own label, and every family caps its number of
+# series, folding the rest into an "other" series.
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+OTHER = "other"
+NO_ROUTE = "unmatched"
+NO_TENANT = ""
+
+# ASGI scope of the request being handled; run_blocking copies it into executor threads
+_current_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("metrics_scope", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """One labelled histogram family (`<name>_bucket`, `<name>_sum`, `<name>_count`)."""
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Iterable[str],
+            buckets: Iterable[float] = DEFAULT_BUCKETS,
+            max_series: int = 5000
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.max_series = max_series
+        self._overflow = tuple(OTHER for _ in self.labelnames)
+        # labels -> [count per bucket (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                if len(self._series) >= self.max_series:
+                    labels = self._overflow
+                series = self._series.get(labels)
+                if series is None:
+                    series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float]]:
+        with self._lock:
+            return {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str], max_series: int = 5000):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._overflow = tuple(OTHER for _ in self.labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            if labels not in self._values and len(self._values) >= self.max_series:
+                labels = self._overflow
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values)
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str = "mint", max_tenants: int = 50, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.max_tenants = max_tenants
+        self.requests = Histogram(
+            f"{namespace}_http_request_duration_seconds",
+            "Time from request start until the response headers are sent.",
+            ("method", "route", "tenant", "status"),
+            buckets,
+        )
+        self.dependencies = Histogram(
+            f"{namespace}_dependency_duration_seconds",
+            "Time spent in a dependency call (Firebase, Firestore, tenant storage, executor queue), by route.",
+            ("route", "dependency"),
+            buckets,
+        )
+        self.dependency_errors = Counter(
+            f"{namespace}_dependency_errors_total",
+            "Dependency calls that raised.",
+            ("route", "dependency"),
+        )
+        self._tenants: set = set()
+        self._tenants_lock = threading.Lock()
+        # name -> (documentation, label name, callable returning {label value: number})
+        self._gauges: Dict[str, Tuple[str, str, Callable[[], Dict[str, Any]]]] = {}
+
+    # -------------------
+    # Recording
+    # -------------------
+
+    def _tenant_label(self, tenant: Optional[str], status: int) -> str:
+        if not tenant:
+            return NO_TENANT
+        if tenant in self._tenants:
+            return tenant
+        # Only successful responses admit a new tenant, so arbitrary path values can't grow the label set
+        if status >= 400:
+            return OTHER
+        with self._tenants_lock:
+            if tenant in self._tenants:
+                return tenant
+            if len(self._tenants) < self.max_tenants:
+                self._tenants.add(tenant)
+                return tenant
+        return OTHER
+
+    def observe_request(self, scope: dict, status: int, seconds: float) -> None:
+        tenant = scope.get("path_params", {}).get("tenant")
+        self.requests.observe(
+            (scope.get("method", ""), route_label(scope), self._tenant_label(tenant, status), f"{status // 100}xx"),
+            seconds,
+        )
+
+    def observe_dependency(self, dependency: str, seconds: float, failed: bool = False) -> None:
+        scope = _current_scope.get()
+        labels = (route_label(scope) if scope is not None else NO_ROUTE, dependency)
+        self.dependencies.observe(labels, seconds)
+        if failed:
+            self.dependency_errors.inc(labels)
+
+    def timed(self, dependency: str) -> "_Timer":
+        """
+        Time a dependency call, attributed to the route being served:
+
+            with metrics.timed("firestore.users.get"):
+                doc = db.collection("users").document(uid).get()
+        """
+        return _Timer(self, dependency)
+
+    def register_gauges(self, name: str, documentation: str, label: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """Export the numeric values of `collect()` as `<namespace>_<name>{<label>="<key>"}` at scrape time."""
+        self._gauges[f"{self.namespace}_{name}"] = (documentation, label, collect)
+
+    def reset(self) -> None:
+        self.requests.clear()
+        self.dependencies.clear()
+        self.dependency_errors.clear()
+        with self._tenants_lock:
+            self._tenants.clear()
+
+    # -------------------
+    # Exposition
+    # -------------------
+
+    def render(self) -> str:
+        lines = self.requests.render() + self.dependencies.render() + self.dependency_errors.render()
+        for name, (documentation, label, collect) in sorted(self._gauges.items()):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(collect().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'{name}{{{label}="{_escape(str(key))}"}} {_format_value(value)}')
+        return "\n".join(lines) + "\n"
+
+
+class _Timer:
+    __slots__ = ("registry", "dependency", "start")
+
+    def __init__(self, registry: MetricsRegistry, dependency: str):
+        self.registry = registry
+        self.dependency = dependency
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.registry.observe_dependency(self.dependency, time.perf_counter() - self.start, failed=exc_type is not None)
+
+
+def route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", NO_ROUTE) if route is not None else NO_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware body buffering) that records
+    one request histogram sample per HTTP request. Latency is measured to the
+    `http.response.start` message, so long-lived streams (SSE) report time to
+    first byte rather than connection lifetime.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        recorded = False
+
+        async def send_wrapper(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                self.registry.observe_request(scope, message["status"], time.perf_counter() - start)
+            await send(message)
+
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            if not recorded:
+                self.registry.observe_request(scope, 500, time.perf_counter() - start)
+            raise
+        finally:
+            _current_scope.reset(token)
+
+
+# Process-wide registry, exported by GET /metrics
+metrics = MetricsRegistry(max_tenants=METRICS_MAX_TENANTS)
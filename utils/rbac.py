@@ -0,0 +1,85 @@
+import json
+from typing import Any, Dict, NamedTuple, Optional
+
+# ===================
+# COMPILED RBAC POLICY
+# ===================
+#
+# rbac_policy.json declares permissions, the permissions of each role and the
+# permissions each route requires. It is compiled once at startup: every
+# permission becomes a bit, every role an int mask, every route a required
+# mask, so authorizing a request is a dict lookup and an AND.
+#
+#   "roles":  {"<role>": ["<permission>", ...]}   "*" as a permission grants all of them;
+#             the "*" role lists permissions every authenticated user has
+#   "routes": {"<rule>": {"require": [...], "tenant_scoped": true}}
+#             tenant_scoped rules also require the user's tenant to be the
+#             `/{tenant}` path tenant, unless the role has `cross_tenant_permission`
+
+
+class Rule(NamedTuple):
+    name: str
+    required: int
+    tenant_scoped: bool
+
+
+class RbacPolicy:
+    def __init__(self, policy: Dict[str, Any]):
+        """
+        Raises:
+            ValueError: if a role or route refers to an undeclared permission.
+        """
+        self.bits: Dict[str, int] = {name: 1 << i for i, name in enumerate(policy.get("permissions", []))}
+        everything = (1 << len(self.bits)) - 1
+        roles = dict(policy.get("roles", {}))
+        self.base_mask = self._mask(roles.pop("*", []), everything, "role *")
+        self.role_masks: Dict[str, int] = {
+            role: self._mask(permissions, everything, f"role {role}") | self.base_mask
+            for role, permissions in roles.items()
+        }
+        cross_tenant = policy.get("cross_tenant_permission")
+        self.cross_tenant = self._mask([cross_tenant], everything, "cross_tenant_permission") if cross_tenant else 0
+        self.rules: Dict[str, Rule] = {
+            name: Rule(name, self._mask(spec.get("require", []), everything, f"route {name}"), bool(spec.get("tenant_scoped")))
+            for name, spec in policy.get("routes", {}).items()
+        }
+
+    def _mask(self, permissions, everything: int, where: str) -> int:
+        mask = 0
+        for permission in permissions:
+            if permission == "*":
+                mask |= everything
+            elif permission in self.bits:
+                mask |= self.bits[permission]
+            else:
+                raise ValueError(f"Unknown permission {permission!r} in {where}.")
+        return mask
+
+    def rule(self, name: str) -> Rule:
+        """
+        Raises:
+            KeyError: if the policy has no such route rule.
+        """
+        try:
+            return self.rules[name]
+        except KeyError:
+            raise KeyError(f"No RBAC policy rule named {name!r}.") from None
+
+    def grants_cross_tenant(self, role: Optional[str]) -> bool:
+        """Whether `role` may act on tenants other than its own (e.g. Admin)."""
+        return bool(self.role_masks.get(role, self.base_mask) & self.cross_tenant)
+
+    def check(self, rule: Rule, role: Optional[str], user_tenant: Optional[str], path_tenant: Optional[str]) -> Optional[str]:
+        """None if `role` of `user_tenant` may use `rule` for `path_tenant`, else the reason it may not."""
+        mask = self.role_masks.get(role, self.base_mask)
+        if mask & rule.required != rule.required:
+            return f"Access denied: role {role} lacks permission for {rule.name}"
+        if rule.tenant_scoped and path_tenant is not None and path_tenant != user_tenant \
+                and not mask & self.cross_tenant:
+            return "Access denied: user belongs to another tenant"
+        return None
+
+
+def load_policy(path: str) -> RbacPolicy:
+    with open(path, "r", encoding="utf-8") as f:
+        return RbacPolicy(json.load(f))
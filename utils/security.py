@@ -1,11 +1,73 @@
+import asyncio
 import logging
 from fastapi import Request, HTTPException, status, Depends
-from firebase_admin import auth as firebase_auth_exceptions
-from firebase_client import firebase_auth, db
+import firebase_client
+from firebase_client import firebase_auth
+from config import TOKEN_CHECK_REVOKED, AUTH_TOKEN_CLAIMS, RBAC_POLICY_PATH
+from services.auth_service import claims_outdated, fetch_user_metadata_async, token_cache
+from utils.executor import run_blocking
+from utils.metrics import metrics
+from utils.rbac import load_policy
 
 logger = logging.getLogger("MintTenantCore.Security")
+# One line per authenticated request: sampled / rate limited separately (see LOG_RATE_LIMITS)
+auth_logger = logging.getLogger("MintTenantCore.Auth")
 
-def get_current_user(request: Request) -> dict:
+# Role/permission bitmasks per route, see rbac_policy.json and authorize()
+rbac_policy = load_policy(RBAC_POLICY_PATH)
+
+def get_token_cache_stats() -> dict:
+    """Hit/miss counters and hit rate of the verified-token cache."""
+    return token_cache.stats()
+
+def _verify_id_token(id_token: str) -> dict:
+    try:
+        with metrics.timed("firebase.verify_id_token"):
+            return firebase_auth.verify_id_token(id_token, check_revoked=TOKEN_CHECK_REVOKED)
+    except Exception as exc:
+        raise _token_error(exc) from exc
+
+def _token_error(exc: Exception) -> HTTPException:
+    """The 401 for a failed verify_id_token."""
+    # Imported here, not at module level, so importing main does not load the Firebase SDK
+    from firebase_admin import auth as firebase_auth_exceptions
+    if isinstance(exc, firebase_auth_exceptions.InvalidIdTokenError):
+        logger.error("Invalid ID Token: %s", exc)
+        return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid ID token.")
+    if isinstance(exc, firebase_auth_exceptions.ExpiredIdTokenError):
+        logger.error("Expired ID Token: %s", exc)
+        return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired.")
+    if isinstance(exc, firebase_auth_exceptions.RevokedIdTokenError):
+        logger.error("Revoked ID Token: %s", exc)
+        return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked.")
+    logger.error("Firebase token verification failed: %s", exc)
+    # Highlight potential audience mismatch
+    if "aud" in str(exc).lower():
+        logger.error("⚠️ AUDIENCE MISMATCH: Check if frontend and backend use the same Firebase project.")
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired Firebase token.")
+
+def _claims_revoked(decoded: dict) -> bool:
+    """Whether the user's sessions were revoked after this token's sign-in (one Auth lookup)."""
+    with metrics.timed("firebase.get_user"):
+        valid_after = firebase_auth.get_user(decoded["uid"]).tokens_valid_after_timestamp
+    return bool(valid_after) and decoded.get("auth_time", 0) * 1000 < valid_after
+
+async def keep_signing_keys_fresh(margin: float, retry: float) -> None:
+    """
+    Background task: fetch the ID token signing certificates now and again
+    `margin` seconds before each copy expires, so no request pays for the fetch.
+    """
+    while True:
+        try:
+            max_age = await run_blocking(firebase_client.refresh_signing_keys)
+            delay = max(retry, max_age - margin)
+            logger.info("Signing keys refreshed; next refresh in %.0fs", delay)
+        except Exception as exc:
+            logger.warning("Signing key refresh failed: %s", exc)
+            delay = retry
+        await asyncio.sleep(delay)
+
+async def get_current_user(request: Request) -> dict:
     auth_header = request.headers.get("authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         logger.warning("Authorization header missing or invalid")
@@ -13,33 +75,34 @@ def get_current_user(request: Request) -> dict:
 
     id_token = auth_header.split(" ")[1]
 
-    try:
-        decoded = firebase_auth.verify_id_token(id_token)
-    except firebase_auth_exceptions.InvalidIdTokenError as e:
-        logger.error(f"Invalid ID Token: {e}")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid ID token.")
-    except firebase_auth_exceptions.ExpiredIdTokenError as e:
-        logger.error(f"Expired ID Token: {e}")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired.")
-    except firebase_auth_exceptions.RevokedIdTokenError as e:
-        logger.error(f"Revoked ID Token: {e}")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked.")
-    except Exception as exc:
-        logger.error(f"Firebase token verification failed: {exc}")
-        # Highlight potential audience mismatch
-        if "aud" in str(exc).lower():
-            logger.error("⚠️ AUDIENCE MISMATCH: Check if frontend and backend use the same Firebase project.")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired Firebase token.")
+    decoded = token_cache.get(id_token)
+    if decoded is None:
+        decoded = await run_blocking(_verify_id_token, id_token)
+        # Cross-tenant claims (Admin) are too powerful to trust until the token expires:
+        # check once per token that the user's sessions were not revoked since sign-in
+        if AUTH_TOKEN_CLAIMS and not TOKEN_CHECK_REVOKED and decoded.get("tenant") \
+                and rbac_policy.grants_cross_tenant(decoded.get("role")) \
+                and await run_blocking(_claims_revoked, decoded):
+            logger.warning("Revoked ID Token: %s", decoded["uid"])
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked.")
+        token_cache.put(id_token, decoded)
 
-    # Look up user metadata
-    user_doc = db.collection("users").document(decoded["uid"]).get()
-    user_data = user_doc.to_dict() if user_doc.exists else {}
+    # Role and tenant from the token's custom claims, unless they changed after the
+    # token's sign-in; otherwise look up user metadata (cached; stashed on the request
+    # so handlers don't fetch it again)
+    if AUTH_TOKEN_CLAIMS and decoded.get("role") and decoded.get("tenant") \
+            and not claims_outdated(decoded["uid"], decoded.get("auth_time")):
+        user_data = {"role": decoded["role"], "tenant": decoded["tenant"]}
+    else:
+        user_data = await fetch_user_metadata_async(decoded["uid"]) or {}
+    request.state.user_metadata = user_data
+    request.state.uid = decoded["uid"]
 
     if not user_data.get("role") or not user_data.get("tenant"):
-        logger.warning(f"User {decoded['uid']} missing role or tenant in Firestore.")
+        logger.warning("User %s missing role or tenant in Firestore.", decoded["uid"])
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User role or tenant not set in Firestore.")
 
-    logger.info(f"Authenticated user: {decoded['uid']} ({user_data.get('role')} @ {user_data.get('tenant')})")
+    auth_logger.info("Authenticated user: %s (%s @ %s)", decoded["uid"], user_data.get("role"), user_data.get("tenant"))
     return {
         "uid": decoded["uid"],
         "email": decoded.get("email"),
@@ -57,12 +120,33 @@ def require_role(allowed_roles):
         async def handler(..., current_user=Depends(require_role(["Admin", "HR"]))):
             ...
     """
-    def role_dependency(current_user: dict = Depends(get_current_user)):
+    async def role_dependency(current_user: dict = Depends(get_current_user)):
         if current_user["role"] not in allowed_roles:
-            logger.warning(f"Access denied: {current_user['role']} not in {allowed_roles}")
+            logger.warning("Access denied: %s not in %s", current_user["role"], allowed_roles)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied: requires role(s) {allowed_roles}"
             )
         return current_user
     return role_dependency
+
+def authorize(rule_name: str):
+    """
+    Dependency factory checking the named route rule of the compiled RBAC policy:
+    the role's permissions and, for tenant-scoped rules, that the user belongs to
+    the `/{tenant}` path tenant. An unknown rule name fails at import time.
+
+    Usage:
+        @router.put("/{tenant}/config")
+        async def handler(..., current_user=Depends(authorize("tenant.update_config"))):
+            ...
+    """
+    rule = rbac_policy.rule(rule_name)
+
+    async def policy_dependency(request: Request, current_user: dict = Depends(get_current_user)):
+        denied = rbac_policy.check(rule, current_user["role"], current_user["tenant"], request.path_params.get("tenant"))
+        if denied:
+            logger.warning("%s (uid %s, tenant %s)", denied, current_user["uid"], current_user["tenant"])
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=denied)
+        return current_user
+    return policy_dependency
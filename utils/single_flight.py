@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+from utils.executor import run_blocking
+
+# ===================
+# SINGLE-FLIGHT CALL COALESCING
+# ===================
+#
+# When many requests miss a cache at once (after a deploy or an expiry), each
+# would repeat the same backend call. A SingleFlight group runs one call per
+# key at a time; everyone asking for that key meanwhile waits for it and gets
+# its result, or its exception. Results are shared: treat them as read-only.
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key, from worker threads (do)
+    and from the event loop (do_async) alike.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, "asyncio.Future"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[..., T], *args: Any) -> T:
+        """Run func(*args) in this thread, or wait for the identical call already running."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key: Hashable, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run the blocking func(*args) on the I/O executor, or await the identical call
+        already running. The call runs in its own task: a caller that is cancelled
+        stops waiting without cancelling it for the others.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(run_blocking(self.do, key, func, *args))
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            with self._lock:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: "asyncio.Future") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved when every waiter was cancelled
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def single_flight(name: str) -> SingleFlight:
+    """The process-wide group `name` (created on first use)."""
+    group = _groups.get(name)
+    if group is None:
+        group = _groups.setdefault(name, SingleFlight(name))
+    return group
+
+
+def get_single_flight_stats() -> Dict[str, int]:
+    """Counters of every group as `<group>.<counter>` (calls, coalesced, in_flight)."""
+    return {f"{name}.{counter}": value for name, group in _groups.items() for counter, value in group.stats().items()}
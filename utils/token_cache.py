@@ -0,0 +1,107 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# ===================
+# VERIFIED ID-TOKEN CACHE
+# ===================
+
+
+class TokenCache:
+    """
+    Bounded, thread-safe LRU of already-verified Firebase ID tokens.
+
+    Entries are keyed by the SHA-256 of the raw token (the token itself is
+    never stored) and expire at the token's own `exp` claim, or after
+    `max_ttl` seconds if that comes first.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_ttl: float = 300.0, leeway: float = 5.0):
+        self.max_entries = max(0, max_entries)
+        self.max_ttl = max_ttl
+        self.leeway = leeway
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(id_token: str) -> bytes:
+        return hashlib.sha256(id_token.encode()).digest()
+
+    def get(self, id_token: str) -> Optional[Dict[str, Any]]:
+        """Return the decoded claims for a previously verified token, if still valid."""
+        key = self._key(id_token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, decoded = entry
+            if now >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decoded
+
+    def peek(self, id_token: str) -> Optional[Dict[str, Any]]:
+        """Like get(), but leaves LRU order, expired entries and hit/miss counters alone."""
+        entry = self._entries.get(self._key(id_token))
+        if entry is None or time.time() >= entry[0]:
+            return None
+        return entry[1]
+
+    def put(self, id_token: str, decoded: Dict[str, Any]) -> None:
+        if not self.max_entries:
+            return
+        now = time.time()
+        expires_at = now + self.max_ttl
+        if decoded.get("exp"):
+            expires_at = min(expires_at, float(decoded["exp"]) - self.leeway)
+        if expires_at <= now:
+            return
+        key = self._key(id_token)
+        with self._lock:
+            self._entries[key] = (expires_at, decoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_uid(self, uid: str) -> int:
+        """Drop every cached token of `uid` (e.g. after revoking their sessions)."""
+        return self.invalidate_uids((uid,))
+
+    def invalidate_uids(self, uids) -> int:
+        """invalidate_uid for several users in one pass over the cache."""
+        uids = frozenset(uids)
+        with self._lock:
+            stale = [key for key, (_, decoded) in self._entries.items() if decoded.get("uid") in uids]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }